@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+
+from yraa import synth
+
+
+@pytest.fixture(scope="session")
+def season_db(tmp_path_factory):
+    """A small synthetic season (see yraa.synth), ingested the way the CLI does it."""
+    base = tmp_path_factory.mktemp("season")
+    raw_dir = base / "raw"
+    db_path = str(base / "yraa.db")
+    synth.generate_season(str(raw_dir), schools=6, athletes=4, events=4, seed=7)
+    subprocess.run(
+        [sys.executable, "-m", "yraa.ingest", "--dir", str(raw_dir), "--db", db_path, "--yes", "--no-snapshot"],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def client(season_db):
+    """A TestClient for the web app serving season_db, with admin token "s3cret".
+
+    yraa.web reads its settings at import, so it is imported here, after the
+    environment is set. Startup (warm-up and the job worker) does not run.
+    """
+    from fastapi.testclient import TestClient
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("YRAA_DB_PATH", season_db)
+        mp.setenv("YRAA_ADMIN_TOKEN", "s3cret")
+        mp.delenv("YRAA_TENANTS", raising=False)
+        from yraa import web
+        yield TestClient(web.app)
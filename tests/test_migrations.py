@@ -0,0 +1,152 @@
+import sqlite3
+
+import pytest
+
+from yraa.db import SCHEMA_VERSION, get_changes, get_readonly_connection, init_db, migrate_archives
+from yraa.model import SeasonModel
+from yraa.snapshot import current_snapshot, publish_snapshot
+
+# The schema before migrations were versioned (PRAGMA user_version 0)
+BASELINE_SCHEMA = """
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_date TEXT NOT NULL,
+    location TEXT,
+    ofsaa_ski INTEGER DEFAULT 0,
+    ofsaa_snowboard INTEGER DEFAULT 0,
+    created_at TEXT DEFAULT (datetime('now')),
+    UNIQUE(event_date)
+);
+
+CREATE TABLE race_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL REFERENCES events(id),
+    race_number INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    sport TEXT NOT NULL,
+    division TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    school TEXT NOT NULL,
+    place INTEGER,
+    time_seconds REAL,
+    points INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    created_at TEXT DEFAULT (datetime('now')),
+    UNIQUE(race_number, gender, sport, division, first_name, last_name)
+);
+
+CREATE TABLE ingested_files (
+    filename TEXT PRIMARY KEY,
+    race_number INTEGER NOT NULL,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+"""
+
+# (event_id, race_number, first_name, last_name, school, place, time_seconds, points, status)
+RESULTS = [
+    (1, 1, "Ava", "Kim", "Alpha SS", 1, 40.1, 25, None),
+    (1, 1, "Mia", "Lee", "Beta CI", 2, 41.5, 20, None),
+    (1, 1, "Zoe", "Xu", "Beta CI", None, None, 0, "DNF"),
+    (2, 2, "Ava", "Kim", "Alpha SS", 2, 39.9, 20, None),
+    (2, 2, "Mia", "Lee", "Beta CI", 1, 39.0, 25, None),
+]
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO events (event_date, location) VALUES ('2026-01-15', 'Hill A')")
+    conn.execute("INSERT INTO events (event_date, location, ofsaa_ski) VALUES ('2026-02-05', 'Hill B', 1)")
+    conn.executemany(
+        """INSERT INTO race_results (event_id, race_number, gender, sport, division, first_name, last_name,
+                                     school, place, time_seconds, points, status)
+           VALUES (?, ?, 'girls', 'ski', 'hs', ?, ?, ?, ?, ?, ?, ?)""",
+        RESULTS,
+    )
+    conn.execute("INSERT INTO ingested_files (filename, race_number) VALUES ('20260115-1-girls_ski_results.csv', 1)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_baseline_database_is_migrated(baseline_db):
+    conn = init_db(baseline_db)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert {r["season"] for r in conn.execute("SELECT season FROM race_results")} == {2026}
+        assert {r["season"] for r in conn.execute("SELECT season FROM events")} == {2026}
+
+        changes = get_changes(conn)
+        kinds = [(c["kind"], c["action"]) for c in changes]
+        assert kinds.count(("race", "insert")) == 2
+        assert kinds.count(("result", "insert")) == len(RESULTS)
+        assert kinds.count(("event", "update")) == 1  # the OFSAA flag
+
+        assert conn.execute("SELECT COUNT(*) FROM result_stats").fetchone()[0] == len(RESULTS)
+        assert conn.execute("SELECT COUNT(*) FROM race_stats").fetchone()[0] == 2
+
+        model = SeasonModel.load(conn)
+        board = model.individual_leaderboard("girls", "ski", "hs")
+        # Tied on points, head-to-head and best results: the DNF did not count
+        assert [(a["last_name"], a["total_points"], a["rank"]) for a in board] == [("Kim", 45, 1), ("Lee", 45, 1)]
+        assert [(t.school, t.total_points) for t in model.team_leaderboard("girls", "ski")] == [
+            ("Alpha SS", 45), ("Beta CI", 45),
+        ]
+    finally:
+        conn.close()
+
+
+def test_migrated_database_is_left_alone(baseline_db):
+    init_db(baseline_db).close()
+    conn = init_db(baseline_db)
+    try:
+        assert len(get_changes(conn)) == 2 + len(RESULTS) + 1
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def test_old_archive_is_migrated_once_then_read_only(tmp_path):
+    # An archive written before the analytics tables existed
+    archive = str(tmp_path / "yraa-2025.db")
+    conn = sqlite3.connect(archive)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.close()
+    db_path = str(tmp_path / "yraa.db")
+    conn = init_db(db_path)
+    conn.execute("INSERT INTO seasons (season, archive_path) VALUES (2025, 'yraa-2025.db')")
+    conn.commit()
+    conn.close()
+
+    migrate_archives(db_path)
+    conn = get_readonly_connection(archive)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM athlete_stats").fetchone()[0] == 0
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM race_results")
+    finally:
+        conn.close()
+
+
+def test_snapshot_has_current_schema(baseline_db):
+    path = publish_snapshot(baseline_db)
+    assert current_snapshot(baseline_db) == path
+    conn = get_readonly_connection(path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def test_snapshot_with_older_schema_is_ignored(baseline_db):
+    path = publish_snapshot(baseline_db)
+    # As published by a version with fewer migrations
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+    conn.commit()
+    conn.close()
+    assert current_snapshot(baseline_db) is None
@@ -0,0 +1,125 @@
+import random
+from collections import defaultdict
+
+import pytest
+
+from yraa.db import current_season, get_connection, rank_individuals
+from yraa.model import SeasonModel
+from yraa.models import ContributingScore, RaceResult
+from yraa.rules import DEFAULT_RULES, Rules
+from yraa.scoring import best_results, calculate_team_scores, counting_team_scores
+
+CATEGORIES = [(g, s, d) for g in ("girls", "boys") for s in ("ski", "snowboard") for d in ("hs", "open")]
+
+
+def _sql_leaderboard(conn, gender, sport, division):
+    """A leaderboard from rows queried straight from the database, as before the in-memory model."""
+    params = (gender, sport, division, current_season(conn))
+    races = conn.execute(
+        """SELECT DISTINCT race_number FROM resolved_results
+           WHERE gender = ? AND sport = ? AND division = ? AND season = ? ORDER BY race_number""",
+        params,
+    ).fetchall()
+    rows = conn.execute(
+        """SELECT first_name, last_name, school, race_number, points FROM resolved_results
+           WHERE gender = ? AND sport = ? AND division = ? AND season = ? AND status IS NULL
+           ORDER BY last_name, first_name, points DESC, race_number""",
+        params,
+    ).fetchall()
+    return rank_individuals(rows, {r["race_number"]: i + 1 for i, r in enumerate(races)})
+
+
+@pytest.mark.parametrize("gender,sport,division", CATEGORIES)
+def test_model_leaderboard_matches_database(season_db, gender, sport, division):
+    conn = get_connection(season_db)
+    try:
+        expected = _sql_leaderboard(conn, gender, sport, division)
+        model = SeasonModel.load(conn)
+    finally:
+        conn.close()
+    assert expected
+    assert model.individual_leaderboard(gender, sport, division) == expected
+
+
+def test_rank_individuals_counts_top_results_and_shares_ties():
+    race_seq = {10 + i: i + 1 for i in range(5)}
+    rows = [
+        {"first_name": "Ava", "last_name": "Kim", "school": "A", "race_number": 10 + i, "points": p}
+        for i, p in enumerate((25, 20, 18, 16))
+    ] + [
+        {"first_name": "Mia", "last_name": "Lee", "school": "B", "race_number": 10 + i, "points": p}
+        for i, p in enumerate((25, 20, 18))
+    ] + [
+        {"first_name": "Zoe", "last_name": "Xu", "school": "C", "race_number": 10, "points": 0},
+    ]
+    board = rank_individuals(rows, race_seq)
+    # Five races: the best three count; the zero-point athlete is left out
+    assert [(a["last_name"], a["total_points"]) for a in board] == [("Kim", 63), ("Lee", 63)]
+    # Equal totals and equal head-to-head: more races breaks the tie
+    assert [a["rank"] for a in board] == [1, 2]
+    assert [r["counting"] for r in board[0]["all_results"]] == [True, True, True, False]
+
+
+def _random_results(seed, schools=5, athletes=6, races=10):
+    """Results with many ties and zeros, in race order."""
+    rng = random.Random(seed)
+    results = []
+    for race in range(1, races + 1):
+        for s in range(schools):
+            for a in range(athletes):
+                if rng.random() < 0.7:
+                    score = rng.choice((0, 0, 1, 5, 5, 10, 12, 12, 15, 20, 25))
+                    results.append(RaceResult(f"Athlete {s}-{a}", f"School {s}", float(score), race, "hs"))
+    return results
+
+
+def _reference_counting_scores(school_results, rules):
+    """A school's counting scores, as calculate_team_scores computed them before counting_team_scores."""
+    by_athlete = defaultdict(list)
+    for r in school_results:
+        by_athlete[r.athlete_name].append(r)
+    eligible = []
+    for athlete, results in by_athlete.items():
+        if max(r.score for r in results) == 0:
+            continue
+        for r in sorted(results, key=lambda r: r.score, reverse=True)[:rules.max_scores_per_racer]:
+            eligible.append(ContributingScore(r.score, athlete, r.race_number, r.division))
+    eligible.sort(key=lambda c: c.score, reverse=True)
+    return eligible[:rules.max_team_scores]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, Rules(max_team_scores=5, max_scores_per_racer=2)])
+def test_team_scores_match_reference(seed, rules):
+    results = _random_results(seed)
+    by_school = defaultdict(list)
+    for r in results:
+        by_school[r.school].append(r)
+    teams = calculate_team_scores(results, rules)
+    assert teams
+    for team in teams:
+        expected = _reference_counting_scores(by_school[team.school], rules)
+        assert team.contributing_scores == expected
+        assert team.total_points == sum(c.score for c in expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_counting_team_scores_on_plain_scores(seed):
+    # The projection scores simulated seasons from bare numbers, without a key
+    results = _random_results(seed)
+    for team in calculate_team_scores(results):
+        by_athlete = defaultdict(list)
+        for r in results:
+            if r.school == team.school:
+                by_athlete[r.athlete_name].append(r.score)
+        assert sum(counting_team_scores(by_athlete.values())) == team.total_points
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("rules", [DEFAULT_RULES, Rules(max_team_scores=5, max_scores_per_racer=2)])
+def test_best_results_keep_team_scores(seed, rules):
+    results = _random_results(seed)
+    # A generator, as the streaming legacy CLI passes
+    best = best_results((r for r in results), rules)
+    assert len(best) < len(results)
+    assert calculate_team_scores(best, rules) == calculate_team_scores(results, rules)
@@ -0,0 +1,162 @@
+import os
+
+import pytest
+
+from yraa.db import current_season, get_connection
+from yraa.model import SeasonModel
+from yraa.projection import WEB_MAX_REMAINING_RACES
+
+
+@pytest.fixture(scope="module")
+def leader(season_db, client):
+    """(athlete id, school id, school) of the girls ski HS leader, as the app's URLs name them."""
+    from yraa import web
+
+    conn = get_connection(season_db)
+    model = SeasonModel.load(conn)
+    conn.close()
+    first = web.individual_leaderboard(model, "girls", "ski", "hs")[0]
+    name = (first["first_name"], first["last_name"])
+    return web.athlete_slugs(model)[name], web.school_slugs(model)[first["school"]], first["school"]
+
+
+@pytest.mark.parametrize("body", [
+    "not json",
+    "{}",
+    "[]",
+    "[1, 2]",
+    "[" + ", ".join(['{"view": "team", "gender": "girls", "sport": "ski"}'] * 51) + "]",
+])
+def test_batch_rejects_malformed_requests(client, body):
+    resp = client.post("/api/batch", content=body, headers={"Content-Type": "application/json"})
+    assert resp.status_code == 400
+    assert "error" in resp.json()
+
+
+def test_batch_reports_invalid_views_in_place(client):
+    views = [
+        {"view": "team", "gender": "girls", "sport": "ski"},
+        {"view": "medals", "gender": "girls", "sport": "ski", "division": "hs"},
+        {"view": "individual", "gender": ["girls"], "sport": "ski", "division": "hs"},
+        {"view": "individual", "gender": "girls", "sport": "ski"},
+        {"view": "races", "gender": "girls", "sport": "ski", "division": "hs", "race": "1"},
+        {"view": "races", "gender": "girls", "sport": "ski", "division": "hs", "race": True},
+        {"view": "races", "gender": "girls", "sport": "ski", "division": "hs", "race": 1},
+    ]
+    resp = client.post("/api/batch", json=views)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert len(results) == len(views)
+    assert "data" in results[0] and "data" in results[-1]
+    assert all(set(r) == {"error"} for r in results[1:-1])
+
+
+@pytest.mark.parametrize("path", ["/athlete/nobody", "/api/athlete/nobody"])
+def test_unknown_athlete_is_not_found(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_athlete_profile(client, leader):
+    athlete_id, _, school = leader
+    assert client.get(f"/athlete/{athlete_id}").status_code == 200
+    profile = client.get(f"/api/athlete/{athlete_id}").json()
+    assert any(c["school"] == school for c in profile["categories"])
+
+
+@pytest.mark.parametrize("path", ["/school/nowhere", "/api/school/nowhere"])
+def test_unknown_school_is_not_found(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_school_dashboard(client, leader):
+    _, school_id, school = leader
+    assert client.get(f"/school/{school_id}").status_code == 200
+    assert client.get(f"/api/school/{school_id}").json()["school"] == school
+
+
+@pytest.mark.parametrize("path", [
+    "/detail/girls/curling/hs/x.html",
+    "/detail/girls/ski/relay/x.html",
+    "/detail/girls/ski/hs/nobody.html",
+    "/detail/girls/ski/team/nowhere.html",
+])
+def test_unknown_detail_is_not_found(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_detail_fragments(client, leader):
+    athlete_id, school_id, school = leader
+    assert client.get(f"/detail/girls/ski/hs/{athlete_id}.html").status_code == 200
+    resp = client.get(f"/detail/girls/ski/team/{school_id}.html")
+    assert resp.status_code == 200
+    assert school in resp.text
+    # An athlete id is not a team, and an athlete is only in their own division's dialog
+    assert client.get(f"/detail/girls/ski/team/{athlete_id}.html").status_code == 404
+    assert client.get(f"/detail/girls/ski/open/{athlete_id}.html").status_code == 404
+
+
+@pytest.mark.parametrize("path,status", [
+    ("/api/projection/girls/curling", 404),
+    ("/api/projection/girls/ski?remaining=0", 400),
+    (f"/api/projection/girls/ski?remaining={WEB_MAX_REMAINING_RACES + 1}", 400),
+    ("/api/projection/girls/ski?remaining=two", 422),
+])
+def test_projection_rejects_invalid_parameters(client, path, status):
+    assert client.get(path).status_code == status
+
+
+ADMIN = {"Authorization": "Bearer s3cret"}
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}, {"Authorization": "Basic s3cret"}])
+def test_admin_requires_the_token(client, headers):
+    resp = client.get("/api/admin/jobs", headers=headers)
+    assert resp.status_code == 401
+    assert resp.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_admin_is_hidden_without_a_token(client, monkeypatch):
+    from yraa import web
+
+    monkeypatch.setattr(web, "ADMIN_TOKEN", "")
+    assert client.get("/api/admin/jobs", headers=ADMIN).status_code == 404
+
+
+def test_admin_upload_errors(client, season_db, monkeypatch):
+    from yraa import jobs, web
+
+    resp = client.post("/api/admin/uploads/results.csv", content=b"x", headers=ADMIN)
+    assert resp.status_code == 400
+    monkeypatch.setattr(web, "MAX_UPLOAD_BYTES", 10)
+    resp = client.post("/api/admin/uploads/20260301-1-girls_ski_results.csv", content=b"x" * 100, headers=ADMIN)
+    assert resp.status_code == 413
+    assert client.get("/api/admin/jobs", headers=ADMIN).json() == []
+    assert os.listdir(os.path.join(os.path.dirname(season_db), jobs.UPLOAD_DIR)) == []
+
+
+def test_admin_unknown_job_is_not_found(client):
+    assert client.get("/api/admin/jobs/999999", headers=ADMIN).status_code == 404
+    assert client.get("/api/admin/jobs/999999/events", headers=ADMIN).status_code == 404
+
+
+def test_unknown_season_is_not_found(client, season_db):
+    conn = get_connection(season_db)
+    season = current_season(conn)
+    conn.close()
+    assert client.get(f"/season/{season}/girls/ski/hs").status_code == 200
+    assert client.get(f"/season/{season - 10}/girls/ski/hs").status_code == 404
+    assert client.get(f"/season/{season - 10}/").status_code == 404
+
+
+@pytest.mark.parametrize("query,status", [("since=-1", 400), ("limit=0", 400), ("limit=10001", 400), ("since=abc", 422)])
+def test_changes_rejects_invalid_parameters(client, query, status):
+    assert client.get(f"/api/changes?{query}").status_code == status
+
+
+def test_changes_pages_through_the_log(client):
+    first = client.get("/api/changes?limit=5").json()
+    assert len(first["changes"]) == 5 and first["more"]
+    second = client.get(f"/api/changes?since={first['next']}&limit=5").json()
+    assert second["changes"][0]["seq"] > first["changes"][-1]["seq"]
+    end = client.get(f"/api/changes?since={first['latest']}").json()
+    assert end["changes"] == [] and not end["more"] and end["next"] == first["latest"]
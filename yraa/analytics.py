@@ -0,0 +1,247 @@
+"""Per-race and per-athlete analytics, precomputed at ingest.
+
+Race times are stored but only displayed; anything analytical would
+otherwise be recomputed per request. After each ingest (and correction or
+alias) the touched races are analysed in one pass per race and division
+and the rollups are stored, so the stats endpoints are plain lookups:
+
+- result_stats: each result's gap to the winner (seconds and percent),
+  percentile among finishers (100 = winner), and gap and rank within its
+  school's finishers;
+- race_stats: starters, finishers, DNF/DQ/DNS counts, winning and median
+  time per race and division;
+- race_school_stats: each school's starters, finishers (depth), best
+  place and time, and points per race and division;
+- athlete_stats: per season and category (resolved names, see
+  identity.py), races, finishes, average and best place, best time,
+  average percentile and consistency (standard deviation of the
+  percentile; lower is steadier).
+
+    python3 -m yraa.analytics --db data/yraa.db    # rebuild every table
+"""
+import argparse
+import statistics
+from collections import defaultdict
+from operator import itemgetter
+
+from . import metrics
+from .db import init_db
+from .snapshot import refresh_snapshot
+
+TABLES = ("result_stats", "race_stats", "race_school_stats", "athlete_stats")
+
+
+def _round(value, digits=2):
+    return round(value, digits) if value is not None else None
+
+
+def _finishers(rows):
+    return sorted((r for r in rows if r["status"] is None and r["place"] is not None), key=lambda r: r["place"])
+
+
+def analyse_race(rows):
+    """Stats for one race and division from its race_results rows.
+
+    Returns (race stats, [school stats], [result stats]) as dicts keyed by column.
+    """
+    first = rows[0]
+    finishers = _finishers(rows)
+    times = [r["time_seconds"] for r in finishers if r["time_seconds"] is not None]
+    winning = min(times) if times else None
+    statuses = defaultdict(int)
+    for r in rows:
+        if r["status"] is not None:
+            statuses[r["status"]] += 1
+    race = {
+        "race_number": first["race_number"], "division": first["division"], "season": first["season"],
+        "gender": first["gender"], "sport": first["sport"], "event_date": first["event_date"],
+        "starters": len(rows), "finishers": len(finishers),
+        "dnf": statuses["DNF"], "dq": statuses["DQ"], "dns": statuses["DNS"],
+        "winning_time": winning, "median_time": _round(statistics.median(times)) if times else None,
+    }
+
+    by_school = defaultdict(list)
+    for r in rows:
+        by_school[r["school"]].append(r)
+    schools = []
+    school_best = {}
+    school_rank = {}
+    for school, school_rows in by_school.items():
+        school_finishers = _finishers(school_rows)
+        school_times = [r["time_seconds"] for r in school_finishers if r["time_seconds"] is not None]
+        school_best[school] = min(school_times) if school_times else None
+        school_rank.update({r["id"]: i + 1 for i, r in enumerate(school_finishers)})
+        schools.append({
+            "race_number": race["race_number"], "division": race["division"], "season": race["season"],
+            "school": school, "starters": len(school_rows), "finishers": len(school_finishers),
+            "best_place": school_finishers[0]["place"] if school_finishers else None,
+            "best_time": school_best[school],
+            "points": sum(r["points"] for r in school_finishers),
+        })
+
+    n = len(finishers)
+    percentile = {r["id"]: 100.0 if n == 1 else _round(100 * (n - 1 - i) / (n - 1), 1) for i, r in enumerate(finishers)}
+    results = []
+    for r in rows:
+        time = r["time_seconds"] if r["id"] in percentile else None
+        gap = time - winning if time is not None and winning is not None else None
+        best = school_best[r["school"]]
+        results.append({
+            "result_id": r["id"], "race_number": race["race_number"], "division": race["division"],
+            "season": race["season"],
+            "gap_seconds": _round(gap), "gap_percent": _round(100 * gap / winning) if gap is not None and winning else None,
+            "percentile": percentile.get(r["id"]),
+            "school_rank": school_rank.get(r["id"]),
+            "school_gap_seconds": _round(time - best) if time is not None and best is not None else None,
+        })
+    return race, schools, results
+
+
+def analyse_athletes(rows):
+    """athlete_stats rows from resolved results joined with their percentile, in race order."""
+    athletes = defaultdict(list)
+    for r in rows:
+        athletes[(r["season"], r["gender"], r["sport"], r["division"], r["first_name"], r["last_name"])].append(r)
+    stats = []
+    for (season, gender, sport, division, first_name, last_name), results in athletes.items():
+        finished = _finishers(results)
+        places = [r["place"] for r in finished]
+        times = [r["time_seconds"] for r in finished if r["time_seconds"] is not None]
+        percentiles = [r["percentile"] for r in finished if r["percentile"] is not None]
+        stats.append({
+            "season": season, "gender": gender, "sport": sport, "division": division,
+            "first_name": first_name, "last_name": last_name, "school": results[-1]["school"],
+            "races": len(results), "finishes": len(finished),
+            "average_place": _round(statistics.mean(places)) if places else None,
+            "best_place": min(places) if places else None,
+            "best_time": min(times) if times else None,
+            "average_percentile": _round(statistics.mean(percentiles), 1) if percentiles else None,
+            "consistency": _round(statistics.pstdev(percentiles), 1) if len(percentiles) > 1 else None,
+        })
+    return stats
+
+
+def _insert(conn, table, rows):
+    if rows:
+        cols = list(rows[0])
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+            map(itemgetter(*cols), rows),
+        )
+
+
+@metrics.timed("analytics.refresh_races")
+def refresh_races(conn, race_numbers):
+    """Recompute the stats of `race_numbers` and of every athlete in their categories."""
+    race_numbers = sorted(set(race_numbers))
+    if not race_numbers:
+        return
+    marks = ", ".join("?" * len(race_numbers))
+    rows = conn.execute(
+        f"""SELECT r.*, e.event_date FROM race_results r JOIN events e ON e.id = r.event_id
+            WHERE r.race_number IN ({marks}) ORDER BY r.race_number, r.division, r.id""",
+        race_numbers,
+    ).fetchall()
+    groups = defaultdict(list)
+    for r in rows:
+        groups[(r["race_number"], r["division"])].append(r)
+
+    for table in ("result_stats", "race_stats", "race_school_stats"):
+        conn.execute(f"DELETE FROM {table} WHERE race_number IN ({marks})", race_numbers)
+    for group in groups.values():
+        race, schools, results = analyse_race(group)
+        _insert(conn, "race_stats", [race])
+        _insert(conn, "race_school_stats", schools)
+        _insert(conn, "result_stats", results)
+    for season, gender, sport in sorted({(r["season"], r["gender"], r["sport"]) for r in rows}):
+        _refresh_athletes(conn, gender, sport, season)
+    conn.commit()
+
+
+def refresh_athletes(conn, gender, sport):
+    """Recompute athlete_stats for a gender/sport in every season, e.g. after an alias changes names."""
+    seasons = conn.execute(
+        "SELECT DISTINCT season FROM race_results WHERE gender = ? AND sport = ?", (gender, sport)
+    ).fetchall()
+    for row in seasons:
+        _refresh_athletes(conn, gender, sport, row["season"])
+    conn.commit()
+
+
+def _refresh_athletes(conn, gender, sport, season):
+    rows = conn.execute(
+        """SELECT r.season, r.gender, r.sport, r.division, r.first_name, r.last_name, r.school,
+                  r.place, r.time_seconds, r.status, s.percentile
+           FROM resolved_results r LEFT JOIN result_stats s ON s.result_id = r.id
+           WHERE r.season = ? AND r.gender = ? AND r.sport = ?
+           ORDER BY r.race_number, r.id""",
+        (season, gender, sport),
+    ).fetchall()
+    conn.execute("DELETE FROM athlete_stats WHERE season = ? AND gender = ? AND sport = ?", (season, gender, sport))
+    _insert(conn, "athlete_stats", analyse_athletes(rows))
+
+
+def rebuild(conn):
+    """Recompute every analytics table from race_results."""
+    for table in TABLES:
+        conn.execute(f"DELETE FROM {table}")
+    race_numbers = [r[0] for r in conn.execute("SELECT DISTINCT race_number FROM race_results").fetchall()]
+    refresh_races(conn, race_numbers)
+    conn.commit()
+    return len(race_numbers)
+
+
+def get_race_stats(conn, race_number):
+    """Stored stats of one race: {race fields, "divisions": [...]} with schools and results per division, or None."""
+    divisions = [dict(r) for r in conn.execute(
+        "SELECT * FROM race_stats WHERE race_number = ? ORDER BY division", (race_number,)
+    ).fetchall()]
+    if not divisions:
+        return None
+    schools = defaultdict(list)
+    for r in conn.execute(
+        "SELECT * FROM race_school_stats WHERE race_number = ? ORDER BY points DESC, best_place", (race_number,)
+    ).fetchall():
+        schools[r["division"]].append({k: r[k] for k in r.keys() if k not in ("race_number", "division", "season")})
+    results = defaultdict(list)
+    for r in conn.execute(
+        """SELECT r.first_name, r.last_name, r.school, r.place, r.time_seconds, r.points, r.status, s.*
+           FROM result_stats s JOIN resolved_results r ON r.id = s.result_id
+           WHERE s.race_number = ?
+           ORDER BY s.division, r.status IS NOT NULL, r.place, r.id""",
+        (race_number,),
+    ).fetchall():
+        results[r["division"]].append({k: r[k] for k in r.keys() if k not in ("race_number", "division", "season")})
+    first = divisions[0]
+    race = {k: first[k] for k in ("race_number", "season", "gender", "sport", "event_date")}
+    race["divisions"] = [
+        {**{k: d[k] for k in d if k not in race}, "schools": schools[d["division"]], "results": results[d["division"]]}
+        for d in divisions
+    ]
+    return race
+
+
+def get_athlete_stats(conn, first_name, last_name, season):
+    """Stored athlete_stats rows of one athlete in a season, one per category."""
+    rows = conn.execute(
+        """SELECT * FROM athlete_stats WHERE season = ? AND first_name = ? AND last_name = ?
+           ORDER BY gender, sport, division""",
+        (season, first_name, last_name),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the precomputed race and athlete analytics tables")
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    args = parser.parse_args()
+
+    conn = init_db(args.db)
+    count = rebuild(conn)
+    conn.close()
+    refresh_snapshot(args.db)
+    print(f"Rebuilt analytics for {count} race(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Micro-benchmarks for the scoring, ranking and parsing hot paths.
+
+Each scenario generates a synthetic season (see yraa.synth), loads it into
+a temporary database, then times the paths the web app serves from (see
+model.py):
+
+    parse_race_csv             parser.parse_race_csv on the largest race file
+    calculate_team_scores      scoring.calculate_team_scores for Girls Ski
+    model_load                 SeasonModel.load of the whole season
+    individual_leaderboard     SeasonModel.individual_leaderboard for Girls Ski HS
+    team_leaderboard           SeasonModel.team_leaderboard for Girls Ski
+    race_results               SeasonModel.race_results for Girls Ski HS, race 1
+    tiebreak_sort              sorting that (shuffled) leaderboard with _compare_athletes
+    ofsaa_team                 ofsaa.calculate_ofsaa_team on the OFSAA event's two runs
+    ofsaa_individual           ofsaa.calculate_ofsaa_individual on the same runs
+
+Each benchmark is timed as REPEAT samples of at least MIN_SAMPLE_SECONDS.
+Comparisons use the fastest sample, which is the least disturbed by other
+work on the machine, and widen the threshold by the spread of the samples
+(median over fastest) of both runs, so a noisy benchmark has to slow down
+by more than its own noise to count as a regression.
+
+    python3 -m yraa.bench --save bench/baseline.json
+    python3 -m yraa.bench --compare bench/baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import cmp_to_key
+
+from . import synth
+from .db import (
+    init_db, get_or_create_event, get_next_race_number, insert_race_results, set_event_ofsaa_flag, _compare_athletes,
+)
+from .model import SeasonModel
+from .models import RaceResult
+from .ofsaa import calculate_ofsaa_team, calculate_ofsaa_individual
+from .parser import parse_race_csv
+from .scoring import calculate_team_scores
+
+SCENARIOS = {
+    "small": {"schools": 12, "athletes": 8},
+    "10x": {"schools": 40, "athletes": 24},
+    "100x": {"schools": 120, "athletes": 80},
+    "ties-small": {"schools": 12, "athletes": 8, "tie_rate": 0.35},
+    "ties-10x": {"schools": 40, "athletes": 24, "tie_rate": 0.35},
+}
+DEFAULT_SCENARIOS = ("small", "10x", "ties-small", "ties-10x")
+
+MIN_SAMPLE_SECONDS = 0.2
+REPEAT = 15
+
+
+def _load_scenario(work_dir, name, events, seed):
+    """Generate and ingest one scenario. Returns (conn, race file paths)."""
+    opts = dict(SCENARIOS[name], events=events, seed=seed)
+    raw_dir = os.path.join(work_dir, name)
+    paths = synth.generate_season(raw_dir, **opts)
+
+    conn = init_db(os.path.join(work_dir, f"{name}.db"))
+    race_num = get_next_race_number(conn)
+    for path in paths:
+        results = parse_race_csv(path)
+        event_id = get_or_create_event(conn, results[0]["event_date"])
+        insert_race_results(conn, results, event_id, race_num)
+        race_num += 1
+    # Designate the first race day as the OFSAA qualifier for ski
+    first_event = conn.execute("SELECT id FROM events ORDER BY event_date LIMIT 1").fetchone()
+    set_event_ofsaa_flag(conn, first_event["id"], "ski")
+    return conn, paths
+
+
+def _time(fn):
+    """Return {median_s, min_s, spread, loops}: per-call time over REPEAT samples of auto-ranged loops."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_SECONDS or loops >= 1 << 16:
+            break
+        loops *= 2
+
+    samples = [elapsed / loops]
+    for _ in range(REPEAT - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    median, fastest = statistics.median(samples), min(samples)
+    return {"median_s": median, "min_s": fastest, "spread": median / fastest - 1, "loops": loops}
+
+
+def _benchmarks(conn, paths):
+    largest = max(paths, key=os.path.getsize)
+
+    rows = conn.execute(
+        """SELECT first_name, last_name, school, race_number, division, points
+           FROM race_results WHERE gender = 'girls' AND sport = 'ski' AND status IS NULL"""
+    ).fetchall()
+    race_results = [
+        RaceResult(f"{r['first_name']} {r['last_name']}", r["school"], float(r["points"]),
+                   r["race_number"], r["division"])
+        for r in rows
+    ]
+
+    model = SeasonModel.load(conn)
+    # Shuffled so the tiebreak sort does real comparison work
+    leaderboard = model.individual_leaderboard("girls", "ski", "hs")
+    random.Random(0).shuffle(leaderboard)
+    run1, run2 = model.ofsaa_race_results("girls", "ski", "hs")
+
+    return {
+        "parse_race_csv": lambda: parse_race_csv(largest),
+        "calculate_team_scores": lambda: calculate_team_scores(race_results),
+        "model_load": lambda: SeasonModel.load(conn),
+        "individual_leaderboard": lambda: model.individual_leaderboard("girls", "ski", "hs"),
+        "team_leaderboard": lambda: model.team_leaderboard("girls", "ski"),
+        "race_results": lambda: model.race_results("girls", "ski", "hs", 1),
+        "tiebreak_sort": lambda: sorted(leaderboard, key=cmp_to_key(_compare_athletes), reverse=True),
+        "ofsaa_team": lambda: calculate_ofsaa_team(run1, run2),
+        "ofsaa_individual": lambda: calculate_ofsaa_individual(run1, run2),
+    }
+
+
+def run(scenarios, events=5, seed=0, only=None):
+    """Run the suite. Returns the results document (see module docstring)."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="yraa-bench-") as work_dir:
+        for name in scenarios:
+            conn, paths = _load_scenario(work_dir, name, events, seed)
+            for bench, fn in _benchmarks(conn, paths).items():
+                if only and bench not in only:
+                    continue
+                key = f"{name}/{bench}"
+                results[key] = _time(fn)
+                print(f"  {key:<40} {results[key]['min_s'] * 1000:>10.3f} ms (±{results[key]['spread']:.0%})", flush=True)
+            conn.close()
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "events": events,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print a comparison table of fastest samples. Returns the list of regressed benchmark keys.
+
+    A benchmark regresses when it is slower by more than `threshold` plus
+    the spread of both runs (baselines saved without a spread count as 0).
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline ms':>12} {'current ms':>12} {'change':>8} {'allowed':>8}")
+    for key, cur in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:<40} {'—':>12} {cur['min_s'] * 1000:>12.3f} {'new':>8}")
+            continue
+        change = cur["min_s"] / base["min_s"] - 1
+        allowed = threshold + cur["spread"] + base.get("spread", 0)
+        flag = ""
+        if change > allowed:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40} {base['min_s'] * 1000:>12.3f} {cur['min_s'] * 1000:>12.3f} {change:>+7.1%} {allowed:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for YRAA scoring, ranking and parsing")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help=f"Comma-separated scenarios from {', '.join(SCENARIOS)} (default: %(default)s)")
+    parser.add_argument("--only", help="Comma-separated benchmark names to run (default: all)")
+    parser.add_argument("--events", type=int, default=5, help="Race days per synthetic season (default: 5)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--save", metavar="PATH", help="Write results JSON to PATH")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail when the fastest sample is this much (plus the runs' spread) slower "
+                             "than baseline (default: 0.25)")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    only = set(args.only.split(",")) if args.only else None
+
+    current = run(scenarios, events=args.events, seed=args.seed, only=only)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Memoization of computed views until the season model changes.
+
+The dashboard is read-only between ingests, so leaderboards and rendered
+fragments computed from a season model (see model.py) can be reused until
+the model is reloaded. Entries are keyed by the caller's key and tagged
+with a version (the model's generation, or a narrower token such as
+SeasonModel.sport_version()); a lookup with another version recomputes.
+Hits and misses are reported to yraa_cache_requests_total.
+"""
+import threading
+from collections import OrderedDict
+
+from . import metrics
+
+# Entries of a cache of per-athlete or per-team views (one per profile or dialog)
+ENTITY_CACHE_SIZE = 512
+
+
+class VersionedCache:
+    """Thread-safe LRU cache whose entries are invalidated by data version."""
+
+    def __init__(self, name, maxsize=256):
+        self.name = name
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (version, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, version, compute):
+        """Return the cached value for key at version, computing it on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                metrics.cache_hit(self.name)
+                return entry[1]
+
+        metrics.cache_miss(self.name)
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
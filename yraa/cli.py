@@ -1,23 +1,160 @@
 import argparse
-from .io import load_results_from_csv
-from .scoring import calculate_team_scores
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from .io import iter_results_from_csv
+from .scoring import best_results, calculate_team_scores
+
+
+def score_file(path):
+    """Score one legacy points CSV, streaming its rows. Returns a dict (with "error" if it could not be read)."""
+    try:
+        count = 0
+
+        def counted(results):
+            nonlocal count
+            for r in results:
+                count += 1
+                yield r
+
+        teams = calculate_team_scores(best_results(counted(iter_results_from_csv(path))))
+    except (OSError, ValueError) as e:
+        return {"file": path, "error": str(e)}
+    return {
+        "file": path,
+        "results": count,
+        "teams": [
+            {
+                # Rank None: excluded from the team ranking (scoring.py)
+                "rank": t.rank or None,
+                "school": t.school,
+                "points": t.total_points,
+                "scores": [{"athlete": s.athlete_name, "score": s.score} for s in t.contributing_scores],
+            }
+            for t in teams
+        ],
+    }
+
+
+def expand_inputs(patterns):
+    """Paths from file names and glob patterns, in order, without duplicates."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        paths += [p for p in matches if p not in paths]
+    return paths
+
+
+def score_files(paths, workers=None):
+    """Score every file, in a process pool when there are several. Returns the score_file() dicts in order."""
+    workers = workers or os.cpu_count() or 1
+    if len(paths) == 1 or workers == 1:
+        return [score_file(p) for p in paths]
+    with ProcessPoolExecutor(min(workers, len(paths))) as pool:
+        return list(pool.map(score_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+
+
+def _output_stems(paths):
+    # data/2019/girls.csv and data/2020/girls.csv -> girls, girls-2
+    stems, seen = [], {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        stems.append(stem if seen[stem] == 1 else f"{stem}-{seen[stem]}")
+    return stems
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_outputs(scored, out_dir):
+    """Write <name>.json and <name>.csv per file plus summary.json and summary.csv. Returns the summary."""
+    os.makedirs(out_dir, exist_ok=True)
+    summary = []
+    for stem, result in zip(_output_stems([r["file"] for r in scored]), scored):
+        if "error" in result:
+            summary.append({"file": result["file"], "error": result["error"]})
+            continue
+        with open(os.path.join(out_dir, f"{stem}.json"), "w") as f:
+            json.dump(result, f, indent=2)
+        _write_csv(
+            os.path.join(out_dir, f"{stem}.csv"), ["Rank", "School", "Points"],
+            [[t["rank"] or "", t["school"], f"{t['points']:g}"] for t in result["teams"]],
+        )
+        winner = next((t for t in result["teams"] if t["rank"] == 1), None)
+        summary.append({
+            "file": result["file"],
+            "output": f"{stem}.json",
+            "results": result["results"],
+            "teams": len(result["teams"]),
+            "winner": winner["school"] if winner else None,
+            "winner_points": winner["points"] if winner else None,
+        })
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    _write_csv(
+        os.path.join(out_dir, "summary.csv"), ["File", "Results", "Teams", "Winner", "Points", "Error"],
+        [[s["file"], s.get("results", ""), s.get("teams", ""), s.get("winner") or "",
+          f"{s['winner_points']:g}" if s.get("winner_points") is not None else "", s.get("error", "")]
+         for s in summary],
+    )
+    return summary
+
+
+def print_standings(result):
+    for i, team in enumerate(result["teams"], start=1):
+        pts = team["points"]
+        pts_str = f"{pts:g}"
+        print(f"{i}. {team['school']} — {pts_str}")
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="YRAA Alpine Ski & Snowboard Team Championship Scoring"
     )
-    parser.add_argument("--input", required=True, help="Path to results CSV file")
+    parser.add_argument("--input", required=True, nargs="+", action="extend",
+                        help="Results CSV file(s) or glob pattern(s), e.g. 'archive/*.csv'")
+    parser.add_argument("--out", help="Write JSON and CSV standings per file plus summary.json/summary.csv into this directory")
+    parser.add_argument("--workers", type=int, help="Processes for scoring several files (default: CPU count)")
 
     args = parser.parse_args()
 
-    results = load_results_from_csv(args.input)
-    teams = calculate_team_scores(results)
+    paths = expand_inputs(args.input)
+    if not paths:
+        print("No input files matched")
+        sys.exit(1)
+    scored = score_files(paths, args.workers)
+    failed = [r for r in scored if "error" in r]
 
-    for i, team in enumerate(teams, start=1):
-        pts = team.total_points
-        pts_str = f"{pts:g}"
-        print(f"{i}. {team.school} — {pts_str}")
+    if args.out:
+        summary = write_outputs(scored, args.out)
+        for s in summary:
+            if "error" in s:
+                print(f"{s['file']}: error: {s['error']}")
+            else:
+                winner = f"{s['winner']} — {s['winner_points']:g}" if s["winner"] else "no scoring teams"
+                print(f"{s['file']}: {s['teams']} teams, winner {winner}")
+        print(f"\nWrote {len(scored) - len(failed)} file(s) and summary.json/summary.csv to {args.out}")
+    else:
+        for result in scored:
+            if len(scored) > 1:
+                print(f"== {result['file']} ==")
+            if "error" in result:
+                print(f"error: {result['error']}")
+            else:
+                print_standings(result)
+            if len(scored) > 1:
+                print()
+
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
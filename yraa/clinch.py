@@ -0,0 +1,279 @@
+"""Exact clinch and elimination statuses for the season standings.
+
+With races left in a division, an athlete's final total is bounded below
+by their total if they score nothing more (worst case) and above by their
+total if they win every remaining race (best case). A school's final total
+is bounded below by its current total and above by adding the points for
+every top place in each remaining race of both divisions (schools may
+enter new racers, so the per-racer cap never binds). Athletes and schools
+that have not scored yet are covered by a zero-point rival.
+
+Title statuses follow from the bounds alone, because one contender's worst
+case and another's best case can happen together:
+- clinched: the worst case beats every rival's best case;
+- eliminated: the best case trails some rival's worst case.
+
+A podium clinch needs three rivals to pass at once, and they share the
+places in each race. Rivals that cannot reach the threshold are pruned by
+their best case, rivals already past it need nothing, and only the close
+contenders left are searched exactly. A search that exceeds SEARCH_LIMIT
+steps reports no status. Ties on points count as neither clinched nor
+eliminated, because tiebreakers (Regulation 4.d.i.h) are not projected.
+
+The number of races in a season comes from YRAA_SEASON_RACES (or a
+tenant's "season_races"). Without it, or for a finished season, no
+statuses are computed.
+"""
+import itertools
+import os
+
+from . import metrics
+from .rules import DEFAULT_RULES
+
+SEASON_RACES = int(os.environ.get("YRAA_SEASON_RACES", "0"))
+PODIUM = 3
+SEARCH_LIMIT = 200000
+
+CLINCHED = "clinched"
+ELIMINATED = "eliminated"
+
+
+class _SearchLimit(Exception):
+    pass
+
+
+class _Budget:
+    def __init__(self, limit=SEARCH_LIMIT):
+        self.left = limit
+
+    def spend(self, steps=1):
+        self.left -= steps
+        if self.left < 0:
+            raise _SearchLimit()
+
+
+def _top(values, n):
+    return sum(sorted(values, reverse=True)[:n])
+
+
+def remaining_races(model, gender, sport, division, season_races):
+    """Races left in a division this season, or None if unknown or the season is over."""
+    if not season_races or (model.seasons and model.season != model.seasons[0]["season"]):
+        return None
+    return max(0, season_races - len(model.race_seq(gender, sport, division)))
+
+
+def _statuses(keys, worst, best, newcomer_best, podium_clinched):
+    """Title and podium statuses from the bounds; `podium_clinched(key)` settles podium clinches."""
+    statuses = {}
+    for key in keys:
+        title = podium = None
+        if worst[key] > max([best[k] for k in keys if k != key] + [newcomer_best]):
+            title = CLINCHED
+        ahead = sum(1 for k in keys if k != key and worst[k] > best[key])
+        if ahead:
+            title = ELIMINATED
+        if ahead >= PODIUM:
+            podium = ELIMINATED
+        elif title == CLINCHED:
+            podium = CLINCHED
+        else:
+            podium = podium_clinched(key)
+        statuses[key] = {"title": title, "podium": podium}
+    return statuses
+
+
+def _podium_search(keys, key, worst, best, newcomer_best, can_pass):
+    """CLINCHED unless enough rivals (zero-point newcomers included) can all reach `key`'s worst case.
+
+    `can_pass(candidates, need, threshold)` is the exact check for the rivals that still need points.
+    """
+    threshold = worst[key]
+    need = PODIUM - sum(1 for k in keys if k != key and worst[k] >= threshold)
+    if need <= 0:
+        return None
+    # Rivals whose best case falls short can be ignored; try the strongest first
+    candidates = sorted((k for k in keys if k != key and worst[k] < threshold <= best[k]), key=lambda k: -best[k])
+    if newcomer_best >= threshold:
+        candidates += [None] * need
+    if len(candidates) < need:
+        return CLINCHED
+    try:
+        return None if can_pass(candidates, need, threshold) else CLINCHED
+    except _SearchLimit:
+        return None
+
+
+def _athletes_can_pass(points, need, threshold, remaining, top_n, table, budget):
+    """True if `need` of the athletes in `points` can all reach `threshold` in the same `remaining` races."""
+    values = [table[p] for p in sorted(table)[:need]]
+    # The chosen athletes take the top `need` places between them in each race (any other finish
+    # scores less). Athlete i finishing row[j] races in place j + 1 is possible exactly when every
+    # row and column sums to `remaining`: such a matrix splits into one place order per race.
+    reach = {}
+    failed = set()
+
+    def reaches(i, row):
+        if (i, row) not in reach:
+            new = [v for v, n in zip(values, row) for _ in range(n)]
+            reach[(i, row)] = _top(list(points[i]) + new, top_n) >= threshold
+        return reach[(i, row)]
+
+    def search(i, free, left):
+        # Choose `left` more athletes from points[i:] sharing the `free` places per column
+        if left == 0:
+            return True
+        if len(points) - i < left or (i, free, left) in failed:
+            return False
+        for row in _compositions(remaining, free):
+            budget.spend()
+            if reaches(i, row) and search(i + 1, tuple(f - n for f, n in zip(free, row)), left - 1):
+                return True
+        if search(i + 1, free, left):
+            return True
+        failed.add((i, free, left))
+        return False
+
+    return search(0, (remaining,) * need, need)
+
+
+def _compositions(n, caps):
+    """Every tuple of len(caps) with sum n and parts within caps, larger early parts first."""
+    if len(caps) == 1:
+        if n <= caps[0]:
+            yield (n,)
+        return
+    for first in range(min(n, caps[0]), -1, -1):
+        for rest in _compositions(n - first, caps[1:]):
+            yield (first,) + rest
+
+
+def individual_statuses(athletes, remaining, top_n, table):
+    """Statuses for {key: points so far} with `remaining` races left, `top_n` results counting.
+
+    Returns {key: {"title": status, "podium": status}}, status CLINCHED, ELIMINATED or None.
+    """
+    win = max(table.values(), default=0)
+    worst = {k: _top(p, top_n) for k, p in athletes.items()}
+    best = {k: _top(list(p) + [win] * remaining, top_n) for k, p in athletes.items()}
+    newcomer_best = _top([win] * remaining, top_n)
+    budget = _Budget()
+
+    def can_pass(candidates, need, threshold):
+        points = [athletes[k] if k is not None else () for k in candidates]
+        return _athletes_can_pass(points, need, threshold, remaining, top_n, table, budget)
+
+    keys = list(athletes)
+    return _statuses(keys, worst, best, newcomer_best,
+                     lambda key: _podium_search(keys, key, worst, best, newcomer_best, can_pass))
+
+
+def _teams_can_pass(eligible, threshold, slots, max_scores, budget):
+    """True if `slots` (points of the remaining places) can be shared so every team reaches `threshold`.
+
+    `eligible` holds each team's current eligible scores.
+    """
+    # A team's j-th best new score replaces its j-th lowest counting score (0 while it has fewer
+    # than max_scores), so its j-th slot of value v gains max(0, v - floors[j])
+    floors, short_by = [], []
+    for scores in eligible:
+        counting = sorted(scores, reverse=True)[:max_scores]
+        floors.append(sorted(counting + [0] * (max_scores - len(counting))))
+        short_by.append(threshold - sum(counting))
+    slots = sorted(slots, reverse=True)
+    distinct = sorted(set(slots), reverse=True)
+    counts = [slots.count(v) for v in distinct]
+    first = [sum(counts[:i]) for i in range(len(distinct))]
+    failed = set()
+
+    def max_gain(i, used, teams):
+        # Most the slots from distinct[i] on can add to `teams` together: best slots on the lowest floors
+        open_floors = sorted(f for t in teams for f in floors[t][used[t]:])
+        return sum(max(0, v - f) for v, f in zip(slots[first[i]:], open_floors))
+
+    def search(i, used, gained):
+        short = [t for t in range(len(eligible)) if gained[t] < short_by[t]]
+        if not short:
+            return True
+        if i == len(distinct) or (i, used, gained) in failed:
+            return False
+        budget.spend()
+        if (any(max_gain(i, used, [t]) < short_by[t] - gained[t] for t in short)
+                or max_gain(i, used, short) < sum(short_by[t] - gained[t] for t in short)):
+            failed.add((i, used, gained))
+            return False
+        # Giving a slot to a team never hurts it, so every slot goes to a team that is still short
+        v = distinct[i]
+        for split in _splits(counts[i], len(short)):
+            new_used, new_gained = list(used), list(gained)
+            for t, n in zip(short, split):
+                taken = floors[t][used[t]:used[t] + n]
+                new_used[t] = used[t] + len(taken)
+                new_gained[t] = min(short_by[t], gained[t] + sum(max(0, v - f) for f in taken))
+            if search(i + 1, tuple(new_used), tuple(new_gained)):
+                return True
+        failed.add((i, used, gained))
+        return False
+
+    return search(0, (0,) * len(eligible), (0,) * len(eligible))
+
+
+def _splits(n, parts):
+    """Every way to split n identical items into `parts` ordered groups."""
+    if parts == 1:
+        yield (n,)
+        return
+    for first in range(n, -1, -1):
+        for rest in _splits(n - first, parts - 1):
+            yield (first,) + rest
+
+
+def team_statuses(teams, slots, max_scores):
+    """Statuses for {school: eligible scores so far}, with `slots` the points of every remaining place.
+
+    Returns {school: {"title": status, "podium": status}}.
+    """
+    worst = {s: _top(e, max_scores) for s, e in teams.items()}
+    best = {s: _top(list(e) + slots, max_scores) for s, e in teams.items()}
+    newcomer_best = _top(slots, max_scores)
+    budget = _Budget()
+
+    def can_pass(candidates, need, threshold):
+        for combo in itertools.combinations(candidates, need):
+            eligible = [teams[s] if s is not None else () for s in combo]
+            if _teams_can_pass(eligible, threshold, slots, max_scores, budget):
+                return True
+        return False
+
+    keys = list(teams)
+    return _statuses(keys, worst, best, newcomer_best,
+                     lambda key: _podium_search(keys, key, worst, best, newcomer_best, can_pass))
+
+
+@metrics.timed("clinch.category_statuses")
+def category_statuses(individual, teams, remaining, race_counts, rules=DEFAULT_RULES):
+    """Clinch statuses for a gender/sport from its leaderboards.
+
+    `individual` maps division to its leaderboard (db.rank_individuals),
+    `teams` is the team leaderboard (scoring.calculate_team_scores),
+    `remaining` and `race_counts` map division to races left and held.
+    Returns {"individual": {division: {(first, last): statuses}}, "team": {school: statuses}}.
+    """
+    result = {"individual": {}, "team": {}}
+    for division, board in individual.items():
+        table = rules.open_points if division == "open" else rules.hs_points
+        top_n = rules.top_n(race_counts[division] + remaining[division])
+        athletes = {(a["first_name"], a["last_name"]): [r["points"] for r in a["all_results"]] for a in board}
+        result["individual"][division] = individual_statuses(athletes, remaining[division], top_n, table)
+
+    slots = []
+    for division, left in remaining.items():
+        table = rules.open_points if division == "open" else rules.hs_points
+        slots += [points for points in table.values() if points > 0] * left
+    # Bill Crothers is excluded from the team ranking (scoring.py)
+    eligible = {
+        t.school: [s.score for s in t.contributing_scores]
+        for t in teams if not t.school.startswith("Bill Crothers")
+    }
+    result["team"] = team_statuses(eligible, sorted(slots, reverse=True), rules.max_team_scores)
+    return result
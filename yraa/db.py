@@ -1,7 +1,14 @@
+import json
+import os
 import sqlite3
 from collections import defaultdict
+from datetime import date
+from urllib.parse import quote
 from functools import cmp_to_key
+from . import metrics
+from .devtools import connection_factory
 from .models import RaceResult
+from .rules import DEFAULT_RULES
 from .scoring import calculate_team_scores
 
 SCHEMA = """
@@ -11,6 +18,7 @@ CREATE TABLE IF NOT EXISTS events (
     location TEXT,
     ofsaa_ski INTEGER DEFAULT 0,
     ofsaa_snowboard INTEGER DEFAULT 0,
+    season INTEGER,
     created_at TEXT DEFAULT (datetime('now')),
     UNIQUE(event_date)
 );
@@ -29,46 +37,313 @@ CREATE TABLE IF NOT EXISTS race_results (
     time_seconds REAL,
     points INTEGER NOT NULL DEFAULT 0,
     status TEXT,
+    season INTEGER,
     created_at TEXT DEFAULT (datetime('now')),
     UNIQUE(race_number, gender, sport, division, first_name, last_name)
 );
 
+CREATE TABLE IF NOT EXISTS athlete_aliases (
+    gender TEXT NOT NULL,
+    sport TEXT NOT NULL,
+    school TEXT NOT NULL,
+    alias_first TEXT NOT NULL,
+    alias_last TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    created_at TEXT DEFAULT (datetime('now')),
+    PRIMARY KEY(gender, sport, school, alias_first, alias_last)
+);
+
 CREATE TABLE IF NOT EXISTS ingested_files (
     filename TEXT PRIMARY KEY,
     race_number INTEGER NOT NULL,
     created_at TEXT DEFAULT (datetime('now'))
 );
+
+CREATE TABLE IF NOT EXISTS seasons (
+    season INTEGER PRIMARY KEY,
+    archive_path TEXT NOT NULL,
+    archived_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Append-only log of data changes for incremental sync (GET /api/changes).
+-- AUTOINCREMENT: sequence numbers are never reused, even after a VACUUM.
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    action TEXT NOT NULL,
+    season INTEGER,
+    race_number INTEGER,
+    data TEXT NOT NULL,
+    created_at TEXT DEFAULT (datetime('now'))
+);
+
+-- Analytics precomputed at ingest (see analytics.py)
+CREATE TABLE IF NOT EXISTS result_stats (
+    result_id INTEGER PRIMARY KEY,
+    race_number INTEGER NOT NULL,
+    division TEXT NOT NULL,
+    season INTEGER,
+    gap_seconds REAL,
+    gap_percent REAL,
+    percentile REAL,
+    school_rank INTEGER,
+    school_gap_seconds REAL
+);
+
+CREATE TABLE IF NOT EXISTS race_stats (
+    race_number INTEGER NOT NULL,
+    division TEXT NOT NULL,
+    season INTEGER,
+    gender TEXT NOT NULL,
+    sport TEXT NOT NULL,
+    event_date TEXT,
+    starters INTEGER NOT NULL,
+    finishers INTEGER NOT NULL,
+    dnf INTEGER NOT NULL,
+    dq INTEGER NOT NULL,
+    dns INTEGER NOT NULL,
+    winning_time REAL,
+    median_time REAL,
+    PRIMARY KEY(race_number, division)
+);
+
+CREATE TABLE IF NOT EXISTS race_school_stats (
+    race_number INTEGER NOT NULL,
+    division TEXT NOT NULL,
+    season INTEGER,
+    school TEXT NOT NULL,
+    starters INTEGER NOT NULL,
+    finishers INTEGER NOT NULL,
+    best_place INTEGER,
+    best_time REAL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY(race_number, division, school)
+);
+
+CREATE TABLE IF NOT EXISTS athlete_stats (
+    season INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    sport TEXT NOT NULL,
+    division TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    school TEXT NOT NULL,
+    races INTEGER NOT NULL,
+    finishes INTEGER NOT NULL,
+    average_place REAL,
+    best_place INTEGER,
+    best_time REAL,
+    average_percentile REAL,
+    consistency REAL,
+    PRIMARY KEY(season, gender, sport, division, first_name, last_name)
+);
+"""
+
+# Created after the column migrations in init_db (they reference season)
+INDEXES_AND_VIEWS = """
+CREATE INDEX IF NOT EXISTS idx_events_season ON events(season);
+CREATE INDEX IF NOT EXISTS idx_race_results_season
+    ON race_results(season, gender, sport, division, race_number);
+CREATE INDEX IF NOT EXISTS idx_result_stats_race ON result_stats(race_number);
+CREATE INDEX IF NOT EXISTS idx_athlete_stats_name ON athlete_stats(season, first_name, last_name);
+
+-- Race results with aliased names replaced by the canonical athlete name.
+-- Scoring and display queries read from this view.
+DROP VIEW IF EXISTS resolved_results;
+CREATE VIEW resolved_results AS
+SELECT r.id, r.event_id, r.race_number, r.gender, r.sport, r.division,
+       COALESCE(a.first_name, r.first_name) AS first_name,
+       COALESCE(a.last_name, r.last_name) AS last_name,
+       r.school, r.place, r.time_seconds, r.points, r.status, r.season, r.created_at
+FROM race_results r
+LEFT JOIN athlete_aliases a
+  ON a.gender = r.gender AND a.sport = r.sport AND a.school = r.school
+ AND a.alias_first = r.first_name AND a.alias_last = r.last_name;
 """
 
+# Seasons are named by the calendar year they end in: races from July 2025
+# through June 2026 belong to season 2026.
+SEASON_START_MONTH = 7
+
+
+def _add_column(conn, table, column_def):
+    # Idempotent: databases created from the current SCHEMA already have the column
+    columns = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    if column_def.split()[0] not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column_def}")
+
+
+def _migrate_status(conn):
+    _add_column(conn, "race_results", "status TEXT")
+
+
+def _migrate_ofsaa_flags(conn):
+    for col in ("ofsaa_ski", "ofsaa_snowboard"):
+        _add_column(conn, "events", f"{col} INTEGER DEFAULT 0")
+
+
+def _migrate_seasons(conn):
+    # Add season columns and backfill them from event dates
+    for table in ("events", "race_results"):
+        _add_column(conn, table, "season INTEGER")
+    conn.execute(
+        f"""UPDATE events SET season = CAST(substr(event_date, 1, 4) AS INTEGER)
+                                 + (CAST(substr(event_date, 6, 2) AS INTEGER) >= {SEASON_START_MONTH})
+            WHERE season IS NULL"""
+    )
+    conn.execute(
+        """UPDATE race_results SET season = (SELECT season FROM events WHERE events.id = race_results.event_id)
+           WHERE season IS NULL"""
+    )
+
+
+def _migrate_changes(conn):
+    # Seed the change log with the data already ingested, so syncing from 0 returns everything
+    if conn.execute("SELECT 1 FROM changes LIMIT 1").fetchone():
+        return
+    races = conn.execute(
+        """SELECT r.race_number, r.event_id, e.event_date, r.gender, r.sport, r.season
+           FROM race_results r JOIN events e ON e.id = r.event_id
+           GROUP BY r.race_number ORDER BY r.race_number"""
+    ).fetchall()
+    for race in races:
+        _record_race(conn, race["race_number"], race["event_id"], race["gender"], race["sport"])
+        for row in conn.execute("SELECT * FROM race_results WHERE race_number = ? ORDER BY id", (race["race_number"],)):
+            record_change(conn, "result", "insert", result_change_data(row), row["season"], row["race_number"])
+    for event in conn.execute("SELECT * FROM events WHERE ofsaa_ski = 1 OR ofsaa_snowboard = 1 ORDER BY id"):
+        record_change(conn, "event", "update", _event_data(event), event["season"])
+    for alias in conn.execute("SELECT * FROM athlete_aliases ORDER BY created_at"):
+        record_change(conn, "alias", "insert", _alias_data(alias))
+
+
+def _migrate_analytics(conn):
+    from .analytics import rebuild  # analytics.py imports this module
+
+    # The rebuild reads resolved_results, which a database from before the
+    # migrations has never had; the season columns it needs exist by now
+    conn.executescript(INDEXES_AND_VIEWS)
+    rebuild(conn)
+
+
+# Schema migrations in order; PRAGMA user_version records how many have been
+# applied. Append a new one for every schema change (including changes to
+# INDEXES_AND_VIEWS, which are re-created after any upgrade).
+MIGRATIONS = [_migrate_status, _migrate_ofsaa_flags, _migrate_seasons, _migrate_changes, _migrate_analytics]
+SCHEMA_VERSION = len(MIGRATIONS)
+
 
 def init_db(db_path):
-    """Create tables if they don't exist. Returns a connection."""
+    """Create tables and apply pending migrations. Returns a connection.
+
+    A database already at SCHEMA_VERSION is opened without touching the
+    schema.
+    """
     conn = sqlite3.connect(db_path)
+    metrics.inc("yraa_db_connections_opened_total")
     conn.row_factory = sqlite3.Row
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return conn
+
     conn.executescript(SCHEMA)
-    # Migration: add status column to existing DBs
-    try:
-        conn.execute("ALTER TABLE race_results ADD COLUMN status TEXT")
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass  # column already exists
-    # Migration: add OFSAA columns to events table
-    for col in ("ofsaa_ski", "ofsaa_snowboard"):
-        try:
-            conn.execute(f"ALTER TABLE events ADD COLUMN {col} INTEGER DEFAULT 0")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # column already exists
+    # Migrations are idempotent, so a concurrent init_db repeating one is harmless
+    for migrate in MIGRATIONS[version:]:
+        migrate(conn)
+        metrics.inc("yraa_db_migrations_total", {"migration": migrate.__name__.removeprefix("_migrate_")})
+    conn.executescript(INDEXES_AND_VIEWS)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     return conn
 
 
-def get_connection(db_path):
-    conn = sqlite3.connect(db_path)
+def season_for_date(event_date):
+    """Season an ISO event date ("2026-01-15") belongs to."""
+    year, month = int(event_date[:4]), int(event_date[5:7])
+    return year + 1 if month >= SEASON_START_MONTH else year
+
+
+def current_season(conn):
+    """Latest season with events in this database (the season of today's date if empty)."""
+    row = conn.execute("SELECT MAX(season) AS s FROM events").fetchone()
+    if row["s"] is not None:
+        return row["s"]
+    return season_for_date(date.today().isoformat())
+
+
+def _resolve_season(conn, season):
+    return current_season(conn) if season is None else season
+
+
+def get_seasons(conn):
+    """Return [{season, archive_path}] for every season, newest first.
+
+    Includes seasons still in this database (archive_path None) and
+    seasons archived out of it by yraa.season.
+    """
+    seasons = {
+        r["season"]: None
+        for r in conn.execute("SELECT DISTINCT season FROM events WHERE season IS NOT NULL").fetchall()
+    }
+    for r in conn.execute("SELECT season, archive_path FROM seasons").fetchall():
+        seasons[r["season"]] = r["archive_path"]
+    return [{"season": s, "archive_path": seasons[s]} for s in sorted(seasons, reverse=True)]
+
+
+def get_connection(db_path, check_same_thread=True):
+    conn = sqlite3.connect(db_path, factory=connection_factory(), check_same_thread=check_same_thread)
+    metrics.inc("yraa_db_connections_opened_total")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def get_snapshot_connection(path, check_same_thread=True):
+    """Open a published snapshot (see snapshot.py) read-only and immutable.
+
+    SQLite skips locking and change detection for immutable files, and the
+    whole file is memory-mapped.
+    """
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, factory=connection_factory(), check_same_thread=check_same_thread)
+    metrics.inc("yraa_db_connections_opened_total")
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size = {max(os.path.getsize(path), 1 << 20)}")
+    return conn
+
+
+def get_readonly_connection(path, check_same_thread=True):
+    """Open a database (e.g. a season archive) read-only; it is never created or migrated."""
+    uri = f"file:{quote(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, factory=connection_factory(), check_same_thread=check_same_thread)
+    metrics.inc("yraa_db_connections_opened_total")
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def migrate_archives(db_path):
+    """Apply pending migrations to the archive file of every season archived out of db_path."""
+    conn = get_connection(db_path)
+    try:
+        archives = [s["archive_path"] for s in get_seasons(conn) if s["archive_path"]]
+    finally:
+        conn.close()
+    base = os.path.dirname(os.path.abspath(db_path))
+    for archive in archives:
+        path = os.path.join(base, archive)
+        if os.path.exists(path):
+            init_db(path).close()
+
+
+def get_season_connection(db_path, season):
+    """Connect to the database holding `season`: its archive file if archived, else db_path."""
+    conn = get_connection(db_path)
+    row = conn.execute("SELECT archive_path FROM seasons WHERE season = ?", (season,)).fetchone()
+    if row is None:
+        return conn
+    conn.close()
+    return get_connection(os.path.join(os.path.dirname(os.path.abspath(db_path)), row["archive_path"]))
+
+
 def get_or_create_event(conn, event_date, location=None):
     """Get or create an event by date. Returns event_id."""
     row = conn.execute(
@@ -77,16 +352,23 @@ def get_or_create_event(conn, event_date, location=None):
     if row:
         return row["id"]
     cur = conn.execute(
-        "INSERT INTO events (event_date, location) VALUES (?, ?)",
-        (event_date, location),
+        "INSERT INTO events (event_date, location, season) VALUES (?, ?, ?)",
+        (event_date, location, season_for_date(event_date)),
     )
     conn.commit()
     return cur.lastrowid
 
 
 def get_next_race_number(conn):
-    """Return the next sequential race number."""
-    row = conn.execute("SELECT MAX(race_number) as m FROM race_results").fetchone()
+    """Return the next sequential race number.
+
+    ingested_files is consulted too, so numbers keep increasing after past
+    seasons are archived out of race_results.
+    """
+    row = conn.execute(
+        """SELECT MAX(m) AS m FROM (SELECT MAX(race_number) AS m FROM race_results
+                                    UNION ALL SELECT MAX(race_number) FROM ingested_files)"""
+    ).fetchone()
     current_max = row["m"] if row["m"] is not None else 0
     return current_max + 1
 
@@ -108,17 +390,81 @@ def mark_file_ingested(conn, filename, race_number):
     conn.commit()
 
 
+RESULT_FIELDS = (
+    "id", "event_id", "race_number", "gender", "sport", "division", "first_name", "last_name",
+    "school", "place", "time_seconds", "points", "status", "season",
+)
+# Columns a corrected results file may change for an athlete already in the race
+CORRECTABLE_FIELDS = ("school", "place", "time_seconds", "points", "status")
+
+
+def record_change(conn, kind, action, data, season=None, race_number=None):
+    """Append an entry to the change log; committed with the caller's transaction."""
+    conn.execute(
+        "INSERT INTO changes (kind, action, season, race_number, data) VALUES (?, ?, ?, ?, ?)",
+        (kind, action, season, race_number, json.dumps(data)),
+    )
+
+
+def record_changes(conn, changes):
+    """Append many (kind, action, data, season, race_number) entries to the change log at once."""
+    conn.executemany(
+        "INSERT INTO changes (kind, action, season, race_number, data) VALUES (?, ?, ?, ?, ?)",
+        [(kind, action, season, race_number, json.dumps(data)) for kind, action, data, season, race_number in changes],
+    )
+
+
+def result_change_data(row):
+    """Change log data of a race_results row."""
+    return {f: row[f] for f in RESULT_FIELDS}
+
+
+def _event_data(row):
+    return {f: row[f] for f in ("id", "event_date", "season", "ofsaa_ski", "ofsaa_snowboard")}
+
+
+def _alias_data(row):
+    return {f: row[f] for f in ("gender", "sport", "school", "alias_first", "alias_last", "first_name", "last_name")}
+
+
+def record_alias_change(conn, action, row):
+    """Log an athlete_aliases row written by identity.add_alias."""
+    record_change(conn, "alias", action, _alias_data(row))
+
+
+def _record_race(conn, race_number, event_id, gender, sport):
+    event = conn.execute("SELECT event_date, season FROM events WHERE id = ?", (event_id,)).fetchone()
+    data = {"race_number": race_number, "event_id": event_id, "event_date": event["event_date"],
+            "gender": gender, "sport": sport}
+    record_change(conn, "race", "insert", data, event["season"], race_number)
+
+
+def get_changes(conn, since=0, limit=1000):
+    """Change log entries after sequence number `since`, oldest first, data decoded."""
+    rows = conn.execute("SELECT * FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (since, limit)).fetchall()
+    return [{**dict(r), "data": json.loads(r["data"])} for r in rows]
+
+
+def get_latest_change(conn):
+    """Highest sequence number in the change log (0 when empty)."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+
 def insert_race_results(conn, results, event_id, race_number):
     """Bulk insert race results. Returns (inserted_count, skipped_count)."""
+    season = conn.execute("SELECT season FROM events WHERE id = ?", (event_id,)).fetchone()["season"]
     inserted = 0
     skipped = 0
+    if results:
+        _record_race(conn, race_number, event_id, results[0]["gender"], results[0]["sport"])
     for r in results:
         try:
-            conn.execute(
+            row = conn.execute(
                 """INSERT INTO race_results
                    (event_id, race_number, gender, sport, division,
-                    first_name, last_name, school, place, time_seconds, points, status)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    first_name, last_name, school, place, time_seconds, points, status, season)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   RETURNING *""",
                 (
                     event_id,
                     race_number,
@@ -132,8 +478,10 @@ def insert_race_results(conn, results, event_id, race_number):
                     r["time_seconds"],
                     r["points"],
                     r.get("status"),
+                    season,
                 ),
-            )
+            ).fetchone()
+            record_change(conn, "result", "insert", result_change_data(row), season, race_number)
             inserted += 1
         except sqlite3.IntegrityError:
             skipped += 1
@@ -141,6 +489,57 @@ def insert_race_results(conn, results, event_id, race_number):
     return inserted, skipped
 
 
+def replace_race_results(conn, results, race_number):
+    """Apply a corrected results file to an ingested race, logging every difference.
+
+    Athletes are matched on category and name: changed rows are updated,
+    new ones inserted and missing ones deleted. Returns (added, updated, removed).
+    """
+    existing = {
+        (r["gender"], r["sport"], r["division"], r["first_name"], r["last_name"]): r
+        for r in conn.execute("SELECT * FROM race_results WHERE race_number = ?", (race_number,)).fetchall()
+    }
+    if not existing:
+        raise ValueError(f"race #{race_number} has no results to correct")
+    first = next(iter(existing.values()))
+    event_id, season = first["event_id"], first["season"]
+    added = updated = 0
+    seen = set()
+    for r in results:
+        key = (r["gender"], r["sport"], r["division"], r["first_name"], r["last_name"])
+        if key in seen:
+            continue
+        seen.add(key)
+        values = {"school": r["school"], "place": r["place"], "time_seconds": r["time_seconds"],
+                  "points": r["points"], "status": r.get("status")}
+        old = existing.get(key)
+        if old is None:
+            row = conn.execute(
+                """INSERT INTO race_results
+                   (event_id, race_number, gender, sport, division,
+                    first_name, last_name, school, place, time_seconds, points, status, season)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   RETURNING *""",
+                (event_id, race_number, *key, *values.values(), season),
+            ).fetchone()
+            record_change(conn, "result", "insert", result_change_data(row), season, race_number)
+            added += 1
+        elif any(old[f] != values[f] for f in CORRECTABLE_FIELDS):
+            row = conn.execute(
+                f"""UPDATE race_results SET {", ".join(f"{f} = ?" for f in CORRECTABLE_FIELDS)}
+                    WHERE id = ? RETURNING *""",
+                (*values.values(), old["id"]),
+            ).fetchone()
+            record_change(conn, "result", "update", result_change_data(row), season, race_number)
+            updated += 1
+    removed = [row for key, row in existing.items() if key not in seen]
+    for row in removed:
+        conn.execute("DELETE FROM race_results WHERE id = ?", (row["id"],))
+        record_change(conn, "result", "delete", result_change_data(row), season, race_number)
+    conn.commit()
+    return added, updated, len(removed)
+
+
 def _compare_athletes(a, b):
     """Compare two athletes for sorting (descending order).
 
@@ -177,30 +576,16 @@ def _compare_athletes(a, b):
     return 0
 
 
-def get_individual_leaderboard(conn, gender, sport, division):
-    """Return individual leaderboard: sum top N points per athlete.
+def rank_individuals(rows, race_seq, rules=DEFAULT_RULES):
+    """Rank athletes from their scored results (shared by the DB queries and model.py).
 
-    Top 3 results if <=5 races have occurred, top 4 if >=6.
+    `rows` are finished results with first_name, last_name, school,
+    race_number and points, ordered by last_name, first_name, points DESC,
+    race_number; `race_seq` maps global race numbers to the category's
+    sequential race numbers. The number of counting results comes from
+    `rules` (see rules.py).
     """
-    total_races = _count_races(conn, gender, sport, division)
-    top_n = 4 if total_races >= 6 else 3
-
-    # Build a mapping from global race_number to sequential category race number
-    distinct_races = conn.execute(
-        """SELECT DISTINCT race_number FROM race_results
-           WHERE gender = ? AND sport = ? AND division = ?
-           ORDER BY race_number""",
-        (gender, sport, division),
-    ).fetchall()
-    race_seq = {r["race_number"]: i + 1 for i, r in enumerate(distinct_races)}
-
-    rows = conn.execute(
-        """SELECT first_name, last_name, school, race_number, points
-           FROM race_results
-           WHERE gender = ? AND sport = ? AND division = ? AND status IS NULL
-           ORDER BY last_name, first_name, points DESC""",
-        (gender, sport, division),
-    ).fetchall()
+    top_n = rules.top_n(len(race_seq))
 
     # Group by athlete, take top N
     athletes = defaultdict(list)
@@ -248,38 +633,12 @@ def get_individual_leaderboard(conn, gender, sport, division):
     return leaderboard
 
 
-def _count_races(conn, gender, sport, division):
-    """Count distinct race numbers for a category."""
-    row = conn.execute(
-        """SELECT COUNT(DISTINCT race_number) as cnt
-           FROM race_results
-           WHERE gender = ? AND sport = ? AND division = ?""",
-        (gender, sport, division),
-    ).fetchone()
-    return row["cnt"]
-
-
-def get_team_leaderboard(conn, gender, sport):
-    """Build team leaderboard using existing scoring.py logic.
+def score_teams(rows, race_seq, rules=DEFAULT_RULES):
+    """Team standings from finished results (first_name, last_name, school, race_number, division, points).
 
-    Combines Open + HS divisions for team scoring.
+    Rows are ordered by division, race_number and id, which decides the
+    order of equal contributing scores.
     """
-    # Build per-category sequential race number mapping
-    distinct_races = conn.execute(
-        """SELECT DISTINCT race_number FROM race_results
-           WHERE gender = ? AND sport = ?
-           ORDER BY race_number""",
-        (gender, sport),
-    ).fetchall()
-    race_seq = {r["race_number"]: i + 1 for i, r in enumerate(distinct_races)}
-
-    rows = conn.execute(
-        """SELECT first_name, last_name, school, race_number, division, points
-           FROM race_results
-           WHERE gender = ? AND sport = ? AND status IS NULL""",
-        (gender, sport),
-    ).fetchall()
-
     # Convert to RaceResult objects for scoring.py
     race_results = []
     for row in rows:
@@ -293,197 +652,65 @@ def get_team_leaderboard(conn, gender, sport):
             )
         )
 
-    return calculate_team_scores(race_results)
+    return calculate_team_scores(race_results, rules)
 
 
-def get_season_summary(conn):
-    """Return season summary stats."""
-    events = conn.execute("SELECT COUNT(*) as cnt FROM events").fetchone()["cnt"]
-    results = conn.execute("SELECT COUNT(*) as cnt FROM race_results").fetchone()["cnt"]
-    last_event = conn.execute(
-        "SELECT MAX(event_date) as d FROM events"
-    ).fetchone()["d"]
+def get_data_fingerprint(conn, gender=None, sport=None, season=None):
+    """Return a cheap fingerprint of the results for a category (or all data).
 
-    race_numbers = conn.execute(
-        "SELECT DISTINCT race_number FROM race_results ORDER BY race_number"
-    ).fetchall()
-
-    return {
-        "event_count": events,
-        "result_count": results,
-        "race_count": len(race_numbers),
-        "last_event_date": last_event,
-    }
+    Changes whenever rows are added, removed, re-scored or corrected (the
+    latest change log entry for the category's races), or an alias is added.
+    Scoped to a season (the current one by default). The all-data fingerprint
+    also covers events (dates and OFSAA flags). Used to skip re-rendering
+    unchanged pages.
+    """
+    query = """SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id, TOTAL(points) AS pts,
+                      TOTAL(place) AS places, TOTAL(time_seconds) AS t, COUNT(status) AS flagged
+               FROM race_results WHERE season = ?"""
+    params = [_resolve_season(conn, season)]
+    if gender and sport:
+        query += " AND gender = ? AND sport = ?"
+        params += [gender, sport]
+    results = tuple(conn.execute(query, params).fetchone())
+    aliases = conn.execute("SELECT COUNT(*), MAX(created_at) FROM athlete_aliases").fetchone()
+    results += tuple(aliases)
+    # The change log catches what the sums can miss, e.g. a corrected school (see replace_race_results)
+    if gender and sport:
+        changes = conn.execute(
+            """SELECT MAX(seq) FROM changes
+               WHERE kind = 'alias'
+                  OR (season = ? AND race_number IN (
+                      SELECT race_number FROM race_results WHERE season = ? AND gender = ? AND sport = ?))""",
+            [params[0]] + params,
+        ).fetchone()[0]
+        return repr(results + (changes,))
+    results += (get_latest_change(conn),)
+    events = tuple(
+        tuple(r) for r in conn.execute(
+            "SELECT id, event_date, ofsaa_ski, ofsaa_snowboard FROM events WHERE season = ? ORDER BY id",
+            params[:1],
+        ).fetchall()
+    )
+    return repr((results, events))
 
 
-def get_race_numbers(conn):
-    """Return list of all race numbers with their metadata."""
+def get_race_numbers(conn, season=None):
+    """Return list of all race numbers in a season with their metadata."""
     rows = conn.execute(
         """SELECT DISTINCT race_number, gender, sport,
                   (SELECT event_date FROM events WHERE id = race_results.event_id) as event_date
            FROM race_results
+           WHERE season = ?
            ORDER BY race_number""",
+        (_resolve_season(conn, season),),
     ).fetchall()
     return [dict(r) for r in rows]
 
 
-def _build_race_seq(conn, gender, sport, division):
-    """Build mapping from global race_number to per-category sequential number."""
-    distinct_races = conn.execute(
-        """SELECT DISTINCT race_number FROM race_results
-           WHERE gender = ? AND sport = ? AND division = ?
-           ORDER BY race_number""",
-        (gender, sport, division),
-    ).fetchall()
-    return {r["race_number"]: i + 1 for i, r in enumerate(distinct_races)}
-
-
-def get_race_list(conn):
-    """Return race info per category for filter dropdowns.
-
-    Returns dict keyed by (gender, sport, division) with list of
-    {seq, event_date} entries.
-    """
-    rows = conn.execute(
-        """SELECT DISTINCT race_number, gender, sport, division,
-                  (SELECT event_date FROM events WHERE id = race_results.event_id) as event_date
-           FROM race_results
-           ORDER BY gender, sport, division, race_number""",
-    ).fetchall()
-
-    categories = defaultdict(list)
-    seq_counters = defaultdict(int)
-    for r in rows:
-        key = (r["gender"], r["sport"], r["division"])
-        seq_counters[key] += 1
-        categories[key].append({
-            "seq": seq_counters[key],
-            "event_date": r["event_date"],
-        })
-
-    return categories
-
-
-def get_race_results(conn, gender, sport, division, race_seq_number=None, school=None, athlete=None):
-    """Return race results with optional filters.
-
-    If race_seq_number is given, returns results for that specific race.
-    If omitted, returns results across all races (for athlete/school season view).
-    """
-    race_seq = _build_race_seq(conn, gender, sport, division)
-    seq_to_global = {v: k for k, v in race_seq.items()}
-    global_to_seq = race_seq
-
-    # Build query with optional filters
-    query = """SELECT place, first_name, last_name, school, time_seconds, points, race_number, status
-               FROM race_results
-               WHERE gender = ? AND sport = ? AND division = ?"""
-    params = [gender, sport, division]
-
-    if race_seq_number:
-        global_race = seq_to_global.get(race_seq_number)
-        if global_race is None:
-            return []
-        query += " AND race_number = ?"
-        params.append(global_race)
-
-    if school:
-        query += " AND school = ?"
-        params.append(school)
-
-    if athlete:
-        parts = athlete.split(" ", 1)
-        if len(parts) == 2:
-            query += " AND first_name = ? AND last_name = ?"
-            params.extend(parts)
-
-    query += """ ORDER BY race_number,
-                 status IS NOT NULL,
-                 CASE status WHEN 'DQ' THEN 1 WHEN 'DNF' THEN 2 WHEN 'DNS' THEN 3 ELSE 0 END,
-                 place, last_name, first_name"""
-    rows = conn.execute(query, params).fetchall()
-
-    results = []
-    for r in rows:
-        d = dict(r)
-        d["race_seq"] = global_to_seq.get(r["race_number"], r["race_number"])
-        results.append(d)
-
-    return results
-
-
-def get_schools(conn, gender, sport, division):
-    """Return sorted list of schools for a category."""
-    rows = conn.execute(
-        """SELECT DISTINCT school FROM race_results
-           WHERE gender = ? AND sport = ? AND division = ?
-           ORDER BY school""",
-        (gender, sport, division),
-    ).fetchall()
-    return [r["school"] for r in rows]
-
-
-def get_athletes(conn, gender, sport, division, school=None):
-    """Return sorted list of athletes for a category, optionally filtered by school."""
-    query = """SELECT DISTINCT first_name, last_name FROM race_results
-               WHERE gender = ? AND sport = ? AND division = ?"""
-    params = [gender, sport, division]
-    if school:
-        query += " AND school = ?"
-        params.append(school)
-    query += " ORDER BY last_name COLLATE NOCASE, first_name COLLATE NOCASE"
-    rows = conn.execute(query, params).fetchall()
-    return [{"value": f"{r['first_name']} {r['last_name']}", "label": f"{r['last_name'].upper()}, {r['first_name']}"} for r in rows]
-
-
 def set_event_ofsaa_flag(conn, event_id, sport):
     """Set ofsaa_{sport} = 1 on the given event."""
     col = f"ofsaa_{sport}"
-    conn.execute(f"UPDATE events SET {col} = 1 WHERE id = ?", (event_id,))
+    row = conn.execute(f"UPDATE events SET {col} = 1 WHERE id = ? AND {col} IS NOT 1 RETURNING *", (event_id,)).fetchone()
+    if row is not None:
+        record_change(conn, "event", "update", _event_data(row), row["season"])
     conn.commit()
-
-
-def get_ofsaa_event(conn, sport):
-    """Return the event row where ofsaa_{sport} = 1, or None."""
-    col = f"ofsaa_{sport}"
-    row = conn.execute(
-        f"SELECT * FROM events WHERE {col} = 1", ()
-    ).fetchone()
-    return row
-
-
-def get_ofsaa_race_results(conn, gender, sport, division):
-    """Return (run1_results, run2_results) for the OFSAA event.
-
-    Each list contains dicts with first_name, last_name, school, place,
-    time_seconds, status. Returns (None, None) if no OFSAA event or <2 runs.
-    """
-    event = get_ofsaa_event(conn, sport)
-    if not event:
-        return None, None
-
-    event_id = event["id"]
-
-    # Get distinct race numbers for this event/gender/sport/division
-    race_numbers = conn.execute(
-        """SELECT DISTINCT race_number FROM race_results
-           WHERE event_id = ? AND gender = ? AND sport = ? AND division = ?
-           ORDER BY race_number""",
-        (event_id, gender, sport, division),
-    ).fetchall()
-
-    if len(race_numbers) < 2:
-        return None, None
-
-    runs = []
-    for rn_row in race_numbers[:2]:
-        rows = conn.execute(
-            """SELECT first_name, last_name, school, place, time_seconds, status
-               FROM race_results
-               WHERE event_id = ? AND race_number = ? AND gender = ? AND sport = ? AND division = ?
-               ORDER BY CASE WHEN status IS NOT NULL THEN 1 ELSE 0 END, place""",
-            (event_id, rn_row["race_number"], gender, sport, division),
-        ).fetchall()
-        runs.append([dict(r) for r in rows])
-
-    return runs[0], runs[1]
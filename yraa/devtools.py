@@ -0,0 +1,213 @@
+"""Per-request SQL tracing and profiling, enabled when YRAA_ENV=dev.
+
+Every request gets a RequestTrace. Connections opened while it is active
+record each statement (via sqlite3's trace callback) with its execution +
+fetch time and row count. Adding ?profile=1 to any URL also runs the
+endpoint under cProfile. The query count and DB time are returned in the
+Server-Timing header, and the trace/profile can be fetched from
+/_dev/trace/{id} and /_dev/profile/{id} using the X-Trace-Id header.
+"""
+import contextvars
+import cProfile
+import io
+import marshal
+import pstats
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from fastapi.routing import APIRoute
+
+TRACE_HISTORY = 50
+
+_current = contextvars.ContextVar("yraa_request_trace", default=None)
+_recent = OrderedDict()  # trace id -> RequestTrace, oldest first
+
+
+class RequestTrace:
+    def __init__(self, method, path, profile=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.queries = []
+        self.total_seconds = 0.0
+        self.profile = cProfile.Profile() if profile else None
+
+    @property
+    def db_seconds(self):
+        return sum(q["seconds"] for q in self.queries)
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{len(self.queries)} queries", '
+            f"total;dur={self.total_seconds * 1000:.2f}"
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "query_count": len(self.queries),
+            "has_profile": self.profile is not None,
+            "queries": [
+                {"sql": q["sql"], "ms": round(q["seconds"] * 1000, 3), "rows": q["rows"]}
+                for q in self.queries
+            ],
+        }
+
+
+class TracingConnection(sqlite3.Connection):
+    """Connection that records every statement into the active RequestTrace."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(self._on_statement)
+
+    @property
+    def _trace(self):
+        # Looked up per statement: pooled connections outlive a single request
+        return _current.get()
+
+    def _on_statement(self, sql):
+        if self._trace is not None:
+            self._trace.queries.append({"sql": sql, "seconds": 0.0, "rows": 0})
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        elapsed = time.perf_counter() - start
+        if self._trace is None or not self._trace.queries:
+            return cursor
+        # The trace callback fires on the statement's first step, inside execute()
+        entry = self._trace.queries[-1]
+        entry["seconds"] += elapsed
+        return _TracedCursor(cursor, entry)
+
+
+class _TracedCursor:
+    """Cursor proxy that adds fetch time and row counts to a trace entry."""
+
+    def __init__(self, cursor, entry):
+        self._cursor = cursor
+        self._entry = entry
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._entry["seconds"] += time.perf_counter() - start
+        if row is not None:
+            self._entry["rows"] += 1
+        return row
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._entry["seconds"] += time.perf_counter() - start
+        self._entry["rows"] += len(rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def connection_factory():
+    """Return the sqlite3 connection class to use for the current request."""
+    return TracingConnection if _current.get() is not None else sqlite3.Connection
+
+
+def _profiled(endpoint):
+    @wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        trace = _current.get()
+        if trace is None or trace.profile is None:
+            return endpoint(*args, **kwargs)
+        # Sync endpoints run in a threadpool thread, so profile here rather than in the middleware
+        trace.profile.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            trace.profile.disable()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that can run its (sync) endpoint under the request's profiler."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if not iscoroutinefunction(endpoint):
+            endpoint = _profiled(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+async def trace_request(request, call_next):
+    """HTTP middleware: attach a RequestTrace and report it in response headers."""
+    if request.url.path.startswith("/_dev/"):
+        return await call_next(request)
+
+    trace = RequestTrace(request.method, request.url.path, profile=request.query_params.get("profile") == "1")
+    token = _current.set(trace)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    trace.total_seconds = time.perf_counter() - start
+
+    _recent[trace.id] = trace
+    while len(_recent) > TRACE_HISTORY:
+        _recent.popitem(last=False)
+
+    response.headers["Server-Timing"] = trace.server_timing()
+    response.headers["X-Trace-Id"] = trace.id
+    response.headers["X-Query-Count"] = str(len(trace.queries))
+    return response
+
+
+router = APIRouter(prefix="/_dev")
+
+
+@router.get("/traces")
+def list_traces():
+    return [
+        {k: v for k, v in t.to_dict().items() if k != "queries"}
+        for t in reversed(_recent.values())
+    ]
+
+
+@router.get("/trace/{trace_id}")
+def get_trace(trace_id: str):
+    trace = _recent.get(trace_id)
+    if trace is None:
+        return JSONResponse({"error": "Unknown trace"}, status_code=404)
+    return trace.to_dict()
+
+
+@router.get("/profile/{trace_id}")
+def get_profile(trace_id: str, format: str = "prof"):
+    trace = _recent.get(trace_id)
+    if trace is None or trace.profile is None:
+        return JSONResponse({"error": "No profile for this trace (request it with ?profile=1)"}, status_code=404)
+
+    if format == "text":
+        out = io.StringIO()
+        pstats.Stats(trace.profile, stream=out).sort_stats("cumulative").print_stats(60)
+        return PlainTextResponse(out.getvalue())
+
+    # Same format as pstats dump_stats(), loadable by snakeviz / pstats.Stats(path)
+    trace.profile.create_stats()
+    return Response(
+        marshal.dumps(trace.profile.stats),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="yraa-{trace_id}.prof"'},
+    )
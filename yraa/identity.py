@@ -0,0 +1,279 @@
+"""Duplicate-athlete detection and the athlete alias table.
+
+Athletes are identified by their (first_name, last_name) text, so a
+nickname ("Alexander (Sasha)"), a typo or a spacing difference between
+sheets splits one athlete's season in two. Rather than comparing every
+pair of names, each name is placed in blocks keyed by gender, sport,
+school and the Soundex code of its first or last name; only names sharing
+a block are compared.
+
+Pairs whose normalized names are identical (ignoring case, accents,
+punctuation and spacing, with a parenthesized nickname matching either
+form) are exact duplicates and are aliased automatically at ingest. Other
+close pairs are reported as probable duplicates for review. Two names that
+appear in the same race are different athletes and are never paired.
+Accepted aliases are stored in athlete_aliases and applied by the
+resolved_results view.
+
+    python3 -m yraa.identity --db data/yraa.db            # scan the whole season
+    python3 -m yraa.identity --db data/yraa.db --accept   # alias every reported pair
+"""
+import argparse
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from .analytics import refresh_athletes
+from .db import init_db, current_season, record_alias_change
+from .search import normalize
+from .snapshot import refresh_snapshot
+
+SIMILARITY_THRESHOLD = 0.85
+
+_SOUNDEX_CODES = {}
+for _letters, _code in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6")):
+    for _c in _letters:
+        _SOUNDEX_CODES[_c] = _code
+
+
+def soundex(name):
+    """American Soundex code of a name ("Robert" -> "r163"), or "" if it has no letters."""
+    letters = [c for c in normalize(name) if c.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0]
+    prev = _SOUNDEX_CODES.get(letters[0], "")
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, "")
+        if digit and digit != prev:
+            code += digit
+            if len(code) == 4:
+                break
+        if c not in "hw":
+            prev = digit
+    return code.ljust(4, "0")
+
+
+def _compact(text):
+    return normalize(text).replace(" ", "")
+
+
+def name_parts(first_name, last_name):
+    """Return (first names, last name) normalized for comparison.
+
+    "Alexander (Sasha)" yields both "alexander" and "sasha" as first names;
+    spacing and punctuation are dropped ("Mac Donald" == "MacDonald").
+    """
+    firsts = {_compact(re.sub(r"\([^)]*\)", " ", first_name))}
+    firsts.update(_compact(n) for n in re.findall(r"\(([^)]*)\)", first_name))
+    firsts.discard("")
+    last = _compact(re.sub(r"\([^)]*\)", " ", last_name))
+    return firsts, last
+
+
+def name_similarity(a, b):
+    """Return (score, exact) for two athlete dicts.
+
+    The score is the lower of the first-name and last-name similarities, so
+    siblings (same last name, different first name) score low. Names whose
+    digits differ are never considered the same athlete.
+    """
+    firsts_a, last_a = name_parts(a["first_name"], a["last_name"])
+    firsts_b, last_b = name_parts(b["first_name"], b["last_name"])
+    if re.sub(r"\D", "", last_a) != re.sub(r"\D", "", last_b):
+        return 0.0, False
+    if last_a == last_b and firsts_a & firsts_b:
+        return 1.0, True
+    first_score = max(SequenceMatcher(None, x, y).ratio() for x in firsts_a or {""} for y in firsts_b or {""})
+    last_score = SequenceMatcher(None, last_a, last_b).ratio()
+    return min(first_score, last_score), False
+
+
+def blocking_keys(athlete):
+    """Blocks an athlete dict belongs to: same category and school, same-sounding first or last name."""
+    base = (athlete["gender"], athlete["sport"], athlete["school"])
+    first = re.sub(r"\([^)]*\)", " ", athlete["first_name"])
+    return [base + ("first", soundex(first)), base + ("last", soundex(athlete["last_name"]))]
+
+
+def find_duplicates(athletes, new=None, threshold=SIMILARITY_THRESHOLD):
+    """Return probable duplicate pairs among athlete dicts.
+
+    Each athlete dict has first_name, last_name, school, gender, sport and
+    a result count (`results`), and optionally the set of races it appears
+    in (`races`); names sharing a race are skipped. When `new` (a set of
+    (gender, sport, school, first_name, last_name) tuples) is given, only
+    pairs involving at least one new name are reported. Each pair is a dict with the alias (the name
+    with fewer results) and canonical name, the similarity score and
+    whether the names are an exact normalized match.
+    """
+    blocks = defaultdict(list)
+    for a in athletes:
+        for key in blocking_keys(a):
+            blocks[key].append(a)
+
+    pairs = {}
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pair_key = tuple(sorted([_athlete_key(a), _athlete_key(b)]))
+                if pair_key in pairs:
+                    continue
+                if new is not None and _athlete_key(a) not in new and _athlete_key(b) not in new:
+                    continue
+                if not a.get("races", set()).isdisjoint(b.get("races", ())):
+                    continue
+                score, exact = name_similarity(a, b)
+                if score < threshold:
+                    continue
+                canonical, alias = sorted([a, b], key=_canonical_order)
+                pairs[pair_key] = {
+                    "gender": a["gender"],
+                    "sport": a["sport"],
+                    "school": a["school"],
+                    "alias": (alias["first_name"], alias["last_name"]),
+                    "canonical": (canonical["first_name"], canonical["last_name"]),
+                    "score": round(score, 3),
+                    "exact": exact,
+                }
+    return sorted(pairs.values(), key=lambda p: (p["gender"], p["sport"], p["school"], p["canonical"]))
+
+
+def _athlete_key(a):
+    return (a["gender"], a["sport"], a["school"], a["first_name"], a["last_name"])
+
+
+def _canonical_order(a):
+    # Most results wins; then prefer the name without a nickname, then the shorter spelling
+    return (-a.get("results", 0), "(" in a["first_name"], len(a["first_name"]) + len(a["last_name"]),
+            a["last_name"], a["first_name"])
+
+
+def get_season_athletes(conn, season=None):
+    """Return every resolved athlete in a season (current by default) with its result count and races."""
+    rows = conn.execute(
+        """SELECT gender, sport, school, first_name, last_name, COUNT(*) AS results,
+                  GROUP_CONCAT(DISTINCT race_number) AS races
+           FROM resolved_results
+           WHERE season = ?
+           GROUP BY gender, sport, school, first_name, last_name""",
+        (current_season(conn) if season is None else season,),
+    ).fetchall()
+    return [{**dict(r), "races": {int(n) for n in r["races"].split(",")}} for r in rows]
+
+
+def check_new_results(conn, races):
+    """Return duplicate pairs between parsed (not yet inserted) races and the database.
+
+    `races` is a list of result lists, one per new race file. Names that are
+    already aliases are mapped to their canonical name first, so accepted
+    aliases are not reported again.
+    """
+    aliases = get_aliases(conn)
+    counts = defaultdict(int)
+    races_by_athlete = defaultdict(set)
+    for a in get_season_athletes(conn):
+        counts[_athlete_key(a)] += a["results"]
+        races_by_athlete[_athlete_key(a)] |= a["races"]
+    new = set()
+    for i, results in enumerate(races):
+        for r in results:
+            key = (r["gender"], r["sport"], r["school"], r["first_name"], r["last_name"])
+            key = aliases.get(key, key)
+            if key not in counts:
+                new.add(key)
+            counts[key] += 1
+            # New races have no race number yet; tag them apart from the stored ones
+            races_by_athlete[key].add(("new", i))
+
+    athletes = [
+        {"gender": g, "sport": s, "school": school, "first_name": f, "last_name": l, "results": n,
+         "races": races_by_athlete[(g, s, school, f, l)]}
+        for (g, s, school, f, l), n in counts.items()
+    ]
+    return find_duplicates(athletes, new=new)
+
+
+def get_aliases(conn):
+    """Return {(gender, sport, school, alias_first, alias_last): (gender, sport, school, first, last)}."""
+    rows = conn.execute("SELECT * FROM athlete_aliases").fetchall()
+    return {
+        (r["gender"], r["sport"], r["school"], r["alias_first"], r["alias_last"]):
+            (r["gender"], r["sport"], r["school"], r["first_name"], r["last_name"])
+        for r in rows
+    }
+
+
+def add_alias(conn, pair):
+    """Store a duplicate pair from find_duplicates() as an alias of its canonical name."""
+    alias_first, alias_last = pair["alias"]
+    first_name, last_name = pair["canonical"]
+    # Anything already aliased to the new alias now points at the canonical name
+    repointed = conn.execute(
+        """UPDATE athlete_aliases SET first_name = ?, last_name = ?
+           WHERE gender = ? AND sport = ? AND school = ? AND first_name = ? AND last_name = ?
+           RETURNING *""",
+        (first_name, last_name, pair["gender"], pair["sport"], pair["school"], alias_first, alias_last),
+    ).fetchall()
+    for row in repointed:
+        record_alias_change(conn, "update", row)
+    row = conn.execute(
+        """INSERT OR REPLACE INTO athlete_aliases
+           (gender, sport, school, alias_first, alias_last, first_name, last_name)
+           VALUES (?, ?, ?, ?, ?, ?, ?)
+           RETURNING *""",
+        (pair["gender"], pair["sport"], pair["school"], alias_first, alias_last, first_name, last_name),
+    ).fetchone()
+    record_alias_change(conn, "insert", row)
+    conn.commit()
+
+
+def format_pair(pair):
+    alias = " ".join(pair["alias"])
+    canonical = " ".join(pair["canonical"])
+    kind = "exact" if pair["exact"] else f"similarity {pair['score']:.2f}"
+    return f"{pair['gender']} {pair['sport']}, {pair['school']}: \"{alias}\" -> \"{canonical}\" ({kind})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate athlete names and manage aliases")
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help=f"Minimum name similarity to report (default: {SIMILARITY_THRESHOLD})")
+    parser.add_argument("--accept", action="store_true", help="Store every reported pair as an alias")
+    parser.add_argument("--list", action="store_true", help="List stored aliases and exit")
+    args = parser.parse_args()
+
+    conn = init_db(args.db)
+    if args.list:
+        aliases = get_aliases(conn)
+        for (g, s, school, af, al), (_, _, _, f, l) in sorted(aliases.items()):
+            print(f"{g} {s}, {school}: \"{af} {al}\" -> \"{f} {l}\"")
+        print(f"{len(aliases)} alias(es).")
+        conn.close()
+        return
+
+    pairs = find_duplicates(get_season_athletes(conn), threshold=args.threshold)
+    if not pairs:
+        print("No probable duplicates found.")
+        conn.close()
+        return
+
+    print(f"Probable duplicates ({len(pairs)}):")
+    for pair in pairs:
+        print(f"  {format_pair(pair)}")
+    if args.accept:
+        for pair in pairs:
+            add_alias(conn, pair)
+        for gender, sport in sorted({(p["gender"], p["sport"]) for p in pairs}):
+            refresh_athletes(conn, gender, sport)
+        print(f"\nStored {len(pairs)} alias(es).")
+    conn.close()
+    if args.accept:
+        refresh_snapshot(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,15 @@ import argparse
 import glob
 import os
 import sys
+import time
 from collections import Counter
 
+from . import metrics
+from .analytics import refresh_athletes, refresh_races
+from .identity import check_new_results, add_alias, format_pair
+from .snapshot import publish_snapshot
 from .parser import parse_race_csv, parse_filename, normalize_filename
-from .db import init_db, get_or_create_event, get_next_race_number, insert_race_results, is_file_ingested, mark_file_ingested, set_event_ofsaa_flag
+from .db import init_db, get_or_create_event, get_next_race_number, insert_race_results, is_file_ingested, mark_file_ingested, replace_race_results, set_event_ofsaa_flag
 
 DEFAULT_DB = "data/yraa.db"
 
@@ -19,6 +24,13 @@ def main():
     group.add_argument("--dir", help="Path to directory of race result CSVs")
     parser.add_argument("--db", default=DEFAULT_DB, help=f"Database path (default: {DEFAULT_DB})")
     parser.add_argument("--yes", "-y", action="store_true", help="Skip confirmation prompt")
+    parser.add_argument("--correct", action="store_true",
+                        help="Re-read already-ingested files as corrections of their races (changes are logged for /api/changes)")
+    parser.add_argument("--accept-aliases", action="store_true",
+                        help="Also alias probable duplicate athlete names (exact normalized matches are always aliased)")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Don't publish a read snapshot for the web app afterwards (see yraa.snapshot)")
+    parser.add_argument("--publish", metavar="DIR", help="Re-render changed static pages into DIR after ingesting (see yraa.publish)")
 
     args = parser.parse_args()
 
@@ -33,29 +45,7 @@ def main():
 
     # Parse all files, skipping already-ingested ones
     conn = init_db(args.db)
-
-    all_results = []
-    skipped_files = []
-    ofsaa_flagged = []
-    for path in files:
-        basename = os.path.basename(path)
-        normalized = normalize_filename(basename)
-        parsed = parse_filename(path)
-        is_ofsaa = parsed["is_ofsaa"] if parsed else False
-
-        existing_race = is_file_ingested(conn, normalized)
-        if existing_race is not None:
-            if is_ofsaa and parsed:
-                # Retroactive OFSAA designation: flag the event but skip data insertion
-                event_date = parsed["event_date"]
-                event_id = get_or_create_event(conn, event_date)
-                set_event_ofsaa_flag(conn, event_id, parsed["sport"])
-                ofsaa_flagged.append((basename, event_date, parsed["sport"]))
-            else:
-                skipped_files.append((basename, existing_race))
-            continue
-        results = parse_race_csv(path)
-        all_results.append((path, results, is_ofsaa, parsed))
+    all_results, skipped_files, ofsaa_flagged = collect_files(conn, files)
 
     next_race = get_next_race_number(conn)
 
@@ -67,19 +57,28 @@ def main():
             print(f"Flagged event {event_date} as OFSAA qualifier for {sport}.")
         print()
 
-    if skipped_files:
+    corrections = []
+    if skipped_files and args.correct:
+        paths = {os.path.basename(p): p for p in files}
+        corrections = [(paths[basename], race_num) for basename, race_num in skipped_files]
+        print(f"Corrections to ingested races ({len(corrections)} files):")
+    elif skipped_files:
         print(f"Already ingested ({len(skipped_files)} files):")
-        for basename, race_num in skipped_files:
-            print(f"  Race #{race_num}: {basename}")
+    for basename, race_num in skipped_files:
+        print(f"  Race #{race_num}: {basename}")
+    if skipped_files:
         print()
 
-    if not all_results:
+    if not all_results and not corrections:
         print("No new files to ingest.")
         conn.close()
+        if ofsaa_flagged:
+            _finish(args)
         sys.exit(0)
 
-    print(f"New files to ingest: {len(all_results)}")
-    print()
+    if all_results:
+        print(f"New files to ingest: {len(all_results)}")
+        print()
 
     for i, (path, results, is_ofsaa, parsed) in enumerate(all_results):
         race_num = next_race + i
@@ -108,9 +107,26 @@ def main():
         print()
 
     total = sum(len(r) for _, r, _, _ in all_results)
-    print(f"Total results: {total}")
-    print(f"Race numbers: {next_race}–{next_race + len(all_results) - 1}")
-    print()
+    if all_results:
+        print(f"Total results: {total}")
+        print(f"Race numbers: {next_race}–{next_race + len(all_results) - 1}")
+        print()
+
+    # Duplicate athlete names (compared only within blocks; see yraa.identity)
+    duplicates = check_new_results(conn, [results for _, results, _, _ in all_results])
+    exact = [p for p in duplicates if p["exact"]]
+    probable = [p for p in duplicates if not p["exact"]]
+    if exact:
+        print(f"Same athlete, different spelling ({len(exact)}; will be aliased):")
+        for pair in exact:
+            print(f"  {format_pair(pair)}")
+        print()
+    if probable:
+        action = "will be aliased" if args.accept_aliases else "not aliased; use --accept-aliases or yraa.identity"
+        print(f"Probable duplicate athletes ({len(probable)}; {action}):")
+        for pair in probable:
+            print(f"  {format_pair(pair)}")
+        print()
 
     # Confirm
     if not args.yes:
@@ -120,7 +136,63 @@ def main():
             sys.exit(0)
 
     # Insert
-    for i, (path, results, is_ofsaa, parsed) in enumerate(all_results):
+    aliases = exact + (probable if args.accept_aliases else [])
+    for basename, race_num, inserted, skipped, is_ofsaa in insert_files(conn, all_results, next_race, aliases):
+        if race_num is None:
+            print(f"  Skipping {basename}: no event date")
+            continue
+        ofsaa_msg = " [OFSAA]" if is_ofsaa else ""
+        print(f"  Race #{race_num} ({basename}): {inserted} inserted, {skipped} skipped{ofsaa_msg}")
+    if aliases:
+        print(f"  Aliased {len(aliases)} athlete name(s)")
+    for basename, race_num, added, updated, removed in correct_files(conn, corrections):
+        print(f"  Race #{race_num} ({basename}): corrected, {added} added, {updated} updated, {removed} removed")
+
+    conn.close()
+    _finish(args)
+    print("\nDone.")
+
+
+def collect_files(conn, files):
+    """Parse the files not ingested yet; re-ingested OFSAA files only flag their event.
+
+    Returns (new, skipped, ofsaa_flagged): new is [(path, results, is_ofsaa,
+    parsed filename)], skipped [(basename, race number)] and ofsaa_flagged
+    [(basename, event date, sport)].
+    """
+    new = []
+    skipped = []
+    ofsaa_flagged = []
+    for path in files:
+        basename = os.path.basename(path)
+        normalized = normalize_filename(basename)
+        parsed = parse_filename(path)
+        is_ofsaa = parsed["is_ofsaa"] if parsed else False
+
+        existing_race = is_file_ingested(conn, normalized)
+        if existing_race is not None:
+            if is_ofsaa and parsed:
+                # Retroactive OFSAA designation: flag the event but skip data insertion
+                event_date = parsed["event_date"]
+                event_id = get_or_create_event(conn, event_date)
+                set_event_ofsaa_flag(conn, event_id, parsed["sport"])
+                ofsaa_flagged.append((basename, event_date, parsed["sport"]))
+            else:
+                skipped.append((basename, existing_race))
+            continue
+        results = parse_race_csv(path)
+        new.append((path, results, is_ofsaa, parsed))
+    return new, skipped, ofsaa_flagged
+
+
+def insert_files(conn, new, next_race, aliases=()):
+    """Insert files from collect_files() as races next_race, next_race + 1, ... and add `aliases`.
+
+    Returns [(basename, race number, inserted, skipped, is_ofsaa)]; the race
+    number is None for a file skipped for having no event date.
+    """
+    outcomes = []
+    for i, (path, results, is_ofsaa, parsed) in enumerate(new):
         race_num = next_race + i
         basename = os.path.basename(path)
         normalized = normalize_filename(basename)
@@ -128,21 +200,54 @@ def main():
         # Get event date from first result
         event_date = results[0]["event_date"] if results else None
         if not event_date:
-            print(f"  Skipping {basename}: no event date")
+            outcomes.append((basename, None, 0, 0, is_ofsaa))
             continue
 
+        start = time.perf_counter()
         event_id = get_or_create_event(conn, event_date)
         inserted, skipped = insert_race_results(conn, results, event_id, race_num)
         mark_file_ingested(conn, normalized, race_num)
 
         if is_ofsaa and parsed:
             set_event_ofsaa_flag(conn, event_id, parsed["sport"])
-
-        ofsaa_msg = " [OFSAA]" if is_ofsaa else ""
-        print(f"  Race #{race_num} ({basename}): {inserted} inserted, {skipped} skipped{ofsaa_msg}")
-
-    conn.close()
-    print("\nDone.")
+        metrics.observe("yraa_ingest_duration_seconds", time.perf_counter() - start)
+        metrics.inc("yraa_ingest_results_total", {"outcome": "inserted"}, inserted)
+        metrics.inc("yraa_ingest_results_total", {"outcome": "skipped"}, skipped)
+        outcomes.append((basename, race_num, inserted, skipped, is_ofsaa))
+
+    for pair in aliases:
+        add_alias(conn, pair)
+    refresh_races(conn, [race_num for _, race_num, _, _, _ in outcomes if race_num is not None])
+    # Aliases also rename the athletes' results in earlier seasons
+    for gender, sport in sorted({(p["gender"], p["sport"]) for p in aliases}):
+        refresh_athletes(conn, gender, sport)
+    return outcomes
+
+
+def correct_files(conn, corrections):
+    """Re-read [(path, race number)] of ingested files and apply their differences (see db.replace_race_results).
+
+    Returns [(basename, race number, added, updated, removed)].
+    """
+    outcomes = []
+    for path, race_num in corrections:
+        added, updated, removed = replace_race_results(conn, parse_race_csv(path), race_num)
+        metrics.inc("yraa_ingest_results_total", {"outcome": "corrected"}, added + updated + removed)
+        outcomes.append((os.path.basename(path), race_num, added, updated, removed))
+    refresh_races(conn, [race_num for _, race_num in corrections])
+    return outcomes
+
+
+def _finish(args):
+    """Publish the read snapshot and (with --publish) the static site after a write."""
+    if not args.no_snapshot:
+        path = publish_snapshot(args.db)
+        print(f"\nPublished read snapshot {path}")
+    if args.publish:
+        from .publish import publish_site
+
+        rendered, unchanged = publish_site(args.db, args.publish)
+        print(f"\nPublished to {args.publish}: {rendered} page group(s) rendered, {unchanged} unchanged.")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,31 @@
 import csv
-from typing import List
+from typing import Iterator, List, Tuple
 from .models import RaceResult
 
 
 def load_results_from_csv(path: str) -> List[RaceResult]:
-    results = []
+    return list(iter_results_from_csv(path))
 
+
+def iter_results_from_csv(path: str) -> Iterator[RaceResult]:
+    """Yield the results of a legacy points CSV row by row, without holding the file in memory."""
+    for first_name, last_name, school, cells in iter_sheet_rows(path):
+        athlete_name = f"{first_name} {last_name}"
+
+        # Parse all remaining columns as scores
+        for cell in cells:
+            if cell == "":
+                continue
+            score = float(cell)
+            yield RaceResult(
+                athlete_name=athlete_name,
+                school=school,
+                score=score,
+            )
+
+
+def iter_sheet_rows(path: str) -> Iterator[Tuple[str, str, str, List[str]]]:
+    """Yield (first_name, last_name, school, score cells) per athlete row; cells are stripped, "" if blank."""
     with open(path, newline="") as csvfile:
         reader = csv.reader(csvfile)
 
@@ -26,20 +46,4 @@ def load_results_from_csv(path: str) -> List[RaceResult]:
                 continue
 
             school = row[2].strip()
-            athlete_name = f"{first_name} {last_name}"
-
-            # Parse all remaining columns as scores
-            for cell in row[3:]:
-                cell = cell.strip()
-                if cell == "":
-                    continue
-                score = float(cell)
-                results.append(
-                    RaceResult(
-                        athlete_name=athlete_name,
-                        school=school,
-                        score=score,
-                    )
-                )
-
-    return results
+            yield first_name, last_name, school, [cell.strip() for cell in row[3:]]
@@ -0,0 +1,297 @@
+"""Background ingest jobs for CSV uploads.
+
+POST /api/admin/uploads/{filename} (see web.py) streams the request body
+to data/uploads/ and records a queued job, so an upload costs the same
+whatever the file size: nothing is parsed in the request. Jobs live in a
+small SQLite queue next to the database (data/yraa.jobs.db, WAL mode),
+so enqueueing and polling never wait on an ingest's write lock.
+
+Every web process has a worker thread, but only one of them ingests into
+a database at a time: a worker first takes the queue's lease (a single
+row naming its owner) and holds it for the whole job, so two processes
+never pick race numbers or check for ingested files concurrently. The
+lease holder takes queued jobs in order and runs the same steps as
+yraa.ingest: parse, insert, alias exact duplicate names, publish a read
+snapshot. The outcome is stored as JSON on the job. Jobs survive
+restarts: a claimed job and the lease carry a heartbeat that the running
+worker refreshes every HEARTBEAT_SECONDS, and once it is older than
+LEASE_SECONDS (its process died) the lease can be taken over and the job
+is queued again.
+"""
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+
+from . import metrics
+from .db import get_next_race_number, init_db
+from .identity import check_new_results
+from .ingest import collect_files, insert_files
+from .snapshot import publish_snapshot
+
+UPLOAD_DIR = "uploads"
+POLL_SECONDS = float(os.environ.get("YRAA_JOB_POLL_SECONDS", "5"))
+HEARTBEAT_SECONDS = 10
+# A running job without a heartbeat for this long is taken to be orphaned
+LEASE_SECONDS = 60
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result TEXT,
+    error TEXT,
+    created_at TEXT DEFAULT (datetime('now')),
+    started_at TEXT,
+    finished_at TEXT,
+    owner TEXT,
+    heartbeat_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+CREATE TABLE IF NOT EXISTS worker_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT,
+    heartbeat_at TEXT
+);
+"""
+
+
+def queue_path(db_path):
+    """data/yraa.db -> data/yraa.jobs.db"""
+    return os.path.splitext(db_path)[0] + ".jobs.db"
+
+
+def connect(db_path):
+    """Open (creating if needed) the job queue of the database at db_path."""
+    conn = sqlite3.connect(queue_path(db_path), timeout=10, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    # Queues created before jobs had leases
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)").fetchall()}
+    with conn:
+        for column in ("owner", "heartbeat_at"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+    return conn
+
+
+def upload_path(db_path, filename):
+    """A new, unique path for an uploaded file; the file name itself is kept for yraa.parser."""
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), UPLOAD_DIR)
+    os.makedirs(base_dir, exist_ok=True)
+    return os.path.join(tempfile.mkdtemp(prefix=time.strftime("%Y%m%d-%H%M%S-"), dir=base_dir), filename)
+
+
+def enqueue(db_path, filename, path):
+    """Queue an ingest of the uploaded file at `path`. Returns the job id."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            job_id = conn.execute("INSERT INTO jobs (filename, path) VALUES (?, ?)", (filename, path)).lastrowid
+    finally:
+        conn.close()
+    metrics.inc("yraa_jobs_total", {"status": QUEUED})
+    return job_id
+
+
+def _job_dict(row):
+    job = dict(row)
+    for key in ("path", "owner", "heartbeat_at"):
+        job.pop(key)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def get_job(db_path, job_id):
+    """The job as a dict (result decoded), or None."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return _job_dict(row) if row else None
+
+
+def list_jobs(db_path, limit=20):
+    """The most recent jobs, newest first."""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [_job_dict(r) for r in rows]
+
+
+def _acquire_lease(conn, owner):
+    """Take (or keep) the queue's worker lease unless another live worker holds it. Returns True if held."""
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO worker_lease (id) VALUES (1)")
+        return conn.execute(
+            """UPDATE worker_lease SET owner = ?, heartbeat_at = datetime('now')
+               WHERE id = 1 AND (owner IS NULL OR owner = ? OR heartbeat_at < datetime('now', ?))""",
+            (owner, owner, f"-{LEASE_SECONDS} seconds"),
+        ).rowcount == 1
+
+
+def _release_lease(conn, owner):
+    with conn:
+        conn.execute("UPDATE worker_lease SET owner = NULL, heartbeat_at = NULL WHERE id = 1 AND owner = ?", (owner,))
+
+
+def requeue_stale(conn):
+    """Queue again the running jobs whose owner stopped sending heartbeats. Returns how many."""
+    with conn:
+        return conn.execute(
+            """UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL
+               WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < datetime('now', ?))""",
+            (QUEUED, RUNNING, f"-{LEASE_SECONDS} seconds"),
+        ).rowcount
+
+
+def _claim(conn, owner):
+    with conn:
+        return conn.execute(
+            """UPDATE jobs SET status = ?, started_at = datetime('now'), owner = ?, heartbeat_at = datetime('now')
+               WHERE id = (SELECT MIN(id) FROM jobs WHERE status = ?) AND status = ?
+               RETURNING id, filename, path""",
+            (RUNNING, owner, QUEUED, QUEUED),
+        ).fetchone()
+
+
+def _heartbeat(db_path, job_id, owner, stop):
+    conn = connect(db_path)
+    try:
+        while not stop.wait(HEARTBEAT_SECONDS):
+            with conn:
+                conn.execute(
+                    "UPDATE jobs SET heartbeat_at = datetime('now') WHERE id = ? AND owner = ?", (job_id, owner)
+                )
+                conn.execute(
+                    "UPDATE worker_lease SET heartbeat_at = datetime('now') WHERE id = 1 AND owner = ?", (owner,)
+                )
+    finally:
+        conn.close()
+
+
+def _finish(conn, job_id, owner, status, result=None, error=None):
+    with conn:
+        conn.execute(
+            """UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = datetime('now')
+               WHERE id = ? AND owner = ?""",
+            (status, json.dumps(result) if result is not None else None, error, job_id, owner),
+        )
+    metrics.inc("yraa_jobs_total", {"status": status})
+
+
+def run_ingest(db_path, path):
+    """Ingest one uploaded file like `yraa.ingest --file path --yes`. Returns a summary dict."""
+    conn = init_db(db_path)
+    try:
+        new, skipped, ofsaa_flagged = collect_files(conn, [path])
+        duplicates = check_new_results(conn, [results for _, results, _, _ in new])
+        exact = [p for p in duplicates if p["exact"]]
+        outcomes = insert_files(conn, new, get_next_race_number(conn), exact)
+    finally:
+        conn.close()
+    if new or ofsaa_flagged:
+        publish_snapshot(db_path)
+    return {
+        "races": [
+            {"file": basename, "race_number": race_num, "inserted": inserted, "skipped": skipped, "ofsaa": is_ofsaa}
+            for basename, race_num, inserted, skipped, is_ofsaa in outcomes
+        ],
+        "already_ingested": [{"file": basename, "race_number": race_num} for basename, race_num in skipped],
+        "ofsaa_flagged": [{"file": basename, "event_date": d, "sport": sport} for basename, d, sport in ofsaa_flagged],
+        "aliased": len(exact),
+        "probable_duplicates": len(duplicates) - len(exact),
+    }
+
+
+class Worker:
+    """One background thread running the queued jobs of every database `db_paths()` returns.
+
+    notify() wakes it after an enqueue; otherwise it checks every POLL_SECONDS.
+    """
+
+    def __init__(self, db_paths, poll_seconds=POLL_SECONDS):
+        self.db_paths = db_paths
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        # Unique per worker, so a job is only finished or kept alive by the worker that claimed it
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="yraa-jobs", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _queues(self):
+        # Only databases that exist: the worker never creates a tenant's database
+        return [p for p in self.db_paths() if os.path.exists(p)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            while self.run_pending() and not self._stop.is_set():
+                pass
+            self._wake.wait(self.poll_seconds)
+
+    def run_pending(self):
+        """Run at most one queued job per database whose lease this worker holds. Returns True if any job ran."""
+        ran = False
+        for db_path in self._queues():
+            conn = connect(db_path)
+            if not _acquire_lease(conn, self.owner):
+                # Another process is ingesting into this database
+                conn.close()
+                continue
+            try:
+                requeue_stale(conn)
+                job = _claim(conn, self.owner)
+                if job is None:
+                    continue
+                ran = True
+                start = time.perf_counter()
+                stop = threading.Event()
+                heartbeat = threading.Thread(
+                    target=_heartbeat, args=(db_path, job["id"], self.owner, stop),
+                    name="yraa-jobs-heartbeat", daemon=True,
+                )
+                heartbeat.start()
+                try:
+                    result = run_ingest(db_path, job["path"])
+                except Exception as e:
+                    _finish(conn, job["id"], self.owner, FAILED, error=f"{type(e).__name__}: {e}")
+                else:
+                    _finish(conn, job["id"], self.owner, DONE, result=result)
+                finally:
+                    stop.set()
+                    heartbeat.join()
+                metrics.observe("yraa_job_duration_seconds", time.perf_counter() - start)
+            finally:
+                _release_lease(conn, self.owner)
+                conn.close()
+        return ran
@@ -0,0 +1,216 @@
+"""Bulk import of legacy pre-computed point sheets into the database.
+
+Historical seasons exist only as the point sheets read by the legacy CLI
+(first name, last name, school, then one points column per race; see
+io.py). Importing them makes those seasons viewable under
+/season/{year}/ like any other.
+
+Each sheet is one gender/sport (and division) of one season, taken from
+its file name, e.g. 2019-girls_ski.csv or 2019-boys_snowboard-open.csv
+(the season is named by its ending year; the division defaults to hs).
+Score column k becomes race k of that gender/sport, so the hs and open
+sheets of a category share race numbers. Race numbers continue from the
+database's. Sheets carry no dates: column k's event gets a synthetic date
+k - 1 weeks after January 1 of the season's ending year. A blank cell
+means the athlete did not race; a 0 is a race without points. Places and
+times are unknown (NULL), and fractional points are stored as given.
+
+Everything is inserted in one transaction with executemany, and the
+secondary indexes are dropped first and rebuilt once at the end. The
+change log (see db.record_change) and analytics (see analytics.py) are
+then brought up to date.
+
+    python3 -m yraa.legacy --db data/yraa.db --dir archive/
+    python3 -m yraa.legacy --db data/yraa.db --file sheet.csv --season 2014 --gender girls --sport ski
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+from . import metrics
+from .analytics import refresh_races
+from .db import get_next_race_number, init_db, is_file_ingested, record_changes, result_change_data
+from .io import iter_sheet_rows
+from .snapshot import publish_snapshot
+
+FILENAME_RE = re.compile(
+    r"(?P<season>(?:19|20)\d{2})\D.*?(?P<gender>boys|girls)[_-](?P<sport>ski|snowboard)(?:[_-](?P<division>hs|open))?",
+    re.IGNORECASE,
+)
+LOCATION = "Legacy point sheet (synthetic date)"
+
+
+def sheet_category(path, season=None, gender=None, sport=None, division=None):
+    """{season, gender, sport, division} of a sheet from its file name and any overrides. Raises ValueError."""
+    match = FILENAME_RE.search(os.path.basename(path))
+    parsed = {k: v.lower() for k, v in match.groupdict().items() if v} if match else {}
+    category = {
+        "season": season or (int(parsed["season"]) if "season" in parsed else None),
+        "gender": gender or parsed.get("gender"),
+        "sport": sport or parsed.get("sport"),
+        "division": division or parsed.get("division") or "hs",
+    }
+    missing = [k for k, v in category.items() if v is None]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)}: no {', '.join(missing)} in the file name; pass --{' --'.join(missing)}")
+    return category
+
+
+def event_date(season, column):
+    """Synthetic date of score column `column` (0-based) of a season."""
+    return (date(season, 1, 1) + timedelta(weeks=column)).isoformat()
+
+
+def _points(cell):
+    points = float(cell)
+    return int(points) if points.is_integer() else points
+
+
+def read_sheet(path):
+    """[(column, first_name, last_name, school, points)] for every non-blank score cell."""
+    return [
+        (column, first_name, last_name, school, _points(cell))
+        for first_name, last_name, school, cells in iter_sheet_rows(path)
+        for column, cell in enumerate(cells)
+        if cell != ""
+    ]
+
+
+def import_sheets(conn, sheets):
+    """Insert [(path, category)] sheets in one transaction. Returns [(basename, races, results)]."""
+    next_race = get_next_race_number(conn)
+    first_race = next_race
+    races = {}    # (season, gender, sport, column) -> race number
+    race_events = {}    # race number -> event id
+    events = {r["event_date"]: r["id"] for r in conn.execute("SELECT id, event_date FROM events").fetchall()}
+    outcomes = []
+    # A 128 MB page cache keeps the growing tables and indexes in memory during the load
+    conn.execute("PRAGMA cache_size = -131072")
+    with conn:
+        conn.execute("BEGIN")  # DROP INDEX would otherwise commit on its own
+        # Secondary indexes are rebuilt once after the load instead of updated per row
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ).fetchall()
+        for index in indexes:
+            conn.execute(f"DROP INDEX {index['name']}")
+
+        for path, category in sheets:
+            season, gender, sport, division = (category[k] for k in ("season", "gender", "sport", "division"))
+            rows = []
+            for column, first_name, last_name, school, points in read_sheet(path):
+                key = (season, gender, sport, column)
+                if key not in races:
+                    races[key] = next_race
+                    next_race += 1
+                    day = event_date(season, column)
+                    if day not in events:
+                        events[day] = conn.execute(
+                            "INSERT INTO events (event_date, location, season) VALUES (?, ?, ?)", (day, LOCATION, season)
+                        ).lastrowid
+                    race_events[races[key]] = events[day]
+                rows.append((race_events[races[key]], races[key], gender, sport, division, first_name, last_name, school,
+                             None, None, points, None, season))
+            before = conn.total_changes
+            conn.executemany(
+                """INSERT OR IGNORE INTO race_results
+                   (event_id, race_number, gender, sport, division,
+                    first_name, last_name, school, place, time_seconds, points, status, season)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows,
+            )
+            sheet_races = sorted({r[1] for r in rows})
+            conn.execute(
+                "INSERT OR IGNORE INTO ingested_files (filename, race_number) VALUES (?, ?)",
+                (os.path.basename(path), sheet_races[0] if sheet_races else first_race),
+            )
+            outcomes.append((os.path.basename(path), len(sheet_races), conn.total_changes - before))
+
+        for index in indexes:
+            conn.execute(index["sql"])
+
+        # Change log: each new race, then its results
+        changes = []
+        race_numbers = {n: key for key, n in races.items()}
+        race_seen = set()
+        for row in conn.execute(
+            "SELECT * FROM race_results WHERE race_number >= ? ORDER BY race_number, id", (first_race,)
+        ).fetchall():
+            n = row["race_number"]
+            if n not in race_seen:
+                race_seen.add(n)
+                season, gender, sport, column = race_numbers[n]
+                changes.append(("race", "insert", {
+                    "race_number": n, "event_id": row["event_id"], "event_date": event_date(season, column),
+                    "gender": gender, "sport": sport,
+                }, season, n))
+            changes.append(("result", "insert", result_change_data(row), row["season"], n))
+        record_changes(conn, changes)
+
+    refresh_races(conn, races.values())
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import legacy pre-computed point sheets into the database")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--file", action="append", help="Path to a legacy point sheet (repeatable)")
+    group.add_argument("--dir", help="Directory of legacy point sheets (searched recursively for *.csv)")
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    parser.add_argument("--season", type=int, help="Season (ending year) of every sheet, instead of the file names'")
+    parser.add_argument("--gender", choices=("boys", "girls"), help="Gender of every sheet")
+    parser.add_argument("--sport", choices=("ski", "snowboard"), help="Sport of every sheet")
+    parser.add_argument("--division", choices=("hs", "open"), help="Division of every sheet (default: from the file name, else hs)")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Don't publish a read snapshot for the web app afterwards (see yraa.snapshot)")
+    args = parser.parse_args()
+
+    files = args.file or sorted(glob.glob(os.path.join(args.dir, "**", "*.csv"), recursive=True))
+    if not files:
+        print(f"No CSV files found in {args.dir}")
+        sys.exit(1)
+    try:
+        sheets = [(path, sheet_category(path, args.season, args.gender, args.sport, args.division)) for path in files]
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    conn = init_db(args.db)
+    new = []
+    for path, category in sheets:
+        if is_file_ingested(conn, os.path.basename(path)) is not None:
+            print(f"  Already imported: {os.path.basename(path)}")
+        else:
+            new.append((path, category))
+    if not new:
+        print("No new sheets to import.")
+        conn.close()
+        sys.exit(0)
+
+    start = time.perf_counter()
+    try:
+        outcomes = import_sheets(conn, new)
+    except (OSError, ValueError) as e:
+        print(f"Import failed, nothing was written: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+    metrics.observe("yraa_ingest_duration_seconds", elapsed)
+
+    for (path, category), (basename, races, inserted) in zip(new, outcomes):
+        print(f"  {basename}: {category['season']} {category['gender']} {category['sport']} {category['division']}, "
+              f"{races} race(s), {inserted} result(s)")
+    total = sum(inserted for _, _, inserted in outcomes)
+    print(f"\nImported {total} results from {len(new)} sheet(s) in {elapsed:.1f}s")
+    if not args.no_snapshot:
+        path = publish_snapshot(args.db)
+        print(f"Published read snapshot {path}")
+
+
+if __name__ == "__main__":
+    main()
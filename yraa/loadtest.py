@@ -0,0 +1,244 @@
+"""Local load-test harness for the web dashboard.
+
+Optionally generates and ingests a synthetic season (see yraa.synth), starts
+uvicorn against that database, then requests a mix of dashboard, race
+result, OFSAA, athlete/school, detail, export and API routes (including a
+POST /api/batch) at a fixed concurrency and reports p50/p95/p99 latency
+and throughput per route.
+
+    python3 -m yraa.loadtest --generate --schools 40 --events 8 --concurrency 16 --requests 2000
+    python3 -m yraa.loadtest --url http://localhost:8000 --db data/yraa.db
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+from . import synth
+from .db import get_connection
+from .model import SeasonModel
+from .web import athlete_slugs, individual_leaderboard, school_slugs
+
+GENDERS = ("girls", "boys")
+SPORTS = ("ski", "snowboard")
+
+
+def build_routes(db_path):
+    """Return [(route_label, path, body), ...] covering every page type, using real names and ids from the DB.
+
+    body is None for a GET and the JSON bytes to POST otherwise.
+    """
+    routes = [("/", "/", None), ("/api/season", "/api/season", None), ("/api/changes", "/api/changes", None)]
+    for g in GENDERS:
+        for s in SPORTS:
+            for tab in ("hs", "open", "team"):
+                routes.append(("/{gender}/{sport}/{tab}", f"/{g}/{s}/{tab}", None))
+            routes.append(("/api/team/{gender}/{sport}", f"/api/team/{g}/{s}", None))
+            routes.append(("/api/individual/{gender}/{sport}/{division}", f"/api/individual/{g}/{s}/hs", None))
+            routes.append(("/export/{gender}/{sport}/{division}", f"/export/{g}/{s}/hs", None))
+            batch = [
+                {"view": "individual", "gender": g, "sport": s, "division": "hs"},
+                {"view": "team", "gender": g, "sport": s},
+                {"view": "races", "gender": g, "sport": s, "division": "hs"},
+            ]
+            routes.append(("POST /api/batch", "/api/batch", json.dumps(batch).encode()))
+    for tab in ("hs", "open", "team"):
+        routes.append(("/ofsaa/{tab}", f"/ofsaa/{tab}", None))
+    routes.append(("/races", "/races", None))
+    routes.append(("/export/races", "/export/races", None))
+
+    # Ids come from the same functions the server uses, so they match its URLs
+    conn = get_connection(db_path)
+    model = SeasonModel.load(conn)
+    conn.close()
+    leader = next(iter(individual_leaderboard(model, "girls", "ski", "hs")), None)
+    if leader:
+        athlete_id = athlete_slugs(model)[(leader["first_name"], leader["last_name"])]
+        school_id = school_slugs(model)[leader["school"]]
+        school = quote(leader["school"])
+        athlete = quote(f"{leader['first_name']} {leader['last_name']}")
+        routes.append(("/races?school=", f"/races?group=girls&sport=ski&division=hs&race=all&school={school}", None))
+        routes.append(("/races?athlete=", f"/races?group=girls&sport=ski&division=hs&race=all&athlete={athlete}", None))
+        routes.append(("/athlete/{id}", f"/athlete/{athlete_id}", None))
+        routes.append(("/school/{id}", f"/school/{school_id}", None))
+        routes.append(("/detail/{gender}/{sport}/hs/{id}.html", f"/detail/girls/ski/hs/{athlete_id}.html", None))
+        routes.append(("/detail/{gender}/{sport}/team/{id}.html", f"/detail/girls/ski/team/{school_id}.html", None))
+    return routes
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, workers=1):
+    """Start uvicorn in a subprocess against db_path. Returns (process, base_url)."""
+    port = _free_port()
+    env = dict(os.environ, YRAA_DB_PATH=db_path)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "yraa.web:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    # /ready answers 200 only once the warm-up has loaded every tenant's model
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+        try:
+            conn.request("GET", "/ready")
+            if conn.getresponse().status == 200:
+                return proc, base_url
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {proc.returncode}")
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not become ready within 30s")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def run_load(base_url, routes, concurrency, total_requests):
+    """Issue total_requests round-robin over routes from `concurrency` threads.
+
+    Returns (latencies by route label, error counts by route label, wall seconds).
+    """
+    parts = urlsplit(base_url)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+    local = threading.local()
+
+    def worker():
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            label, path, body = routes[i % len(routes)]
+            start = time.perf_counter()
+            try:
+                if body is None:
+                    local.conn.request("GET", path)
+                else:
+                    local.conn.request("POST", path, body, {"Content-Type": "application/json"})
+                resp = local.conn.getresponse()
+                resp.read()
+                ok = resp.status < 400
+            except (OSError, http.client.HTTPException):
+                local.conn.close()
+                local.conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies[label].append(elapsed)
+                else:
+                    errors[label] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, wall):
+    rows = []
+    for label in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies.get(label, []))
+        rows.append({
+            "route": label,
+            "count": len(values),
+            "errors": errors.get(label, 0),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "req_per_s": len(values) / wall if wall else 0.0,
+        })
+    return rows
+
+
+def print_report(rows, wall):
+    print(f"{'route':<48} {'count':>6} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for r in rows:
+        print(f"{r['route']:<48} {r['count']:>6} {r['errors']:>4} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['req_per_s']:>8.1f}")
+    total = sum(r["count"] for r in rows)
+    print(f"\n{total} requests in {wall:.2f}s — {total / wall:.1f} req/s overall")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the YRAA dashboard at controlled concurrency")
+    parser.add_argument("--db", help="Database to serve (default: a temporary DB when --generate is given)")
+    parser.add_argument("--url", help="Target an already-running server instead of starting uvicorn")
+    parser.add_argument("--generate", action="store_true", help="Generate and ingest a synthetic season first")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument("--requests", type=int, default=1000, help="Total requests (default: 1000)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes (default: 1)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the per-route summary as JSON")
+    synth.add_arguments(parser)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory(prefix="yraa-load-")
+    db_path = args.db or os.path.join(tmp.name, "load.db")
+
+    if args.generate:
+        raw_dir = os.path.join(tmp.name, "raw")
+        paths = synth.generate_season(raw_dir, **synth.generator_options(args))
+        print(f"Generated {len(paths)} race files; ingesting into {db_path} ...")
+        subprocess.run(
+            [sys.executable, "-m", "yraa.ingest", "--dir", raw_dir, "--db", db_path, "--yes"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+    elif not args.db:
+        parser.error("--db is required unless --generate is given")
+
+    proc = None
+    base_url = args.url
+    if not base_url:
+        proc, base_url = start_server(db_path, args.workers)
+
+    try:
+        routes = build_routes(db_path)
+        print(f"Running {args.requests} requests over {len(routes)} URLs at concurrency {args.concurrency} against {base_url}\n")
+        latencies, errors, wall = run_load(base_url, routes, args.concurrency, args.requests)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    rows = summarize(latencies, errors, wall)
+    print_report(rows, wall)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"wall_seconds": wall, "concurrency": args.concurrency, "routes": rows}, f, indent=2)
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""In-process request and query metrics with Prometheus text exposition.
+
+Every process keeps its own counters and histograms behind a lock. When
+YRAA_METRICS_DIR is set, each process also writes its samples to
+{dir}/{pid}.json (at most every FLUSH_INTERVAL seconds, and at exit) and
+/metrics merges all files, so totals stay correct when uvicorn runs
+several workers or when the ingest CLI runs in its own process. The web
+app calls prune_stale() at startup so files of processes that have exited
+stop counting (their counters reset, as Prometheus expects on restart).
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from functools import wraps
+
+METRICS_DIR = os.environ.get("YRAA_METRICS_DIR")
+FLUSH_INTERVAL = 5.0
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "yraa_http_requests_total": ("counter", "HTTP requests by route, method and status"),
+    "yraa_http_request_duration_seconds": ("histogram", "HTTP request latency by route"),
+    "yraa_function_duration_seconds": ("histogram", "Latency of db, scoring and OFSAA entry points"),
+    "yraa_db_connections_opened_total": ("counter", "SQLite connections opened"),
+    "yraa_cache_requests_total": ("counter", "Cache lookups by cache name and result (hit/miss)"),
+    "yraa_ingest_duration_seconds": ("histogram", "Time to insert one race file during ingest"),
+    "yraa_ingest_results_total": ("counter", "Race results inserted, skipped or corrected by ingest"),
+    "yraa_db_migrations_total": ("counter", "Schema migrations applied by init_db"),
+    "yraa_warmup_duration_seconds": ("histogram", "Time from startup to ready (templates, models, standings)"),
+    "yraa_warmup_failures_total": ("counter", "Tenants (or template compiles, unlabelled) that failed to warm up"),
+    "yraa_jobs_total": ("counter", "Upload ingest jobs by status reached (queued, done, failed)"),
+    "yraa_job_duration_seconds": ("histogram", "Time to run an upload ingest job"),
+}
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()  # one flush at a time per process
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [count per bucket..., +Inf count, sum]
+_last_flush = time.monotonic()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items())) if labels else ()
+
+
+def inc(name, labels=None, value=1):
+    """Increment a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    _maybe_flush()
+
+
+def observe(name, seconds, labels=None):
+    """Record one observation in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h[i] += 1
+                break
+        else:
+            h[len(BUCKETS)] += 1
+        h[-1] += seconds
+    _maybe_flush()
+
+
+def timed(name):
+    """Decorator recording call latency under yraa_function_duration_seconds."""
+    labels = {"function": name}
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe("yraa_function_duration_seconds", time.perf_counter() - start, labels)
+        return wrapper
+    return decorator
+
+
+def cache_hit(cache):
+    inc("yraa_cache_requests_total", {"cache": cache, "result": "hit"})
+
+
+def cache_miss(cache):
+    inc("yraa_cache_requests_total", {"cache": cache, "result": "miss"})
+
+
+def _snapshot():
+    with _lock:
+        return {
+            "counters": [[n, list(l), v] for (n, l), v in _counters.items()],
+            "histograms": [[n, list(l), list(h)] for (n, l), h in _histograms.items()],
+        }
+
+
+def flush():
+    """Write this process's samples to the shared metrics directory."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    with _flush_lock:
+        fd, tmp = tempfile.mkstemp(prefix=f"{os.getpid()}.json.", suffix=".tmp", dir=METRICS_DIR)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(_snapshot(), f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    return True
+
+
+def prune_stale():
+    """Delete the metrics (and leftover temporary) files of processes that are no longer running."""
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return
+    for name in os.listdir(METRICS_DIR):
+        pid = name.split(".", 1)[0]
+        if not pid.isdigit() or not (name.endswith(".json") or name.endswith(".tmp")) or _alive(int(pid)):
+            continue
+        try:
+            os.remove(os.path.join(METRICS_DIR, name))
+        except OSError:
+            pass  # another worker pruned it first
+
+
+def _maybe_flush():
+    if METRICS_DIR and time.monotonic() - _last_flush > FLUSH_INTERVAL:
+        flush()
+
+
+def _collect():
+    """Merge samples from every process (or just this one without a metrics dir)."""
+    if not METRICS_DIR:
+        snapshots = [_snapshot()]
+    else:
+        flush()
+        snapshots = []
+        for name in os.listdir(METRICS_DIR):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, name)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # file vanished or is mid-write
+
+    counters = {}
+    histograms = {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, h in snap["histograms"]:
+            key = (name, tuple(tuple(l) for l in labels))
+            merged = histograms.setdefault(key, [0] * len(h))
+            for i, v in enumerate(h):
+                merged[i] += v
+    return counters, histograms
+
+
+def _fmt_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def render():
+    """Return all metrics in the Prometheus text exposition format."""
+    counters, histograms = _collect()
+    lines = []
+    for name, (kind, text) in HELP.items():
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        else:
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', f'{bound:g}')])} {cumulative}")
+                cumulative += h[len(BUCKETS)]
+                lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-1]:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+if METRICS_DIR:
+    atexit.register(flush)
@@ -0,0 +1,334 @@
+"""Memory-resident season model for the web app's read endpoints.
+
+A season is a few thousand result rows, so the app loads it once with two
+queries (resolved results and events) and answers every read from memory:
+leaderboards, race results and their filter options, school and athlete
+lists, the search directory and OFSAA qualifiers. This is the only read
+path for the dashboard; the scoring itself is shared with ingest and the
+CLIs (db.rank_individuals, db.score_teams, ofsaa.ofsaa_qualifiers).
+
+Rows are grouped by category (and indexed by athlete name) and pre-sorted
+in display order at load time, and per-category race sequence maps are
+built once. A ModelStore keeps one model per database file and reloads it
+when `PRAGMA data_version` reports a write from another connection (an
+ingest) or when the tenant switches to a newly published snapshot.
+"""
+import itertools
+import threading
+from collections import OrderedDict, defaultdict
+
+from . import metrics
+from .db import current_season, get_seasons, rank_individuals, score_teams
+from .ofsaa import ofsaa_qualifiers
+from .rules import DEFAULT_RULES
+
+_STATUS_ORDER = {"DQ": 1, "DNF": 2, "DNS": 3}
+_generations = itertools.count(1)
+
+
+def _finished(rows, rules):
+    """Finished results, with points recomputed from place when `rules` changes the points tables."""
+    finished = [r for r in rows if r["status"] is None]
+    if rules.rescores:
+        finished = [{**r, "points": rules.points_for_place(r["place"], r["division"])} for r in finished]
+    return finished
+
+
+def _display_order(r):
+    # Race, finishers before DQ/DNF/DNS, then place (NULL first, as SQLite sorts it), then name
+    return (
+        r["race_number"],
+        r["status"] is not None,
+        _STATUS_ORDER.get(r["status"], 0),
+        r["place"] is not None, r["place"] or 0,
+        r["last_name"], r["first_name"],
+    )
+
+
+class SeasonModel:
+    """One season's results held in memory, grouped by category."""
+
+    def __init__(self, season, rows, events, seasons):
+        self.season = season
+        self.events = events
+        self.seasons = seasons
+        self.generation = next(_generations)
+        self.result_count = len(rows)
+
+        self._by_category = defaultdict(list)   # (g, s, d) -> rows in display order
+        self._by_sport = defaultdict(list)      # (g, s) -> rows in team scoring order
+        self._by_athlete = defaultdict(list)    # (first, last) -> rows in race order
+        for r in rows:
+            self._by_category[(r["gender"], r["sport"], r["division"])].append(r)
+            self._by_sport[(r["gender"], r["sport"])].append(r)
+            self._by_athlete[(r["first_name"], r["last_name"])].append(r)
+        for category_rows in self._by_category.values():
+            category_rows.sort(key=_display_order)
+        for sport_rows in self._by_sport.values():
+            sport_rows.sort(key=lambda r: (r["division"], r["race_number"], r["id"]))
+        for athlete_rows in self._by_athlete.values():
+            athlete_rows.sort(key=lambda r: (r["race_number"], r["id"]))
+
+        self._race_seq = {
+            key: {rn: i + 1 for i, rn in enumerate(sorted({r["race_number"] for r in category_rows}))}
+            for key, category_rows in self._by_category.items()
+        }
+        self._team_race_seq = {
+            key: {rn: i + 1 for i, rn in enumerate(sorted({r["race_number"] for r in sport_rows}))}
+            for key, sport_rows in self._by_sport.items()
+        }
+        self._event_dates = {e["id"]: e["event_date"] for e in events}
+        self._schools = list(dict.fromkeys(r["school"] for r in rows))
+        # Changes only when a gender/sport's results do, so views derived from one
+        # category can outlive an ingest into another
+        self._sport_versions = {
+            key: hash(tuple(
+                (r["id"], r["race_number"], r["first_name"], r["last_name"], r["school"], r["place"], r["points"], r["status"])
+                for r in sport_rows
+            ))
+            for key, sport_rows in self._by_sport.items()
+        }
+
+    @classmethod
+    @metrics.timed("model.load")
+    def load(cls, conn, season=None):
+        """Load a season (the current one by default) from an open connection."""
+        season = current_season(conn) if season is None else season
+        rows = conn.execute(
+            """SELECT id, event_id, race_number, gender, sport, division, first_name, last_name,
+                      school, place, time_seconds, points, status
+               FROM resolved_results WHERE season = ? ORDER BY id""",
+            (season,),
+        ).fetchall()
+        events = conn.execute("SELECT * FROM events WHERE season = ? ORDER BY id", (season,)).fetchall()
+        return cls(season, [dict(r) for r in rows], [dict(e) for e in events], get_seasons(conn))
+
+    def categories(self):
+        """Sorted (gender, sport, division) keys with results this season."""
+        return sorted(self._by_category)
+
+    def race_seq(self, gender, sport, division):
+        return self._race_seq.get((gender, sport, division), {})
+
+    def sport_version(self, gender, sport):
+        """Token that changes when the gender/sport's results change."""
+        return self._sport_versions.get((gender, sport))
+
+    def season_summary(self):
+        """{season, event_count, result_count, race_count, last_event_date} for the home page."""
+        dates = [e["event_date"] for e in self.events]
+        races = {r["race_number"] for rows in self._by_category.values() for r in rows}
+        return {
+            "season": self.season,
+            "event_count": len(self.events),
+            "result_count": self.result_count,
+            "race_count": len(races),
+            "last_event_date": max(dates) if dates else None,
+        }
+
+    def race_list(self):
+        """Races per category for the filter dropdowns: (g, s, d) -> [{seq, event_date}]."""
+        categories = {}
+        for key in sorted(self._by_category):
+            first_rows = {}
+            for r in self._by_category[key]:
+                first_rows.setdefault(r["race_number"], r)
+            categories[key] = [
+                {"seq": seq, "event_date": self._event_dates.get(first_rows[rn]["event_id"])}
+                for rn, seq in sorted(self.race_seq(*key).items())
+            ]
+        return categories
+
+    @metrics.timed("model.race_results")
+    def race_results(self, gender, sport, division, race_seq_number=None, school=None, athlete=None):
+        """A category's results in display order, filtered by race sequence number, school or athlete."""
+        race_seq = self.race_seq(gender, sport, division)
+        global_race = None
+        if race_seq_number:
+            global_race = next((rn for rn, seq in race_seq.items() if seq == race_seq_number), None)
+            if global_race is None:
+                return []
+        name = athlete.split(" ", 1) if athlete else None
+        if name is not None and len(name) != 2:
+            name = None
+
+        results = []
+        for r in self._by_category.get((gender, sport, division), ()):
+            if global_race is not None and r["race_number"] != global_race:
+                continue
+            if school and r["school"] != school:
+                continue
+            if name and (r["first_name"], r["last_name"]) != tuple(name):
+                continue
+            results.append({
+                "place": r["place"], "first_name": r["first_name"], "last_name": r["last_name"],
+                "school": r["school"], "time_seconds": r["time_seconds"], "points": r["points"],
+                "race_number": r["race_number"], "status": r["status"],
+                "race_seq": race_seq.get(r["race_number"], r["race_number"]),
+            })
+        return results
+
+    def schools(self, gender, sport, division):
+        return sorted({r["school"] for r in self._by_category.get((gender, sport, division), ())})
+
+    def athlete_directory(self):
+        """Every distinct (athlete, school, category) of the season, for the search index."""
+        seen = {}
+        for (gender, sport, division), rows in self._by_category.items():
+            for r in rows:
+                key = (r["first_name"], r["last_name"], r["school"], gender, sport, division)
+                seen.setdefault(key, None)
+        return [
+            {"first_name": f, "last_name": l, "school": school, "gender": g, "sport": s, "division": d}
+            for f, l, school, g, s, d in seen
+        ]
+
+    def athlete_names(self):
+        """(first_name, last_name) of every athlete with results this season, in order of their first result."""
+        return list(self._by_athlete)
+
+    def school_names(self):
+        """Every school with results this season, in order of its first result."""
+        return list(self._schools)
+
+    def athlete_results(self, first_name, last_name):
+        """One athlete's results in every category, in race order, like race_results() plus gender, sport, division and event_date."""
+        results = []
+        for r in self._by_athlete.get((first_name, last_name), ()):
+            results.append({
+                "gender": r["gender"], "sport": r["sport"], "division": r["division"],
+                "place": r["place"], "first_name": r["first_name"], "last_name": r["last_name"],
+                "school": r["school"], "time_seconds": r["time_seconds"], "points": r["points"],
+                "race_number": r["race_number"], "status": r["status"],
+                "race_seq": self.race_seq(r["gender"], r["sport"], r["division"])[r["race_number"]],
+                "event_date": self._event_dates.get(r["event_id"]),
+            })
+        return results
+
+    @metrics.timed("model.compact_results")
+    def compact_results(self):
+        """Every category's races and results as columns, for filtering in the browser.
+
+        Athlete names and schools are listed once and referenced by index.
+        Each category's columns are in race_results() order, with races by
+        sequence number.
+        """
+        athletes, schools = {}, {}
+        race_list = self.race_list()
+        categories = {}
+        for key in sorted(self._by_category):
+            race_seq = self.race_seq(*key)
+            columns = {name: [] for name in ("race", "place", "athlete", "school", "time", "points", "status")}
+            for r in self._by_category[key]:
+                columns["race"].append(race_seq[r["race_number"]])
+                columns["place"].append(r["place"])
+                columns["athlete"].append(athletes.setdefault((r["first_name"], r["last_name"]), len(athletes)))
+                columns["school"].append(schools.setdefault(r["school"], len(schools)))
+                columns["time"].append(r["time_seconds"])
+                columns["points"].append(r["points"])
+                columns["status"].append(r["status"])
+            categories["/".join(key)] = {"races": race_list[key], "results": columns}
+        return {
+            "season": self.season,
+            "athletes": [list(name) for name in athletes],
+            "schools": list(schools),
+            "categories": categories,
+        }
+
+    @metrics.timed("model.individual_leaderboard")
+    def individual_leaderboard(self, gender, sport, division, rules=DEFAULT_RULES):
+        rows = _finished(self._by_category.get((gender, sport, division), ()), rules)
+        rows.sort(key=lambda r: (r["last_name"], r["first_name"], -r["points"], r["race_number"]))
+        return rank_individuals(rows, self.race_seq(gender, sport, division), rules)
+
+    @metrics.timed("model.team_leaderboard")
+    def team_leaderboard(self, gender, sport, rules=DEFAULT_RULES):
+        rows = _finished(self._by_sport.get((gender, sport), ()), rules)
+        return score_teams(rows, self._team_race_seq.get((gender, sport), {}), rules)
+
+    def ofsaa_event(self, sport):
+        """The season's event flagged as the OFSAA qualifier for `sport`, or None."""
+        return next((e for e in self.events if e[f"ofsaa_{sport}"] == 1), None)
+
+    def ofsaa_race_results(self, gender, sport, division):
+        """The OFSAA event's two runs (finishers by place, then DQ/DNF/DNS), or (None, None) without one."""
+        event = self.ofsaa_event(sport)
+        if not event:
+            return None, None
+        rows = [r for r in self._by_category.get((gender, sport, division), ()) if r["event_id"] == event["id"]]
+        race_numbers = sorted({r["race_number"] for r in rows})
+        if len(race_numbers) < 2:
+            return None, None
+
+        runs = []
+        for rn in race_numbers[:2]:
+            run = sorted(
+                (r for r in rows if r["race_number"] == rn),
+                key=lambda r: (r["status"] is not None, r["place"] is not None, r["place"] or 0, r["id"]),
+            )
+            runs.append([
+                {k: r[k] for k in ("first_name", "last_name", "school", "place", "time_seconds", "status")}
+                for r in run
+            ])
+        return runs[0], runs[1]
+
+    @metrics.timed("model.ofsaa_qualifiers")
+    def ofsaa_qualifiers(self, gender, sport, division):
+        """OFSAA qualifiers: {event_date, team, individual, has_data, team_slots, individual_slots}."""
+        event = self.ofsaa_event(sport)
+        run1, run2 = self.ofsaa_race_results(gender, sport, division) if event else (None, None)
+        return ofsaa_qualifiers(sport, division, event, run1, run2)
+
+
+class ModelStore:
+    """Season models by (database file, season), reloaded when the file is written.
+
+    `connect(path)` opens a connection to a database file; one connection
+    per file is kept open to poll `PRAGMA data_version`, which changes only
+    when another connection commits. Immutable snapshots never change, so
+    their models live until the store is cleared.
+    """
+
+    def __init__(self, connect, maxsize=4):
+        self.connect = connect
+        self.maxsize = maxsize
+        self._watchers = {}  # path -> connection
+        self._entries = OrderedDict()  # (path, season) -> (data_version, model)
+        self._lock = threading.Lock()
+
+    def get(self, path, season=None):
+        """Return the model of `season` (the file's current season by default) in the file at `path`."""
+        key = (path, season)
+        with self._lock:
+            conn = self._watchers.get(path)
+            if conn is None:
+                conn = self._watchers[path] = self.connect(path)
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                metrics.cache_hit("model")
+                return entry[1]
+
+            metrics.cache_miss("model")
+            # One read transaction, so the load sees a single committed state; a
+            # commit after the version read above triggers another reload
+            conn.execute("BEGIN")
+            try:
+                model = SeasonModel.load(conn, season)
+            finally:
+                conn.rollback()
+            self._entries[key] = (version, model)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                (old_path, _), _ = self._entries.popitem(last=False)
+                if all(p != old_path for p, _ in self._entries):
+                    self._watchers.pop(old_path).close()
+            return model
+
+    def clear(self):
+        with self._lock:
+            watchers, self._watchers = self._watchers, {}
+            self._entries.clear()
+        for conn in watchers.values():
+            conn.close()
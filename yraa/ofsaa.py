@@ -1,5 +1,5 @@
 from collections import defaultdict
-from .db import get_ofsaa_race_results, get_ofsaa_event
+from . import metrics
 
 # Number of qualifying team/individual slots per sport and division
 OFSAA_SLOTS = {
@@ -8,6 +8,7 @@ OFSAA_SLOTS = {
 }
 
 
+@metrics.timed("ofsaa.calculate_ofsaa_team")
 def calculate_ofsaa_team(run1_results, run2_results):
     """Calculate OFSAA team scores from two runs.
 
@@ -70,6 +71,7 @@ def calculate_ofsaa_team(run1_results, run2_results):
     return teams
 
 
+@metrics.timed("ofsaa.calculate_ofsaa_individual")
 def calculate_ofsaa_individual(run1_results, run2_results, excluded_schools=None):
     """Calculate OFSAA individual qualifiers from two runs.
 
@@ -127,12 +129,8 @@ def calculate_ofsaa_individual(run1_results, run2_results, excluded_schools=None
     return individuals
 
 
-def get_ofsaa_qualifiers(conn, gender, sport, division):
-    """Get OFSAA qualifier results for a gender/sport/division.
-
-    Returns dict with event_date, team, individual, has_data,
-    team_slots, and individual_slots.
-    """
+def ofsaa_qualifiers(sport, division, event, run1, run2):
+    """Qualifiers from the OFSAA event row and its two runs (either may be None)."""
     slots = OFSAA_SLOTS.get(sport, {}).get(division, {"teams": 1, "individuals": 1})
     num_team_slots = slots["teams"]
     num_ind_slots = slots["individuals"]
@@ -141,11 +139,9 @@ def get_ofsaa_qualifiers(conn, gender, sport, division):
         "has_data": False, "team_slots": num_team_slots, "individual_slots": num_ind_slots,
     }
 
-    event = get_ofsaa_event(conn, sport)
     if not event:
         return empty
 
-    run1, run2 = get_ofsaa_race_results(conn, gender, sport, division)
     if run1 is None or run2 is None:
         return {**empty, "event_date": event["event_date"]}
 
@@ -0,0 +1,314 @@
+"""Monte Carlo championship projections.
+
+Simulates the rest of a gender/sport's season many times to estimate
+each athlete's and team's chance of winning the championship or finishing
+on the podium. In every simulated remaining race, each athlete:
+- starts with the probability of their attendance rate so far;
+- draws one of their own past results (a finish at some fraction of the
+  field, or a DNF/DQ/DNS);
+- is ranked against the other starters on that draw plus a little noise.
+
+Places are scored with the rules' points tables. Individual standings
+count the top-N results (rules.top_n); team standings apply the
+per-racer and per-team caps.
+
+Ties in a simulated final standing count for every tied athlete or team;
+head-to-head tiebreakers are not simulated. Simulations are split into
+chunks with their own seeds and run on a process pool, so a projection
+is reproducible for a given seed.
+
+    python3 -m yraa.projection --db data/yraa.db --category girls/ski --remaining 2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from . import metrics
+from .db import get_connection, init_db
+from .model import SeasonModel
+from .rules import DEFAULT_RULES
+from .scoring import counting_team_scores, team_ranked
+
+DEFAULT_SIMULATIONS = 10000
+MAX_SIMULATIONS = 100000
+MAX_REMAINING_RACES = 10
+# /api/projection: a fixed simulation count and a short range of remaining races
+WEB_SIMULATIONS = 2000
+WEB_MAX_REMAINING_RACES = 3
+PODIUM = 3
+# Spread of an athlete's simulated finish around a drawn past result, as a fraction of the field
+PERFORMANCE_NOISE = 0.05
+# Below this many simulations per worker the pool costs more than it saves
+MIN_CHUNK = 1000
+WORKERS = int(os.environ.get("YRAA_PROJECTION_WORKERS", "0")) or os.cpu_count() or 1
+
+_executor = None
+
+
+def prepare(model, gender, sport, rules=DEFAULT_RULES):
+    """Reduce a gender/sport's season to the picklable inputs of a simulation.
+
+    Returns {"divisions": {division: {"races", "athletes"}}, "rules": rules},
+    where each athlete is (first_name, last_name, school, points, draws):
+    points are the athlete's scored results so far, draws their past
+    starts as fractions of the field (None for DNF/DQ/DNS). Attendance is
+    len(draws) / races.
+    """
+    divisions = {}
+    for division in ("hs", "open"):
+        rows = model.race_results(gender, sport, division)
+        if not rows:
+            continue
+        finishers = defaultdict(int)
+        for r in rows:
+            if r["status"] is None and r["place"]:
+                finishers[r["race_seq"]] += 1
+        races = len({r["race_seq"] for r in rows})
+
+        athletes = {}
+        for r in rows:
+            a = athletes.setdefault((r["first_name"], r["last_name"]), {"school": r["school"], "points": [], "draws": []})
+            if r["status"] is None and r["place"]:
+                points = rules.points_for_place(r["place"], division) if rules.rescores else r["points"]
+                a["points"].append(points)
+                a["draws"].append(r["place"] / finishers[r["race_seq"]])
+            else:
+                a["draws"].append(None)
+        divisions[division] = {
+            "races": races,
+            "athletes": [
+                (first, last, a["school"], tuple(a["points"]), tuple(a["draws"]))
+                for (first, last), a in athletes.items()
+            ],
+        }
+    return {"divisions": divisions, "rules": rules}
+
+
+def _podium_cutoffs(totals):
+    """(winning total, podium cutoff) for a list of totals; ties share a place."""
+    ranked = sorted((t for t in totals if t > 0), reverse=True)
+    if not ranked:
+        return None, None
+    return ranked[0], ranked[min(PODIUM, len(ranked)) - 1]
+
+
+def simulate(data, remaining, simulations, seed):
+    """Run `simulations` seasons. Returns win/podium counts keyed by athlete index and school."""
+    rules = data["rules"]
+    rng = random.Random(seed)
+    rand = rng.random
+    divisions = data["divisions"]
+    counts = {
+        "individual": {d: [[0, 0] for _ in div["athletes"]] for d, div in divisions.items()},
+        "team": defaultdict(lambda: [0, 0]),
+    }
+
+    # Everything that does not depend on the simulated races is computed once
+    static = {}
+    groups = {}  # (school, athlete name) -> group index; team scoring caps an athlete across divisions
+    group_of = {}  # (division, athlete index) -> group index
+    group_points = []
+    group_school = []
+    for division, div in divisions.items():
+        athletes = div["athletes"]
+        top_n = rules.top_n(div["races"] + remaining)
+        table = rules.open_points if division == "open" else rules.hs_points
+        static[division] = {
+            "table": table,
+            "scoring_places": max(table, default=0),
+            # One uniform draw picks a past start (a finish fraction or None) or, past the end, no start
+            "starts": [(draws, div["races"]) for *_, draws in athletes],
+            "totals": [sum(sorted(a[3], reverse=True)[:top_n]) for a in athletes],
+            "top_n": top_n,
+        }
+        for i, (first, last, school, points, _) in enumerate(athletes):
+            g = groups.setdefault((school, f"{first} {last}"), len(groups))
+            if g == len(group_points):
+                group_points.append([])
+                group_school.append(school)
+            group_points[g].extend(points)
+            group_of[(division, i)] = g
+
+    # Team totals use the same caps and exclusions as the real standings (scoring.counting_team_scores)
+    school_groups = defaultdict(list)
+    for g, school in enumerate(group_school):
+        if team_ranked(school):
+            school_groups[school].append(g)
+    school_totals = {
+        school: sum(counting_team_scores((group_points[g] for g in gs), rules))
+        for school, gs in school_groups.items()
+    }
+    # An athlete's capped scores; capping again gives the same counting scores
+    group_top = [sorted(points, reverse=True)[:rules.max_scores_per_racer] for points in group_points]
+
+    for _ in range(simulations):
+        new_by_group = defaultdict(list)
+        for division, div in divisions.items():
+            st = static[division]
+            table = st["table"]
+            new = {}
+            for _race in range(remaining):
+                field = []
+                for i, (draws, races) in enumerate(st["starts"]):
+                    pick = int(rand() * races)
+                    if pick < len(draws) and draws[pick] is not None:
+                        field.append((draws[pick] + (rand() - 0.5) * 2 * PERFORMANCE_NOISE, i))
+                field.sort()
+                for place, (_, i) in enumerate(field[:st["scoring_places"]], 1):
+                    points = table.get(place, 0)
+                    if points:
+                        new.setdefault(i, []).append(points)
+
+            totals = list(st["totals"])
+            athletes = div["athletes"]
+            for i, points in new.items():
+                totals[i] = sum(sorted(athletes[i][3] + tuple(points), reverse=True)[:st["top_n"]])
+                new_by_group[group_of[(division, i)]].extend(points)
+            best, cutoff = _podium_cutoffs(totals)
+            tally = counts["individual"][division]
+            for i, total in enumerate(totals):
+                if total > 0 and total >= cutoff:
+                    tally[i][1] += 1
+                    if total == best:
+                        tally[i][0] += 1
+
+        # Only schools with new points need their team total recomputed
+        team_totals = dict(school_totals)
+        for school in {group_school[g] for g in new_by_group} & team_totals.keys():
+            team_totals[school] = sum(counting_team_scores(
+                (group_top[g] + new_by_group[g] if g in new_by_group else group_top[g] for g in school_groups[school]),
+                rules,
+            ))
+        best, cutoff = _podium_cutoffs(team_totals.values())
+        for school, total in team_totals.items():
+            if total > 0 and total >= cutoff:
+                counts["team"][school][1] += 1
+                if total == best:
+                    counts["team"][school][0] += 1
+
+    counts["team"] = dict(counts["team"])
+    return counts
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        # spawn: the web app's worker threads make fork unsafe
+        _executor = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+@metrics.timed("projection.project")
+def project(model, gender, sport, remaining=1, simulations=DEFAULT_SIMULATIONS, seed=0, rules=DEFAULT_RULES):
+    """Project the championship for a gender/sport with `remaining` races left.
+
+    Returns {"remaining_races", "simulations", "individual": {division: [...]},
+    "team": [...]}, entries sorted by win then podium probability.
+    """
+    data = prepare(model, gender, sport, rules)
+    chunks = max(1, min(WORKERS, simulations // MIN_CHUNK))
+    sizes = [simulations // chunks + (1 if i < simulations % chunks else 0) for i in range(chunks)]
+    if chunks == 1:
+        results = [simulate(data, remaining, simulations, seed)]
+    else:
+        futures = [_pool().submit(simulate, data, remaining, n, seed + i) for i, n in enumerate(sizes)]
+        results = [f.result() for f in futures]
+
+    individual = {}
+    for division, div in data["divisions"].items():
+        totals = [[0, 0] for _ in div["athletes"]]
+        for result in results:
+            for i, (win, podium) in enumerate(result["individual"][division]):
+                totals[i][0] += win
+                totals[i][1] += podium
+        current = {(a["first_name"], a["last_name"]): a for a in model.individual_leaderboard(gender, sport, division, rules)}
+        entries = []
+        for (first, last, school, *_), (win, podium) in zip(div["athletes"], totals):
+            standing = current.get((first, last))
+            entries.append({
+                "first_name": first,
+                "last_name": last,
+                "school": school,
+                "rank": standing["rank"] if standing else None,
+                "total_points": standing["total_points"] if standing else 0,
+                "win": win / simulations,
+                "podium": podium / simulations,
+            })
+        individual[division] = _sorted(entries)
+
+    team_totals = defaultdict(lambda: [0, 0])
+    for result in results:
+        for school, (win, podium) in result["team"].items():
+            team_totals[school][0] += win
+            team_totals[school][1] += podium
+    teams = []
+    for t in model.team_leaderboard(gender, sport, rules):
+        win, podium = team_totals.get(t.school, (0, 0))
+        teams.append({
+            "school": t.school,
+            "rank": t.rank or None,
+            "total_points": t.total_points,
+            "win": win / simulations,
+            "podium": podium / simulations,
+        })
+
+    return {
+        "remaining_races": remaining,
+        "simulations": simulations,
+        "individual": individual,
+        "team": _sorted(teams),
+    }
+
+
+def _sorted(entries):
+    return sorted(entries, key=lambda e: (-e["win"], -e["podium"], e["rank"] or float("inf")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo championship projection for the rest of the season")
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    parser.add_argument("--category", required=True, metavar="GENDER/SPORT", help="e.g. girls/ski")
+    parser.add_argument("--remaining", type=int, default=1, help="Races left in the season (default: 1)")
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS,
+                        help=f"Seasons to simulate (default: {DEFAULT_SIMULATIONS})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--top", type=int, default=10, help="Entries to print per standing (default: 10)")
+    args = parser.parse_args()
+
+    gender, _, sport = args.category.partition("/")
+    if not 1 <= args.remaining <= MAX_REMAINING_RACES:
+        parser.error(f"--remaining must be between 1 and {MAX_REMAINING_RACES}")
+
+    init_db(args.db).close()
+    conn = get_connection(args.db)
+    model = SeasonModel.load(conn)
+    conn.close()
+    if not model.race_seq(gender, sport, "hs") and not model.race_seq(gender, sport, "open"):
+        print(f"No results for {args.category} in season {model.season}.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    result = project(model, gender, sport, args.remaining, args.simulations, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{gender.title()} {sport.title()}, season {model.season}: {args.simulations} simulations of "
+          f"{args.remaining} remaining race(s) in {elapsed:.1f}s ({WORKERS} worker(s) max)\n")
+    sections = [(f"{division.upper() if division == 'hs' else division.title()} individual", entries)
+                for division, entries in result["individual"].items()]
+    sections.append(("Team", result["team"]))
+    for title, entries in sections:
+        print(f"{title}:")
+        print(f"  {'rank':>4}  {'pts':>5}  {'win':>6}  {'podium':>6}  name")
+        for e in entries[:args.top]:
+            name = e["school"] if "first_name" not in e else f"{e['last_name'].upper()}, {e['first_name']} ({e['school']})"
+            rank = e["rank"] if e["rank"] is not None else "-"
+            print(f"  {rank:>4}  {e['total_points']:>5g}  {e['win']:>6.1%}  {e['podium']:>6.1%}  {name}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Prerender the dashboard to static files after ingest.
+
+Writes every category page (HS/Open/Team), the OFSAA pages, the home page,
+and the JSON API / CSV export views into an output directory, each with a
+precompressed .gz (and .br when the `brotli` package is installed) variant.
+A manifest records a fingerprint of the data behind each group of pages
+and the files it wrote, so a re-publish only re-renders categories whose
+results changed and deletes the pages a group no longer has (an athlete
+merged away by an alias, a school that left the league).
+
+Layout (URL path -> file):
+    /                               index.html
+    /girls/ski, /girls/ski/hs       girls/ski/index.html, girls/ski/hs/index.html
+    /detail/girls/ski/hs/{slug}.html   detail/girls/ski/hs/{slug}.html (dialog fragments)
+    /ofsaa, /ofsaa/team             ofsaa/index.html, ofsaa/team/index.html
+    /athlete/{id}                   athlete/{id}/index.html
+    /api/athlete/{id}               api/athlete/{id}.json
+    /school/{id}                    school/{id}/index.html
+    /api/school/{id}                api/school/{id}.json
+    /api/team/girls/ski             api/team/girls/ski.json
+    /export/girls/ski/hs            export/girls/ski/hs.csv
+    /export/ofsaa/team              export/ofsaa/team.csv
+
+/races and /export/races depend on query-string filters and are still
+served by the app.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written without it
+    brotli = None
+
+from .db import get_connection, get_data_fingerprint
+from .model import SeasonModel
+from .web import (
+    CATEGORIES, VALID_TABS, templates, home_context, category_context, ofsaa_context,
+    detail_fragment, athlete_ids, athlete_profile, school_slices,
+    team_csv, individual_csv, ofsaa_csv, team_api_data, individual_api_data,
+)
+
+DEFAULT_DB = "data/yraa.db"
+DEFAULT_OUT = "data/site"
+MANIFEST = ".manifest.json"
+OFSAA_TABS = ("hs", "open", "team")
+
+
+def _render(name, context):
+    return templates.get_template(name).render(**context)
+
+
+def _templates_fingerprint():
+    """Hash of all template sources, so template edits force a full re-render."""
+    h = hashlib.sha1()
+    template_dir = os.path.join(os.path.dirname(__file__), "templates")
+    for name in sorted(os.listdir(template_dir)):
+        with open(os.path.join(template_dir, name), "rb") as f:
+            h.update(name.encode())
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _home_files(model):
+    return {"index.html": _render("home.html", home_context(model))}
+
+
+def _category_files(model, gender, sport):
+    files = {}
+    for tab in VALID_TABS:
+        context = category_context(model, gender, sport, tab)
+        html = _render("category.html", context)
+        files[f"{gender}/{sport}/{tab}/index.html"] = html
+        if tab == "hs":
+            files[f"{gender}/{sport}/index.html"] = html  # /{gender}/{sport} redirects to hs
+        # Dialog fragments loaded on demand by showDetail()
+        if tab == "team":
+            slugs = [context["school_slugs"][t.school] for t in context["teams"]]
+        else:
+            slugs = [context["athlete_slugs"][(a["first_name"], a["last_name"])] for a in context["athletes"]]
+        for slug in slugs:
+            fragment = detail_fragment(model, gender, sport, tab, slug)
+            if fragment is not None:
+                files[f"detail/{gender}/{sport}/{tab}/{slug}.html"] = fragment
+        if tab == "team":
+            files[f"export/{gender}/{sport}/team.csv"] = team_csv(model, gender, sport)[1]
+            files[f"api/team/{gender}/{sport}.json"] = json.dumps(team_api_data(model, gender, sport))
+        else:
+            files[f"export/{gender}/{sport}/{tab}.csv"] = individual_csv(model, gender, sport, tab)[1]
+            files[f"api/individual/{gender}/{sport}/{tab}.json"] = json.dumps(
+                individual_api_data(model, gender, sport, tab)
+            )
+    return files
+
+
+def _athlete_files(model):
+    files = {}
+    for athlete_id in athlete_ids(model):
+        profile = athlete_profile(model, athlete_id)
+        files[f"athlete/{athlete_id}/index.html"] = _render("athlete.html", {"athlete": profile})
+        files[f"api/athlete/{athlete_id}.json"] = json.dumps(profile)
+    return files
+
+
+def _school_files(model):
+    files = {}
+    for school_id, school in school_slices(model).items():
+        files[f"school/{school_id}/index.html"] = _render("school.html", {"school": school})
+        files[f"api/school/{school_id}.json"] = json.dumps(school)
+    return files
+
+
+def _ofsaa_files(model):
+    files = {}
+    for tab in OFSAA_TABS:
+        html = _render("ofsaa.html", ofsaa_context(model, tab))
+        files[f"ofsaa/{tab}/index.html"] = html
+        if tab == "hs":
+            files["ofsaa/index.html"] = html
+        files[f"export/ofsaa/{tab}.csv"] = ofsaa_csv(model, tab)[1]
+    return files
+
+
+def _write(out_dir, rel_path, text):
+    """Write a file plus precompressed variants, each via an atomic rename."""
+    path = os.path.join(out_dir, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = text.encode("utf-8")
+    variants = [(path, data), (path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((path + ".br", brotli.compress(data)))
+    for target, payload in variants:
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, target)
+
+
+def _remove(out_dir, rel_path):
+    """Delete a file and its precompressed variants, if present, and any directories that leaves empty."""
+    path = os.path.join(out_dir, rel_path)
+    for target in (path, path + ".gz", path + ".br"):
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            pass
+    parent = os.path.dirname(rel_path)
+    while parent:
+        try:
+            os.rmdir(os.path.join(out_dir, parent))
+        except OSError:
+            break  # not empty
+        parent = os.path.dirname(parent)
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def publish_site(db_path, out_dir, force=False):
+    """Render changed page groups into out_dir. Returns (rendered, unchanged) group counts."""
+    conn = get_connection(db_path)
+    manifest = _load_manifest(out_dir)
+    template_fp = _templates_fingerprint()
+
+    all_fp = get_data_fingerprint(conn)
+    groups = [
+        ("home", all_fp, _home_files),
+        ("ofsaa", all_fp, _ofsaa_files),
+        ("athletes", all_fp, _athlete_files),
+        ("schools", all_fp, _school_files),
+    ]
+    for cat in CATEGORIES:
+        g, s = cat["gender"], cat["sport"]
+        groups.append((
+            f"category/{g}/{s}",
+            get_data_fingerprint(conn, g, s),
+            lambda m, g=g, s=s: _category_files(m, g, s),
+        ))
+
+    model = SeasonModel.load(conn)
+    rendered = 0
+    unchanged = 0
+    for key, data_fp, build in groups:
+        fingerprint = hashlib.sha1(f"{template_fp}:{data_fp}".encode()).hexdigest()
+        # Entries are {"fingerprint", "files"}; a bare fingerprint (older manifests) just forces a re-render
+        previous = manifest.get(key) if isinstance(manifest.get(key), dict) else {}
+        if not force and previous.get("fingerprint") == fingerprint:
+            unchanged += 1
+            continue
+        files = build(model)
+        for rel_path, text in files.items():
+            _write(out_dir, rel_path, text)
+        for rel_path in set(previous.get("files", ())) - set(files):
+            _remove(out_dir, rel_path)
+        manifest[key] = {"fingerprint": fingerprint, "files": sorted(files)}
+        rendered += 1
+
+    conn.close()
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = os.path.join(out_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return rendered, unchanged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerender the YRAA dashboard to static files")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Database path (default: {DEFAULT_DB})")
+    parser.add_argument("--out", default=DEFAULT_OUT, help=f"Output directory (default: {DEFAULT_OUT})")
+    parser.add_argument("--force", action="store_true", help="Re-render every page even if unchanged")
+    args = parser.parse_args()
+
+    rendered, unchanged = publish_site(args.db, args.out, force=args.force)
+    print(f"Published to {args.out}: {rendered} page group(s) rendered, {unchanged} unchanged.")
+    if brotli is None:
+        print("(brotli not installed: wrote gzip variants only)")
+
+
+if __name__ == "__main__":
+    main()
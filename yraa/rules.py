@@ -0,0 +1,56 @@
+"""Championship scoring rules as data.
+
+The production rules (points.py tables, 12 team scores with at most 4 per
+racer, an athlete's top 3 results rising to top 4 once a category has 6
+races) are DEFAULT_RULES. Alternative rule sets for what-if rescoring (see
+whatif.py) are built with Rules.from_dict(), e.g. from a JSON file:
+
+    {"name": "top-5", "individual_top_n_late": 5, "max_team_scores": 10}
+"""
+from dataclasses import dataclass, field, fields
+
+from .points import HS_POINTS, OPEN_POINTS
+
+
+@dataclass
+class Rules:
+    name: str = "current"
+    hs_points: dict = field(default_factory=lambda: dict(HS_POINTS))
+    open_points: dict = field(default_factory=lambda: dict(OPEN_POINTS))
+    # Team scoring (Regulation 4.d.ii)
+    max_team_scores: int = 12
+    max_scores_per_racer: int = 4
+    # Individual scoring: best `individual_top_n` results, or
+    # `individual_top_n_late` once the category has `late_season_races` races
+    individual_top_n: int = 3
+    individual_top_n_late: int = 4
+    late_season_races: int = 6
+
+    def points_for_place(self, place, division):
+        table = self.open_points if division == "open" else self.hs_points
+        return table.get(place, 0)
+
+    def top_n(self, race_count):
+        """Number of results counted per athlete after `race_count` races in a category."""
+        return self.individual_top_n_late if race_count >= self.late_season_races else self.individual_top_n
+
+    @property
+    def rescores(self):
+        """True if these points tables differ from the ones stored results were scored with."""
+        return self.hs_points != HS_POINTS or self.open_points != OPEN_POINTS
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build rules from a dict of overrides; points table keys may be strings (JSON)."""
+        known = {f.name for f in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"unknown rule(s): {', '.join(sorted(unknown))}")
+        values = dict(data)
+        for table in ("hs_points", "open_points"):
+            if table in values:
+                values[table] = {int(place): points for place, points in values[table].items()}
+        return cls(**values)
+
+
+DEFAULT_RULES = Rules()
@@ -1,14 +1,63 @@
+import heapq
 from collections import defaultdict
-from typing import List, Dict
+from typing import Dict, Iterable, List
+from . import metrics
 from .models import RaceResult, TeamScore, ContributingScore
+from .rules import DEFAULT_RULES, Rules
 
-MAX_TEAM_SCORES = 12
-MAX_SCORES_PER_RACER = 4
+MAX_TEAM_SCORES = DEFAULT_RULES.max_team_scores
+MAX_SCORES_PER_RACER = DEFAULT_RULES.max_scores_per_racer
 
 
-def calculate_team_scores(results: List[RaceResult]) -> List[TeamScore]:
+def best_results(results: Iterable[RaceResult], rules: Rules = DEFAULT_RULES) -> List[RaceResult]:
+    """
+    Keep each athlete's best `rules.max_scores_per_racer` results from a stream.
+
+    Only these can count for a team, so calculate_team_scores() gives the
+    same standings from them, and memory grows with athletes, not results.
+    """
+    best: Dict[tuple, list] = defaultdict(list)
+    for i, r in enumerate(results):
+        # Among equal scores the earliest is kept, as in calculate_team_scores' stable sort
+        heap = best[(r.school, r.athlete_name)]
+        entry = (r.score, -i, r)
+        if len(heap) < rules.max_scores_per_racer:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    # Athletes in order of first appearance (which keeps schools in theirs), each in input order
+    return [r for heap in best.values() for _, _, r in sorted(heap, key=lambda e: -e[1])]
+
+
+def team_ranked(school: str) -> bool:
+    """False for schools excluded from the team ranking (Bill Crothers, per Section 7)."""
+    return not school.startswith("Bill Crothers")
+
+
+def counting_team_scores(scores_by_athlete: Iterable[list], rules: Rules = DEFAULT_RULES, key=None) -> list:
+    """
+    A school's counting scores from each athlete's scores (Regulation 4.d.ii).
+
+    Athletes with only zero scores are dropped, each athlete's best
+    `rules.max_scores_per_racer` are eligible, and the best
+    `rules.max_team_scores` of those count. `key` gives an item's score
+    (default: the item itself); equal scores keep their input order.
+    """
+    eligible = []
+    for scores in scores_by_athlete:
+        best = sorted(scores, key=key, reverse=True)[:rules.max_scores_per_racer]
+        if best and (key(best[0]) if key else best[0]) != 0:
+            eligible.extend(best)
+    eligible.sort(key=key, reverse=True)
+    return eligible[:rules.max_team_scores]
+
+
+@metrics.timed("scoring.calculate_team_scores")
+def calculate_team_scores(results: List[RaceResult], rules: Rules = DEFAULT_RULES) -> List[TeamScore]:
     """
     Implements YRAA team scoring rules (Regulation 4.d.ii).
+
+    The score caps come from `rules` (see rules.py).
     """
 
     # Group results by school
@@ -25,26 +74,10 @@ def calculate_team_scores(results: List[RaceResult]) -> List[TeamScore]:
         for r in school_results:
             results_by_athlete[r.athlete_name].append(r)
 
-        eligible_scores = []
-
-        for athlete, results in results_by_athlete.items():
-
-            # Remove athletes with only zero scores
-            if max(r.score for r in results) == 0:
-                continue
-
-            sorted_results = sorted(results, key=lambda r: r.score, reverse=True)
-
-            # Cap at 4 per racer
-            for r in sorted_results[:MAX_SCORES_PER_RACER]:
-                eligible_scores.append(
-                    ContributingScore(score=r.score, athlete_name=athlete, race_number=r.race_number, division=r.division)
-                )
-
-        # Sort all eligible scores
-        eligible_scores.sort(key=lambda s: s.score, reverse=True)
-
-        top_scores = eligible_scores[:MAX_TEAM_SCORES]
+        top_scores = [
+            ContributingScore(score=r.score, athlete_name=r.athlete_name, race_number=r.race_number, division=r.division)
+            for r in counting_team_scores(results_by_athlete.values(), rules, key=lambda r: r.score)
+        ]
         total = sum(s.score for s in top_scores)
 
         team_scores.append(
@@ -65,7 +98,7 @@ def calculate_team_scores(results: List[RaceResult]) -> List[TeamScore]:
     prev_points = None
     prev_rank = 0
     for t in team_scores:
-        if t.school.startswith("Bill Crothers"):
+        if not team_ranked(t.school):
             t.rank = 0  # excluded
             continue
         pos += 1
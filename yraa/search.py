@@ -0,0 +1,121 @@
+"""In-memory typeahead index over athlete names and schools.
+
+Built once per data version from the athlete directory (the web app builds
+it from its season model and keeps it in the view cache, so it is rebuilt
+lazily after each ingest). Every searchable token -- first name, last
+name, "first last", "last first" and each school word -- is kept in one
+sorted list, so a prefix lookup is a bisect plus a short scan. Queries
+with no prefix hits fall back to fuzzy matching (difflib) on names, but
+only against the FUZZY_CANDIDATES names sharing the most trigrams with
+the query, so a typo costs about as much as a prefix lookup however large
+the season.
+"""
+import difflib
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+DEFAULT_LIMIT = 20
+FUZZY_CANDIDATES = 50
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation: "O'Brien (Sasha)" -> "obrien sasha"."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9 ]+", "", text.lower())
+    return " ".join(text.split())
+
+
+def trigrams(text):
+    """Three-letter substrings of a normalized name, padded so short names and word starts count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    def __init__(self, directory):
+        # One entry per athlete per category; schools are matched through their words too
+        self.entries = directory
+        self.schools = sorted({e["school"] for e in directory})
+        keys = []
+        names = set()
+        for i, e in enumerate(directory):
+            first = normalize(e["first_name"])
+            last = normalize(e["last_name"])
+            for key in {first, last, f"{first} {last}", f"{last} {first}"}:
+                if key:
+                    keys.append((key, i))
+                    names.add(key)
+            for word in normalize(e["school"]).split():
+                keys.append((word, i))
+        keys.sort()
+        self._keys = [k for k, _ in keys]
+        self._ids = [i for _, i in keys]
+        # Fuzzy matching compares the query with name keys found through their shared trigrams
+        self._names = sorted(names)
+        self._by_trigram = defaultdict(list)
+        for n, name in enumerate(self._names):
+            for t in trigrams(name):
+                self._by_trigram[t].append(n)
+
+    def _prefix_ids(self, prefix):
+        ids = set()
+        pos = bisect_left(self._keys, prefix)
+        while pos < len(self._keys) and self._keys[pos].startswith(prefix):
+            ids.add(self._ids[pos])
+            pos += 1
+        return ids
+
+    def _fuzzy_candidates(self, query):
+        shared = Counter()
+        for t in trigrams(query):
+            shared.update(self._by_trigram.get(t, ()))
+        return [self._names[n] for n, _ in shared.most_common(FUZZY_CANDIDATES)]
+
+    def search(self, query, gender=None, sport=None, division=None, school=None, limit=DEFAULT_LIMIT):
+        """Return up to `limit` athletes matching every word of the query as a prefix."""
+        q = normalize(query or "")
+        if not q:
+            return []
+
+        words = q.split()
+        # Whole query first (matches "first last" keys), then intersect per word
+        ids = self._prefix_ids(q)
+        if len(words) > 1:
+            per_word = [self._prefix_ids(w) for w in words]
+            ids |= set.intersection(*per_word)
+        if not ids:
+            close = difflib.get_close_matches(q, self._fuzzy_candidates(q), n=limit, cutoff=0.75)
+            ids = set().union(*(self._prefix_ids(name) for name in close)) if close else set()
+
+        matches = []
+        seen = set()
+        for i in ids:
+            e = self.entries[i]
+            if gender and e["gender"] != gender:
+                continue
+            if sport and e["sport"] != sport:
+                continue
+            if division and e["division"] != division:
+                continue
+            if school and e["school"] != school:
+                continue
+            key = (e["first_name"], e["last_name"], e["gender"], e["sport"], e["division"])
+            if key in seen:
+                continue
+            seen.add(key)
+            matches.append(e)
+
+        matches.sort(key=lambda e: (e["last_name"].lower(), e["first_name"].lower(), e["school"]))
+        return [
+            {
+                "value": f"{e['first_name']} {e['last_name']}",
+                "label": f"{e['last_name'].upper()}, {e['first_name']}",
+                "school": e["school"],
+                "gender": e["gender"],
+                "sport": e["sport"],
+                "division": e["division"],
+            }
+            for e in matches[:limit]
+        ]
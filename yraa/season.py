@@ -0,0 +1,112 @@
+"""Archive past seasons into their own database files.
+
+Every query is scoped to a season, but old rows still make the main
+database larger. Archiving copies one season's events, results and analytics
+(see analytics.py) into a per-season file next to the main DB (data/yraa-2025.db) through an
+ATTACHed connection, deletes them from the main DB and records the file
+in the seasons table and the change log. History views under /season/{year}/... open the
+archive file directly.
+
+    python3 -m yraa.season list --db data/yraa.db
+    python3 -m yraa.season archive --db data/yraa.db --season 2025
+"""
+import argparse
+import os
+import sys
+
+from .db import init_db, current_season, get_seasons, record_change
+from .snapshot import refresh_snapshot
+
+ARCHIVED_TABLES = ("events", "race_results", "result_stats", "race_stats", "race_school_stats", "athlete_stats")
+
+
+def default_archive_path(db_path, season):
+    stem, ext = os.path.splitext(db_path)
+    return f"{stem}-{season}{ext or '.db'}"
+
+
+def _columns(conn, schema, table):
+    return [r["name"] for r in conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def archive_season(db_path, season, archive_path=None, vacuum=True):
+    """Move `season` out of db_path into its own database file.
+
+    Returns (archive_path, result_count). Raises ValueError for the current
+    season, an already-archived season or a non-empty archive file.
+    """
+    archive_path = archive_path or default_archive_path(db_path, season)
+    conn = init_db(db_path)
+    try:
+        if season == current_season(conn):
+            raise ValueError(f"season {season} is the current season")
+        if any(s["season"] == season and s["archive_path"] for s in get_seasons(conn)):
+            raise ValueError(f"season {season} is already archived")
+
+        init_db(archive_path).close()
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        if conn.execute("SELECT COUNT(*) FROM archive.race_results").fetchone()[0]:
+            raise ValueError(f"{archive_path} already contains results")
+
+        with conn:
+            for table in ARCHIVED_TABLES:
+                # Explicit column lists: migrated DBs may order columns differently
+                cols = ", ".join(c for c in _columns(conn, "archive", table) if c in _columns(conn, "main", table))
+                conn.execute(
+                    f"INSERT INTO archive.{table} ({cols}) SELECT {cols} FROM main.{table} WHERE season = ?",
+                    (season,),
+                )
+            conn.execute("INSERT OR IGNORE INTO archive.athlete_aliases SELECT * FROM main.athlete_aliases")
+            conn.execute(
+                """INSERT OR IGNORE INTO archive.ingested_files
+                   SELECT * FROM main.ingested_files
+                   WHERE race_number IN (SELECT race_number FROM main.race_results WHERE season = ?)""",
+                (season,),
+            )
+            count = conn.execute("SELECT COUNT(*) FROM main.race_results WHERE season = ?", (season,)).fetchone()[0]
+            for table in ARCHIVED_TABLES:
+                conn.execute(f"DELETE FROM main.{table} WHERE season = ?", (season,))
+            rel_path = os.path.relpath(os.path.abspath(archive_path), os.path.dirname(os.path.abspath(db_path)))
+            conn.execute("INSERT INTO main.seasons (season, archive_path) VALUES (?, ?)", (season, rel_path))
+            # One entry stands for all the season's rows: mirrors drop them instead of syncing per-row deletes
+            record_change(conn, "season", "archive", {"season": season, "archive_path": rel_path, "results": count}, season)
+        conn.execute("DETACH DATABASE archive")
+        if vacuum:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return archive_path, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List seasons and archive past ones into per-season DB files")
+    parser.add_argument("command", choices=("list", "archive"))
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    parser.add_argument("--season", type=int, help="Season to archive, named by its ending year (e.g. 2025 for 2024–25)")
+    parser.add_argument("--out", help="Archive file (default: <db>-<season>.db next to the database)")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip compacting the main database afterwards")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        conn = init_db(args.db)
+        current = current_season(conn)
+        for s in get_seasons(conn):
+            where = s["archive_path"] or "main database"
+            tag = " (current)" if s["season"] == current else ""
+            print(f"  {s['season']}{tag}: {where}")
+        conn.close()
+        return
+
+    if args.season is None:
+        parser.error("archive requires --season")
+    try:
+        path, count = archive_season(args.db, args.season, args.out, vacuum=not args.no_vacuum)
+    except ValueError as e:
+        print(f"Cannot archive: {e}")
+        sys.exit(1)
+    refresh_snapshot(args.db)
+    print(f"Archived season {args.season} ({count} results) to {path}")
+
+
+if __name__ == "__main__":
+    main()
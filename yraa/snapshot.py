@@ -0,0 +1,113 @@
+"""Immutable read snapshots of the database for the web app.
+
+Writers (ingest, alias and season tools) work on data/yraa.db. After a
+write they publish a compacted copy with VACUUM INTO under
+data/snapshots/, then atomically replace the pointer file
+data/yraa.db.snapshot with the new snapshot's name. Web workers read the
+snapshot named by the pointer with immutable=1 (no locks, no journal
+checks, memory-mapped), so a long ingest never blocks page loads. The
+pointer is checked on each request, so a new snapshot is picked up
+without a restart. The source is migrated before it is copied, and
+readers ignore a snapshot whose schema is older than this code's (one
+published by an older version), reading the database itself instead.
+
+    python3 -m yraa.snapshot --db data/yraa.db
+"""
+import argparse
+import os
+import re
+import sqlite3
+from datetime import datetime
+from .db import SCHEMA_VERSION, get_readonly_connection, init_db
+
+SNAPSHOT_DIR = "snapshots"
+KEEP_SNAPSHOTS = 3
+
+
+def pointer_path(db_path):
+    return db_path + ".snapshot"
+
+
+def current_snapshot(db_path):
+    """Return the path of the published snapshot for db_path, or None if there is no usable one."""
+    try:
+        with open(pointer_path(db_path)) as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(os.path.dirname(os.path.abspath(db_path)), name)
+    if not name or not os.path.exists(path):
+        return None
+    return path if schema_version(path) >= SCHEMA_VERSION else None
+
+
+def schema_version(path):
+    """The migration count (PRAGMA user_version) recorded in the database file at path."""
+    conn = get_readonly_connection(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def publish_snapshot(db_path, keep=KEEP_SNAPSHOTS):
+    """Write a compacted snapshot of db_path and point readers at it. Returns its path."""
+    base_dir = os.path.dirname(os.path.abspath(db_path))
+    snap_dir = os.path.join(base_dir, SNAPSHOT_DIR)
+    os.makedirs(snap_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    path = os.path.join(snap_dir, f"{stem}-{stamp}.db")
+
+    conn = init_db(db_path)  # snapshots carry the current schema, so readers never see an old one
+    try:
+        conn.execute("VACUUM INTO ?", (path,))
+    except sqlite3.OperationalError:
+        # SQLite < 3.27: fall back to the online backup API
+        dest = sqlite3.connect(path)
+        conn.backup(dest)
+        dest.close()
+    finally:
+        conn.close()
+
+    # Atomic pointer swap: readers see either the old or the new name
+    tmp = pointer_path(db_path) + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(os.path.relpath(path, base_dir) + "\n")
+    os.replace(tmp, pointer_path(db_path))
+
+    _prune(snap_dir, stem, path, keep)
+    return path
+
+
+def refresh_snapshot(db_path):
+    """Re-publish after a write, if snapshots are in use for db_path. Returns the new path or None."""
+    if os.path.exists(pointer_path(db_path)):
+        return publish_snapshot(db_path)
+    return None
+
+
+def _prune(snap_dir, stem, current, keep):
+    # Older snapshots may still be open in workers; unlinking keeps their data readable on POSIX.
+    # Match the timestamp exactly, so snapshots of yraa-coss.db (yraa-coss-<timestamp>.db) are left alone
+    pattern = re.compile(rf"{re.escape(stem)}-\d{{8}}T\d+\.db")
+    snapshots = sorted(f for f in os.listdir(snap_dir) if pattern.fullmatch(f))
+    for name in snapshots[:-keep] if keep else snapshots:
+        path = os.path.join(snap_dir, name)
+        if path != current:
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish an immutable read snapshot of the database")
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS,
+                        help=f"Snapshots to keep on disk (default: {KEEP_SNAPSHOTS})")
+    args = parser.parse_args()
+
+    path = publish_snapshot(args.db, keep=args.keep)
+    print(f"Published snapshot {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Synthetic season generator for scale testing.
+
+Writes raw race CSVs in exactly the format parse_race_csv() reads
+(title row, header row, Open and HS sections separated by a blank row),
+named YYYYMMDD-N-gender_sport_results.csv so they can be ingested as-is.
+
+    python3 -m yraa.synth --out data/raw/synthetic --schools 20 --athletes 12 --events 6
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+FIRST_NAMES = [
+    "Alex", "Ava", "Ben", "Chloe", "Daniel", "Emma", "Ethan", "Grace", "Hannah", "Isaac",
+    "Jack", "Julia", "Kai", "Leah", "Liam", "Maya", "Noah", "Olivia", "Owen", "Priya",
+    "Quinn", "Ryan", "Sara", "Sophia", "Theo", "Zoe", "Lucas", "Mia", "Nathan", "Aiden",
+]
+LAST_NAMES = [
+    "Anderson", "Brown", "Chen", "Davis", "Evans", "Fischer", "Garcia", "Huang", "Ivanov", "Johnson",
+    "Kim", "Lee", "Martin", "Nguyen", "O'Brien", "Patel", "Quinn", "Rossi", "Singh", "Thompson",
+    "Usman", "Valdez", "Wong", "Xu", "Young", "Zhang", "Campbell", "Murphy", "Tremblay", "Wilson",
+]
+SCHOOL_WORDS = [
+    "Northview", "Lakeshore", "Riverside", "Cardinal Carter", "Huron Heights", "Denison",
+    "St. Maximilian Kolbe", "Aurora", "Newmarket", "King City", "Sutton", "Keswick",
+    "Markville", "Unionville", "Bayview", "Thornhill", "Woodbridge", "Maple", "Stouffville", "Uxbridge",
+]
+LOCATIONS = ["Beaver Valley", "Blue Mountain", "Mount St. Louis", "Horseshoe", "Snow Valley"]
+CATEGORIES = [("girls", "ski"), ("boys", "ski"), ("girls", "snowboard"), ("boys", "snowboard")]
+
+
+def _school_names(count):
+    names = []
+    for i in range(count):
+        base = SCHOOL_WORDS[i % len(SCHOOL_WORDS)]
+        names.append(base if i < len(SCHOOL_WORDS) else f"{base} {i // len(SCHOOL_WORDS) + 1}")
+    return names
+
+
+def _build_rosters(rng, schools, athletes_per_school, open_share):
+    """Return {(gender, sport): [athlete dict, ...]} with a fixed skill per athlete."""
+    rosters = {}
+    for gender, sport in CATEGORIES:
+        roster = []
+        used = set()
+        for school in schools:
+            for _ in range(athletes_per_school):
+                while True:
+                    name = (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+                    if name not in used or len(used) >= len(FIRST_NAMES) * len(LAST_NAMES):
+                        break
+                if name in used:
+                    name = (name[0], f"{name[1]}-{len(used)}")
+                used.add(name)
+                roster.append({
+                    "first_name": name[0],
+                    "last_name": name[1],
+                    "school": school,
+                    "division": "open" if rng.random() < open_share else "hs",
+                    "skill": rng.gauss(0, 1),
+                })
+        rosters[(gender, sport)] = roster
+    return rosters
+
+
+def _category_label(gender, sport, division):
+    sport_label = "SKI" if sport == "ski" else "BOARD"
+    div_label = "Open Div" if division == "open" else "High School Div"
+    return f"{sport_label} ({gender.title()}):  {div_label}"
+
+
+def _section_rows(rng, athletes, gender, sport, division, opts):
+    """Return CSV rows (finishers first, then DQ/DNF/DNS) for one division of one race."""
+    finishers = []
+    flagged = []
+    base = 20.0 if sport == "ski" else 24.0
+    for a in athletes:
+        roll = rng.random()
+        if roll < opts["dns_rate"]:
+            flagged.append((a, "", "DNS"))
+        elif roll < opts["dns_rate"] + opts["dnf_rate"]:
+            flagged.append((a, "", "DNF"))
+        elif roll < opts["dns_rate"] + opts["dnf_rate"] + opts["dq_rate"]:
+            flagged.append((a, "999", "DQ missed gate"))
+        else:
+            t = base + 1.5 * a["skill"] + rng.gauss(0, 0.8)
+            finishers.append([a, round(max(t, base * 0.6), 2)])
+
+    finishers.sort(key=lambda f: f[1])
+    # Ties: copy the previous finisher's time so both share a place
+    for i in range(1, len(finishers)):
+        if rng.random() < opts["tie_rate"]:
+            finishers[i][1] = finishers[i - 1][1]
+
+    rows = []
+    label = _category_label(gender, sport, division)
+    place = 0
+    for i, (a, t) in enumerate(finishers):
+        if i == 0 or t != finishers[i - 1][1]:
+            place = i + 1
+        rows.append([place, "Green", rng.randint(1, 300), a["first_name"], a["last_name"],
+                     a["school"], label, f"{t:.2f}", ""])
+    for a, t, note in flagged:
+        rows.append(["", "Green", rng.randint(1, 300), a["first_name"], a["last_name"],
+                     a["school"], label, t, note])
+    return rows
+
+
+def generate_season(out_dir, schools=12, athletes=8, events=5, runs_per_event=2,
+                    open_share=0.25, tie_rate=0.02, dq_rate=0.02, dnf_rate=0.03,
+                    dns_rate=0.03, start=date(2026, 1, 8), seed=0):
+    """Write a full season of raw race CSVs into out_dir. Returns the file paths.
+
+    `athletes` is per school per category; each event has `runs_per_event`
+    runs for each of the four categories.
+    """
+    rng = random.Random(seed)
+    opts = {"tie_rate": tie_rate, "dq_rate": dq_rate, "dnf_rate": dnf_rate, "dns_rate": dns_rate}
+    rosters = _build_rosters(rng, _school_names(schools), athletes, open_share)
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = []
+    for e in range(events):
+        event_date = start + timedelta(days=7 * e)
+        location = LOCATIONS[e % len(LOCATIONS)]
+        for gender, sport in CATEGORIES:
+            roster = rosters[(gender, sport)]
+            for run in range(1, runs_per_event + 1):
+                title = f"{gender.upper()} {sport.upper()} [{event_date.strftime('%a. %b. %d, %Y')} @ {location}]"
+                header = ["Place", "Colour", "#", "First Name", "Last Name", "School",
+                          "Racing Category", f"Run #{run}", "Notes"]
+                rows = [[title] + [""] * 8, header]
+                for i, division in enumerate(("open", "hs")):
+                    section = [a for a in roster if a["division"] == division]
+                    if not section:
+                        continue
+                    if i > 0:
+                        rows.append([""] * 9)
+                        rows.append(header)
+                    rows.extend(_section_rows(rng, section, gender, sport, division, opts))
+
+                name = f"{event_date.strftime('%Y%m%d')}-{run}-{gender}_{sport}_results.csv"
+                path = os.path.join(out_dir, name)
+                with open(path, "w", newline="") as f:
+                    csv.writer(f).writerows(rows)
+                paths.append(path)
+    return paths
+
+
+def add_arguments(parser):
+    """Register generator options (shared with yraa.loadtest and yraa.bench)."""
+    parser.add_argument("--schools", type=int, default=12, help="Number of schools (default: 12)")
+    parser.add_argument("--athletes", type=int, default=8, help="Athletes per school per category (default: 8)")
+    parser.add_argument("--events", type=int, default=5, help="Race days in the season (default: 5)")
+    parser.add_argument("--runs-per-event", type=int, default=2, help="Runs per category per race day (default: 2)")
+    parser.add_argument("--open-share", type=float, default=0.25, help="Fraction of athletes in the Open division")
+    parser.add_argument("--tie-rate", type=float, default=0.02, help="Chance a finisher ties the one ahead")
+    parser.add_argument("--dq-rate", type=float, default=0.02, help="DQ rate per start")
+    parser.add_argument("--dnf-rate", type=float, default=0.03, help="DNF rate per start")
+    parser.add_argument("--dns-rate", type=float, default=0.03, help="DNS rate per start")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+
+
+def generator_options(args):
+    return {
+        "schools": args.schools, "athletes": args.athletes, "events": args.events,
+        "runs_per_event": args.runs_per_event, "open_share": args.open_share,
+        "tie_rate": args.tie_rate, "dq_rate": args.dq_rate, "dnf_rate": args.dnf_rate,
+        "dns_rate": args.dns_rate, "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic season of raw race result CSVs")
+    parser.add_argument("--out", required=True, help="Output directory for the CSVs")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate_season(args.out, **generator_options(args))
+    print(f"Wrote {len(paths)} race files to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
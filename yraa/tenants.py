@@ -0,0 +1,252 @@
+"""Hosting several associations from one web process.
+
+Tenants are configured in a JSON file named by YRAA_TENANTS:
+
+    {
+        "yraa": {"db": "data/yraa.db", "hosts": ["yraa.davecheng.com"], "default": true},
+        "coss": {"db": "data/coss.db", "hosts": ["coss.example.com"], "season_races": 6}
+    }
+
+A request is routed to the tenant whose `hosts` list contains its Host
+header, else to the tenant whose name is the first path segment
+(/coss/girls/ski/hs), else to the default tenant. Without YRAA_TENANTS a
+single default tenant serves YRAA_DB_PATH. "season_races" sets the number
+of races in the tenant's season for clinch statuses (see clinch.py).
+
+Tenants are opened lazily on first request: the database is initialized,
+and the tenant gets its own connection pool, in-memory season models (see
+model.py) and view caches. When the tenant's database has a published
+snapshot (see snapshot.py) the pool reads the snapshot instead, switching
+to a newer one on the next request after it is published. Tenants idle for
+longer than YRAA_TENANT_IDLE_SECONDS are closed, so open files and cached
+views scale with active tenants rather than configured ones.
+"""
+import json
+import os
+import threading
+import time
+
+from .cache import ENTITY_CACHE_SIZE, VersionedCache
+from .clinch import SEASON_RACES
+from .db import get_connection, get_readonly_connection, get_snapshot_connection, init_db, migrate_archives
+from .model import ModelStore
+from .snapshot import current_snapshot, pointer_path
+
+DEFAULT_POOL_SIZE = int(os.environ.get("YRAA_POOL_SIZE", "4"))
+IDLE_SECONDS = float(os.environ.get("YRAA_TENANT_IDLE_SECONDS", "600"))
+
+# First path segments the app itself routes; tenant names must not shadow them
+RESERVED_NAMES = {
+    "girls", "boys", "races", "ofsaa", "export", "api", "detail", "season", "metrics", "ready", "_dev",
+    "athlete", "school", "docs", "redoc", "openapi.json",
+}
+
+
+class ConnectionPool:
+    """Reuses up to `size` idle connections to one database file.
+
+    Never blocks: when every pooled connection is in use a new one is
+    opened, and connections returned beyond `size` are closed.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, snapshot=False):
+        self.db_path = db_path
+        self.size = size
+        self.snapshot = snapshot
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            # Handed between the event loop's worker threads, one request at a time
+            connect = get_snapshot_connection if self.snapshot else get_connection
+            conn = connect(self.db_path, check_same_thread=False)
+        return PooledConnection(conn, self)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class PooledConnection:
+    """A pooled sqlite3 connection; close() returns it to the pool."""
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+
+class Tenant:
+    def __init__(self, name, db_path, hosts=(), pool_size=DEFAULT_POOL_SIZE, season_races=SEASON_RACES):
+        self.name = name
+        self.db_path = db_path
+        self.hosts = tuple(h.lower() for h in hosts)
+        self.pool_size = pool_size
+        self.season_races = season_races
+        self.pool = None
+        self.read_path = db_path  # the published snapshot when there is one
+        self.models = ModelStore(self._connect)
+        self.cache = None
+        self.entities = None
+        self.last_used = 0.0
+        self._pointer_mtime = None
+
+    def open(self):
+        snapshot = current_snapshot(self.db_path)
+        if snapshot is None:
+            init_db(self.db_path).close()
+            self.pool = ConnectionPool(self.db_path, self.pool_size)
+        else:
+            self.pool = ConnectionPool(snapshot, self.pool_size, snapshot=True)
+        self.read_path = snapshot or self.db_path
+        # Archives written by older versions gain newer tables (e.g. analytics) here, once; requests only read them
+        migrate_archives(self.db_path)
+        self._pointer_mtime = self._pointer_stat()
+        self.models.clear()
+        if self.cache is None:
+            self.cache = VersionedCache("views")
+            self.entities = VersionedCache("entities", maxsize=ENTITY_CACHE_SIZE)
+
+    def _connect(self, path):
+        # Model loads and data_version polls happen on whichever worker thread serves the request
+        if path == self.read_path != self.db_path:
+            connect = get_snapshot_connection
+        elif path != self.db_path:
+            connect = get_readonly_connection  # a season archive
+        else:
+            connect = get_connection
+        return connect(path, check_same_thread=False)
+
+    def model(self, season=None):
+        """The in-memory model of `season` (the current season by default)."""
+        current = self.models.get(self.read_path)
+        if season is None or season == current.season:
+            return current
+        archive = self._archive_path(current, season)
+        if archive is None:
+            return self.models.get(self.read_path, season)
+        return self.models.get(archive, season)
+
+    def _archive_path(self, current, season):
+        archive = next((s["archive_path"] for s in current.seasons if s["season"] == season), None)
+        return os.path.join(os.path.dirname(os.path.abspath(self.db_path)), archive) if archive else None
+
+    def connect(self, season=None):
+        """A connection for direct reads of `season`: pooled, or to the season's archive file. close() when done."""
+        archive = self._archive_path(self.models.get(self.read_path), season) if season is not None else None
+        if archive is None:
+            return self.pool.acquire()
+        return get_readonly_connection(archive)
+
+    def _pointer_stat(self):
+        try:
+            return os.stat(pointer_path(self.db_path)).st_mtime_ns
+        except OSError:
+            return None
+
+    def refresh(self):
+        """Switch the pool to a newly published snapshot, if the pointer file changed."""
+        if self._pointer_stat() == self._pointer_mtime:
+            return
+        old = self.pool
+        self.open()
+        old.close()
+        self.cache.clear()
+        self.entities.clear()
+
+    def close(self):
+        """Close pooled connections and drop models and cached views (in-flight requests finish normally)."""
+        if self.pool is not None:
+            self.pool.close()
+        self.pool = None
+        self.models.clear()
+        if self.cache is not None:
+            self.cache.clear()
+            self.entities.clear()
+
+
+class TenantRegistry:
+    def __init__(self, tenants, default=None, idle_seconds=IDLE_SECONDS):
+        self.tenants = {t.name: t for t in tenants}
+        self.default = default
+        self.idle_seconds = idle_seconds
+        self._by_host = {h: t for t in tenants for h in t.hosts}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    @classmethod
+    def from_env(cls, default_db_path):
+        """Build from the YRAA_TENANTS file, or a single tenant serving default_db_path."""
+        config_path = os.environ.get("YRAA_TENANTS")
+        if not config_path:
+            return cls([Tenant("default", default_db_path)], default="default")
+
+        with open(config_path) as f:
+            config = json.load(f)
+        base = os.path.dirname(os.path.abspath(config_path))
+        tenants = []
+        default = None
+        for name, opts in config.items():
+            if name in RESERVED_NAMES:
+                raise ValueError(f"tenant name {name!r} collides with a dashboard route")
+            db_path = os.path.join(base, opts["db"])
+            tenants.append(Tenant(
+                name, db_path, opts.get("hosts", ()), opts.get("pool_size", DEFAULT_POOL_SIZE),
+                opts.get("season_races", SEASON_RACES),
+            ))
+            if opts.get("default"):
+                default = name
+        return cls(tenants, default=default)
+
+    def resolve(self, host, path):
+        """Return (tenant, remaining path, path prefix) for a request, or (None, path, "")."""
+        tenant = self._by_host.get((host or "").split(":")[0].lower())
+        if tenant is not None:
+            return tenant, path, ""
+        first, _, rest = path.lstrip("/").partition("/")
+        if first in self.tenants:
+            return self.tenants[first], "/" + rest, f"/{first}"
+        if self.default is not None:
+            return self.tenants[self.default], path, ""
+        return None, path, ""
+
+    def activate(self, tenant):
+        """Open the tenant if needed, mark it used and evict idle tenants."""
+        now = time.monotonic()
+        with self._lock:
+            if tenant.pool is None:
+                tenant.open()
+            else:
+                tenant.refresh()
+            tenant.last_used = now
+            if now - self._last_sweep >= min(self.idle_seconds, 60):
+                self._last_sweep = now
+                for other in self.tenants.values():
+                    if other is not tenant and other.pool is not None and now - other.last_used > self.idle_seconds:
+                        other.close()
+
+    def active(self):
+        return [t.name for t in self.tenants.values() if t.pool is not None]
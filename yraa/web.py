@@ -1,17 +1,69 @@
+import asyncio
 import csv
+import gzip
+import hashlib
+import hmac
 import io
+import json
+import logging
 import os
+import re
+import threading
+import time
+import unicodedata
+from contextvars import ContextVar
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
-from .db import get_connection, init_db, get_team_leaderboard, get_individual_leaderboard, get_season_summary, get_race_list, get_race_results, get_schools, get_athletes
-from .ofsaa import get_ofsaa_qualifiers
+try:
+    import brotli
+except ImportError:  # optional: /api/season is served gzip-compressed without it
+    brotli = None
+
+from . import analytics, clinch, devtools, jobs, metrics, projection
+from .cache import ENTITY_CACHE_SIZE, VersionedCache
+from .db import get_changes, get_latest_change
+from .parser import parse_filename
+from .search import SearchIndex, DEFAULT_LIMIT
+from .tenants import TenantRegistry
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = os.environ.get("YRAA_DB_PATH", "data/yraa.db")
+YRAA_ENV = os.environ.get("YRAA_ENV", "")
+# Bearer token for the /api/admin endpoints; they answer 404 while it is unset
+ADMIN_TOKEN = os.environ.get("YRAA_ADMIN_TOKEN", "")
+MAX_UPLOAD_BYTES = int(os.environ.get("YRAA_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Page size of /api/changes
+CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 10000
+# Most views one POST /api/batch may ask for
+MAX_BATCH_VIEWS = 50
+# Layout of the /api/season payload; bump when races.html must read it differently
+SEASON_DATA_FORMAT = 1
 
 app = FastAPI(title="YRAA Alpine Scoring")
 
+# Associations served by this process (see tenants.py); one default tenant unless YRAA_TENANTS is set
+tenants = TenantRegistry.from_env(DB_PATH)
+# Tenant serving the current request, and its path prefix when routed by path (/coss/...)
+current_tenant = ContextVar("current_tenant", default=None)
+tenant_prefix = ContextVar("tenant_prefix", default="")
+# Season being viewed under /season/{year}/...; None means the current season
+request_season = ContextVar("request_season", default=None)
+# Set when startup warmup has finished; /ready reports 503 until then
+warmed_up = threading.Event()
+# Runs queued upload ingests for every tenant (see jobs.py)
+job_worker = jobs.Worker(lambda: [t.db_path for t in tenants.tenants.values()])
+
+if YRAA_ENV == "dev":
+    # Per-request SQL trace + optional cProfile (see devtools.py)
+    app.router.route_class = devtools.ProfiledRoute
+    app.middleware("http")(devtools.trace_request)
+    app.include_router(devtools.router)
+
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
 
 
@@ -24,8 +76,69 @@ def _caps_last_name(value):
     return value
 
 
+def _season_label(season):
+    """2026 -> '2025–26'."""
+    return f"{season - 1}–{season % 100:02d}"
+
+
+def slugify(value):
+    """'Zoë (Sasha) Smith' -> 'zoe-sasha-smith'. Not unique on its own: ids come from unique_slugs()."""
+    value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def unique_slugs(names):
+    """{name: slug} for names in order, where a slug already taken gets -2, -3, ... appended.
+
+    A name is a string or a tuple of strings (first, last). Names keep their
+    slug as long as no name with the same slug appears before them.
+    """
+    slugs = {}
+    taken = set()
+    for name in names:
+        base = slugify(name if isinstance(name, str) else " ".join(name)) or "unnamed"
+        slug, n = base, 1
+        while slug in taken:
+            n += 1
+            slug = f"{base}-{n}"
+        taken.add(slug)
+        slugs[name] = slug
+    return slugs
+
+
+def _clinch_code(status):
+    """One-letter clinch marker for a leaderboard row (legend in category.html)."""
+    if not status:
+        return ""
+    if status["title"] == clinch.CLINCHED:
+        return "c"
+    if status["podium"] == clinch.CLINCHED:
+        return "p"
+    if status["podium"] == clinch.ELIMINATED:
+        return "x"
+    if status["title"] == clinch.ELIMINATED:
+        return "e"
+    return ""
+
+
+def tenant_url(path):
+    """Prefix a site path with the tenant's path prefix, if it was routed by path."""
+    return tenant_prefix.get() + path
+
+
+def season_url(path):
+    """Prefix a site path with the tenant prefix and /season/{year} when rendering a past season."""
+    season = request_season.get()
+    return tenant_url(f"/season/{season}{path}" if season is not None else path)
+
+
 templates.env.filters["caps_last_name"] = _caps_last_name
-templates.env.globals["yraa_env"] = os.environ.get("YRAA_ENV", "")
+templates.env.globals["url"] = season_url
+templates.env.globals["tenant_url"] = tenant_url
+templates.env.globals["request_season"] = request_season.get
+templates.env.filters["season_label"] = _season_label
+templates.env.filters["clinch_code"] = _clinch_code
+templates.env.globals["yraa_env"] = YRAA_ENV
 
 VALID_GENDERS = ("boys", "girls")
 VALID_SPORTS = ("ski", "snowboard")
@@ -40,8 +153,9 @@ CATEGORIES = [
 ]
 
 
-def _get_db():
-    return get_connection(DB_PATH)
+def _get_model():
+    """In-memory model (see model.py) of the tenant and season being viewed."""
+    return current_tenant.get().model(request_season.get())
 
 
 def _validate_params(gender, sport, division=None):
@@ -58,19 +172,314 @@ def _label(gender, sport):
 
 @app.on_event("startup")
 def startup():
-    init_db(DB_PATH)
+    metrics.prune_stale()
+    # Warm up in the background so /ready can answer "not yet" while it runs
+    threading.Thread(target=warm_up, name="yraa-warmup", daemon=True).start()
+    job_worker.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    # Let a running ingest job finish; queued ones wait for the next start
+    job_worker.stop()
+
+
+def warm_up():
+    """Compile every template and prime each tenant's season model, standings and search index.
+
+    A tenant that fails to warm up is logged and skipped (its requests load
+    it lazily as usual); /ready turns ready either way.
+    """
+    start = time.perf_counter()
+    try:
+        for name in templates.env.list_templates():
+            templates.env.get_template(name)
+        for tenant in tenants.tenants.values():
+            token = current_tenant.set(tenant)
+            try:
+                tenants.activate(tenant)
+                model = tenant.model()
+                for cat in CATEGORIES:
+                    team_leaderboard(model, cat["gender"], cat["sport"])
+                    for division in VALID_DIVISIONS:
+                        individual_leaderboard(model, cat["gender"], cat["sport"], division)
+                    clinch_statuses(model, cat["gender"], cat["sport"])
+                search_index(model)
+            except Exception:
+                logger.exception("Warmup failed for tenant %s", tenant.name)
+                metrics.inc("yraa_warmup_failures_total", {"tenant": tenant.name})
+            finally:
+                current_tenant.reset(token)
+    except Exception:
+        logger.exception("Warmup failed")
+        metrics.inc("yraa_warmup_failures_total")
+    finally:
+        metrics.observe("yraa_warmup_duration_seconds", time.perf_counter() - start)
+        warmed_up.set()
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until startup warmup has finished."""
+    if not warmed_up.is_set():
+        return JSONResponse({"status": "warming"}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template (e.g. /{gender}/{sport}/{tab}) to keep cardinality bounded
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    metrics.observe(
+        "yraa_http_request_duration_seconds",
+        time.perf_counter() - start,
+        {"route": path, "method": request.method},
+    )
+    metrics.inc(
+        "yraa_http_requests_total",
+        {"route": path, "method": request.method, "status": str(response.status_code)},
+    )
+    return response
+
+
+@app.middleware("http")
+async def season_prefix(request: Request, call_next):
+    """Serve /season/{year}/... as the normal routes scoped to that season."""
+    match = re.match(r"^/season/(\d{4})(/.*)?$", request.scope["path"])
+    if not match:
+        return await call_next(request)
+    season = int(match.group(1))
+    # Loading the model is blocking SQLite work; keep it off the event loop
+    if season not in await run_in_threadpool(_known_seasons):
+        return HTMLResponse("Unknown season", status_code=404)
+    request.scope["path"] = match.group(2) or "/"
+    token = request_season.set(season)
+    try:
+        return await call_next(request)
+    finally:
+        request_season.reset(token)
+
+
+def _known_seasons():
+    return {s["season"] for s in current_tenant.get().model().seasons}
+
+
+@app.middleware("http")
+async def tenant_routing(request: Request, call_next):
+    """Pick the tenant by Host header or first path segment (see tenants.py)."""
+    if request.scope["path"] == "/ready":
+        return await call_next(request)
+    tenant, path, prefix = tenants.resolve(request.headers.get("host"), request.scope["path"])
+    if tenant is None:
+        return HTMLResponse("Unknown association", status_code=404)
+    # Opening a cold tenant migrates its database; keep it off the event loop
+    await run_in_threadpool(tenants.activate, tenant)
+    request.scope["path"] = path
+    tokens = (current_tenant.set(tenant), tenant_prefix.set(prefix))
+    try:
+        return await call_next(request)
+    finally:
+        current_tenant.reset(tokens[0])
+        tenant_prefix.reset(tokens[1])
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def home_context(model):
+    """Template context for home.html (without the request)."""
+    return {
+        "summary": model.season_summary(),
+        "seasons": model.seasons,
+        "categories": CATEGORIES,
+    }
 
 
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    conn = _get_db()
-    summary = get_season_summary(conn)
-    conn.close()
-    return templates.TemplateResponse("home.html", {
-        "request": request,
-        "summary": summary,
-        "categories": CATEGORIES,
-    })
+    context = home_context(_get_model())
+    return templates.TemplateResponse("home.html", {"request": request, **context})
+
+
+@app.get("/api/search")
+def api_search(q: str = "", group: str = None, sport: str = None, division: str = None, school: str = None, limit: int = DEFAULT_LIMIT):
+    """Typeahead over athlete names and schools, optionally within a category/school."""
+    index = search_index(_get_model())
+    return index.search(q, gender=group or None, sport=sport or None, division=division or None,
+                        school=school or None, limit=max(1, min(limit, 100)))
+
+
+def season_data(model):
+    """The /api/season payload: {"version", "encodings": {"identity" | "gzip" | "br": bytes}}.
+
+    Built and compressed once per model; the version is a hash of the JSON,
+    so it is the same in every worker process.
+    """
+    def build():
+        payload = {"format": SEASON_DATA_FORMAT, **model.compact_results()}
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        encodings = {"identity": data, "gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            encodings["br"] = brotli.compress(data)
+        return {"version": hashlib.sha1(data).hexdigest()[:16], "encodings": encodings}
+
+    return _cached(model, ("season_data",), build)
+
+
+@app.get("/api/season")
+def api_season(request: Request, v: str = None):
+    """Every race result of the season in one compact payload, for filtering /races in the browser.
+
+    With ?v= matching the current version the response may be cached forever;
+    otherwise it is revalidated by ETag.
+    """
+    data = season_data(_get_model())
+    etag = f'W/"{data["version"]}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=31536000, immutable" if v == data["version"] else "no-cache",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    accepted = {e.split(";")[0].strip() for e in request.headers.get("accept-encoding", "").split(",")}
+    encoding = next((e for e in ("br", "gzip") if e in accepted and e in data["encodings"]), "identity")
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(data["encodings"][encoding], media_type="application/json", headers=headers)
+
+
+@app.get("/api/changes")
+def api_changes(since: int = 0, limit: int = CHANGES_LIMIT):
+    """Change log entries after sequence number `since` (see db.record_change), for incremental sync."""
+    if since < 0 or not 1 <= limit <= MAX_CHANGES_LIMIT:
+        return JSONResponse({"error": "Invalid parameters"}, status_code=400)
+    conn = current_tenant.get().pool.acquire()
+    try:
+        changes = get_changes(conn, since, limit)
+        latest = get_latest_change(conn)
+    finally:
+        conn.close()
+    next_since = changes[-1]["seq"] if changes else since
+    return {"since": since, "next": next_since, "latest": latest, "more": next_since < latest, "changes": changes}
+
+
+@app.get("/api/race/{race_number}/stats")
+def api_race_stats(race_number: int):
+    """Per-division, per-school and per-result stats of one race, precomputed at ingest (see analytics.py)."""
+    conn = current_tenant.get().connect(request_season.get())
+    try:
+        stats = analytics.get_race_stats(conn, race_number)
+    finally:
+        conn.close()
+    if stats is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return stats
+
+
+@app.get("/api/athlete/stats")
+def api_athlete_stats(first_name: str, last_name: str):
+    """An athlete's season stats per category, precomputed at ingest (see analytics.py)."""
+    season = request_season.get() or _get_model().season
+    conn = current_tenant.get().connect(request_season.get())
+    try:
+        stats = analytics.get_athlete_stats(conn, first_name, last_name, season)
+    finally:
+        conn.close()
+    if not stats:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return {"first_name": first_name, "last_name": last_name, "season": season, "categories": stats}
+
+
+def _admin_error(request):
+    """Error response unless the request carries the YRAA_ADMIN_TOKEN bearer token, else None."""
+    if not ADMIN_TOKEN:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return JSONResponse({"error": "Unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return None
+
+
+@app.post("/api/admin/uploads/{filename}")
+async def admin_upload(request: Request, filename: str):
+    """Store a race CSV (the raw request body) and queue its ingest (see jobs.py). Returns 202 and the job URL."""
+    error = _admin_error(request)
+    if error is not None:
+        return error
+    if parse_filename(filename) is None:
+        return JSONResponse({"error": "Expected a file named YYYYMMDD-N-gender_sport_results[-ofsaa].csv"}, status_code=400)
+    db_path = current_tenant.get().db_path
+    path = await run_in_threadpool(jobs.upload_path, db_path, filename)
+    size = 0
+    # File I/O goes to the threadpool so a large upload never blocks the event loop
+    f = await run_in_threadpool(open, path, "wb")
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                break
+            await run_in_threadpool(f.write, chunk)
+    finally:
+        await run_in_threadpool(f.close)
+    if size > MAX_UPLOAD_BYTES:
+        await run_in_threadpool(os.remove, path)
+        await run_in_threadpool(os.rmdir, os.path.dirname(path))
+        return JSONResponse({"error": f"Upload larger than {MAX_UPLOAD_BYTES} bytes"}, status_code=413)
+
+    job_id = await run_in_threadpool(jobs.enqueue, db_path, filename, path)
+    job_worker.notify()
+    url = tenant_url(f"/api/admin/jobs/{job_id}")
+    return JSONResponse({"id": job_id, "status": jobs.QUEUED, "url": url}, status_code=202, headers={"Location": url})
+
+
+@app.get("/api/admin/jobs")
+def admin_jobs(request: Request, limit: int = 20):
+    error = _admin_error(request)
+    if error is not None:
+        return error
+    return jobs.list_jobs(current_tenant.get().db_path, max(1, min(limit, 100)))
+
+
+@app.get("/api/admin/jobs/{job_id}")
+def admin_job(request: Request, job_id: int):
+    error = _admin_error(request)
+    if error is not None:
+        return error
+    job = jobs.get_job(current_tenant.get().db_path, job_id)
+    if job is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return job
+
+
+@app.get("/api/admin/jobs/{job_id}/events")
+async def admin_job_events(request: Request, job_id: int):
+    """Server-sent events: the job whenever its status changes, until it is done or failed."""
+    error = _admin_error(request)
+    if error is not None:
+        return error
+    db_path = current_tenant.get().db_path
+    job = await run_in_threadpool(jobs.get_job, db_path, job_id)
+    if job is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+
+    async def events(job):
+        status = None
+        while True:
+            if job["status"] != status:
+                status = job["status"]
+                yield f"event: {status}\ndata: {json.dumps(job)}\n\n"
+            if status in (jobs.DONE, jobs.FAILED) or await request.is_disconnected():
+                return
+            await asyncio.sleep(0.5)
+            job = await run_in_threadpool(jobs.get_job, db_path, job_id)
+
+    return StreamingResponse(events(job), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @app.get("/races", response_class=HTMLResponse)
@@ -87,8 +496,8 @@ def races_page(request: Request, group: str = None, sport: str = None, division:
             pass
 
     gender = group
-    conn = _get_db()
-    race_list = get_race_list(conn)
+    model = _get_model()
+    race_list = model.race_list()
 
     # Build filter options from available data
     genders = sorted({k[0] for k in race_list})
@@ -120,28 +529,25 @@ def races_page(request: Request, group: str = None, sport: str = None, division:
     if not race_num and not all_races and category_races:
         race_num = category_races[-1]["seq"]
 
-    # Get school and athlete lists for filters
+    # School list for the filter (athletes are searched on demand via /api/search)
     schools = []
-    athletes_list = []
     has_narrowing_filter = bool(school or athlete)
     if gender and sport and division:
-        schools = get_schools(conn, gender, sport, division)
-        athletes_list = get_athletes(conn, gender, sport, division, school=school if school else None)
+        schools = model.schools(gender, sport, division)
 
     # Fetch results
     results = []
     event_date = None
     if gender and sport and division:
         if all_races:
-            results = get_race_results(conn, gender, sport, division, school=school, athlete=athlete)
+            results = model.race_results(gender, sport, division, school=school, athlete=athlete)
         elif race_num:
-            results = get_race_results(conn, gender, sport, division, race_num, school=school, athlete=athlete)
+            results = model.race_results(gender, sport, division, race_num, school=school, athlete=athlete)
             for cr in category_races:
                 if cr["seq"] == race_num:
                     event_date = cr["event_date"]
                     break
 
-    conn.close()
     return templates.TemplateResponse("races.html", {
         "request": request,
         "categories": CATEGORIES,
@@ -151,7 +557,6 @@ def races_page(request: Request, group: str = None, sport: str = None, division:
         "divisions": divisions,
         "races": category_races,
         "schools": schools,
-        "athletes_list": athletes_list,
         "selected_group": gender,
         "selected_sport": sport,
         "selected_division": division,
@@ -161,6 +566,7 @@ def races_page(request: Request, group: str = None, sport: str = None, division:
         "event_date": event_date,
         "has_narrowing_filter": has_narrowing_filter,
         "filters_open": filters == "open",
+        "season_data_version": season_data(model)["version"],
     })
 
 
@@ -179,8 +585,8 @@ def export_races_csv(group: str = None, sport: str = None, division: str = None,
         except ValueError:
             pass
 
-    conn = _get_db()
-    race_list = get_race_list(conn)
+    model = _get_model()
+    race_list = model.race_list()
 
     genders = sorted({k[0] for k in race_list})
     sports = sorted({k[1] for k in race_list})
@@ -210,10 +616,9 @@ def export_races_csv(group: str = None, sport: str = None, division: str = None,
     results = []
     if gender and sport and division:
         if all_races:
-            results = get_race_results(conn, gender, sport, division, school=school, athlete=athlete)
+            results = model.race_results(gender, sport, division, school=school, athlete=athlete)
         elif race_num:
-            results = get_race_results(conn, gender, sport, division, race_num, school=school, athlete=athlete)
-    conn.close()
+            results = model.race_results(gender, sport, division, race_num, school=school, athlete=athlete)
 
     # Determine if showing multiple races
     showing_all = all_races
@@ -253,21 +658,20 @@ def export_races_csv(group: str = None, sport: str = None, division: str = None,
             parts.append(athlete)
     filename = "_".join(parts) + ".csv"
 
-    output.seek(0)
+    return _csv_response(output.getvalue(), filename)
+
+
+def _csv_response(text, filename):
     return StreamingResponse(
-        iter([output.getvalue()]),
+        iter([text]),
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
-@app.get("/export/{gender}/{sport}/team")
-def export_team_csv(gender: str, sport: str):
-    if not _validate_params(gender, sport):
-        return HTMLResponse("Invalid parameters", status_code=404)
-    conn = _get_db()
-    teams = get_team_leaderboard(conn, gender, sport)
-    conn.close()
+def team_csv(model, gender, sport):
+    """Return (filename, csv_text) for a team championship export."""
+    teams = team_leaderboard(model, gender, sport)
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -276,22 +680,12 @@ def export_team_csv(gender: str, sport: str):
     for team in teams:
         writer.writerow([team.rank if team.rank > 0 else "", team.school, f"{team.total_points:g}"])
 
-    filename = f"{gender}_{sport}_team_championship.csv"
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return f"{gender}_{sport}_team_championship.csv", output.getvalue()
 
 
-@app.get("/export/{gender}/{sport}/{division}")
-def export_csv(gender: str, sport: str, division: str):
-    if not _validate_params(gender, sport, division):
-        return HTMLResponse("Invalid parameters", status_code=404)
-    conn = _get_db()
-    athletes = get_individual_leaderboard(conn, gender, sport, division)
-    conn.close()
+def individual_csv(model, gender, sport, division):
+    """Return (filename, csv_text) for an individual championship export."""
+    athletes = individual_leaderboard(model, gender, sport, division)
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -300,21 +694,11 @@ def export_csv(gender: str, sport: str, division: str):
     for a in athletes:
         writer.writerow([a["rank"], a["first_name"], a["last_name"], a["school"], a["total_points"]])
 
-    filename = f"{gender}_{sport}_{division}_championship.csv"
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
-
+    return f"{gender}_{sport}_{division}_championship.csv", output.getvalue()
 
-@app.get("/export/ofsaa")
-def export_ofsaa_csv(tab: str = "hs"):
-    if tab not in ("hs", "open", "team"):
-        tab = "hs"
-    conn = _get_db()
 
+def ofsaa_csv(model, tab):
+    """Return (filename, csv_text) for an OFSAA qualifiers export."""
     output = io.StringIO()
     writer = csv.writer(output)
 
@@ -323,7 +707,7 @@ def export_ofsaa_csv(tab: str = "hs"):
         for cat in CATEGORIES:
             label = f"{cat['gender'].title()} {cat['sport'].title()}"
             for div in ("hs", "open"):
-                data = get_ofsaa_qualifiers(conn, cat["gender"], cat["sport"], div)
+                data = model.ofsaa_qualifiers(cat["gender"], cat["sport"], div)
                 if data["team_slots"] == 0:
                     continue
                 if data["team"]:
@@ -335,29 +719,46 @@ def export_ofsaa_csv(tab: str = "hs"):
         writer.writerow(["category", "first_name", "last_name", "school"])
         for cat in CATEGORIES:
             label = f"{cat['gender'].title()} {cat['sport'].title()}"
-            data = get_ofsaa_qualifiers(conn, cat["gender"], cat["sport"], tab)
+            data = model.ofsaa_qualifiers(cat["gender"], cat["sport"], tab)
             if data["individual"]:
                 for ind in data["individual"]:
                     writer.writerow([label, ind["first_name"], ind["last_name"], ind["school"]])
             else:
                 writer.writerow([label, "", "", ""])
 
-    conn.close()
-    filename = f"ofsaa_qualifiers_{tab}.csv"
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return f"ofsaa_qualifiers_{tab}.csv", output.getvalue()
 
 
-@app.get("/ofsaa", response_class=HTMLResponse)
-def ofsaa_page(request: Request, tab: str = "hs"):
+@app.get("/export/{gender}/{sport}/team")
+def export_team_csv(gender: str, sport: str):
+    if not _validate_params(gender, sport):
+        return HTMLResponse("Invalid parameters", status_code=404)
+    model = _get_model()
+    filename, text = team_csv(model, gender, sport)
+    return _csv_response(text, filename)
+
+
+@app.get("/export/{gender}/{sport}/{division}")
+def export_csv(gender: str, sport: str, division: str):
+    if not _validate_params(gender, sport, division):
+        return HTMLResponse("Invalid parameters", status_code=404)
+    model = _get_model()
+    filename, text = individual_csv(model, gender, sport, division)
+    return _csv_response(text, filename)
+
+
+@app.get("/export/ofsaa")
+@app.get("/export/ofsaa/{tab}")
+def export_ofsaa_csv(tab: str = "hs"):
     if tab not in ("hs", "open", "team"):
         tab = "hs"
-    conn = _get_db()
+    model = _get_model()
+    filename, text = ofsaa_csv(model, tab)
+    return _csv_response(text, filename)
+
 
+def ofsaa_context(model, tab):
+    """Template context for ofsaa.html (without the request)."""
     ofsaa_data = {}
     ofsaa_dates = {}
 
@@ -365,66 +766,387 @@ def ofsaa_page(request: Request, tab: str = "hs"):
         for cat in CATEGORIES:
             for div in ("hs", "open"):
                 key = (cat["gender"], cat["sport"], div)
-                ofsaa_data[key] = get_ofsaa_qualifiers(conn, cat["gender"], cat["sport"], div)
+                ofsaa_data[key] = model.ofsaa_qualifiers(cat["gender"], cat["sport"], div)
                 if ofsaa_data[key]["event_date"]:
                     ofsaa_dates[cat["sport"]] = ofsaa_data[key]["event_date"]
     else:
         for cat in CATEGORIES:
             key = (cat["gender"], cat["sport"], tab)
-            ofsaa_data[key] = get_ofsaa_qualifiers(conn, cat["gender"], cat["sport"], tab)
+            ofsaa_data[key] = model.ofsaa_qualifiers(cat["gender"], cat["sport"], tab)
             if ofsaa_data[key]["event_date"]:
                 ofsaa_dates[cat["sport"]] = ofsaa_data[key]["event_date"]
 
-    conn.close()
-    return templates.TemplateResponse("ofsaa.html", {
-        "request": request,
+    return {
         "tab": tab,
         "categories": CATEGORIES,
         "ofsaa_data": ofsaa_data,
         "ofsaa_dates": ofsaa_dates,
-    })
+    }
+
+
+@app.get("/ofsaa", response_class=HTMLResponse)
+@app.get("/ofsaa/{tab}", response_class=HTMLResponse)
+def ofsaa_page(request: Request, tab: str = "hs"):
+    if tab not in ("hs", "open", "team"):
+        tab = "hs"
+    model = _get_model()
+    context = ofsaa_context(model, tab)
+    return templates.TemplateResponse("ofsaa.html", {"request": request, **context})
+
+
+@app.get("/athlete/{athlete_id}", response_class=HTMLResponse)
+def athlete_page(request: Request, athlete_id: str):
+    profile = athlete_profile(_get_model(), athlete_id)
+    if profile is None:
+        return HTMLResponse("Not found", status_code=404)
+    return templates.TemplateResponse("athlete.html", {"request": request, "athlete": profile})
+
+
+@app.get("/api/athlete/{athlete_id}")
+def api_athlete(athlete_id: str):
+    """An athlete's season in one response: results, individual standing, team contribution and OFSAA status per category."""
+    profile = athlete_profile(_get_model(), athlete_id)
+    if profile is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return profile
+
+
+@app.get("/school/{school_id}", response_class=HTMLResponse)
+def school_page(request: Request, school_id: str):
+    school = school_slices(_get_model()).get(school_id)
+    if school is None:
+        return HTMLResponse("Not found", status_code=404)
+    return templates.TemplateResponse("school.html", {"request": request, "school": school})
+
+
+@app.get("/api/school/{school_id}")
+def api_school(school_id: str):
+    """A school's season in one response: team standings, ranked athletes and OFSAA status per category."""
+    school = school_slices(_get_model()).get(school_id)
+    if school is None:
+        return JSONResponse({"error": "Not found"}, status_code=404)
+    return school
 
 
 @app.get("/{gender}/{sport}", response_class=RedirectResponse)
 def category_redirect(gender: str, sport: str):
     if gender not in VALID_GENDERS or sport not in VALID_SPORTS:
         return HTMLResponse("Invalid parameters", status_code=404)
-    return RedirectResponse(url=f"/{gender}/{sport}/hs", status_code=307)
+    return RedirectResponse(url=season_url(f"/{gender}/{sport}/hs"), status_code=307)
 
 
-@app.get("/{gender}/{sport}/{tab}", response_class=HTMLResponse)
-def category_page(request: Request, gender: str, sport: str, tab: str):
-    if gender not in VALID_GENDERS or sport not in VALID_SPORTS or tab not in VALID_TABS:
-        return HTMLResponse("Invalid parameters", status_code=404)
-    conn = _get_db()
+_views = VersionedCache("views")
+_entities = VersionedCache("entities", maxsize=ENTITY_CACHE_SIZE)
+# Projections are CPU-heavy (see projection.py): one run at a time per category and horizon.
+# The keys are bounded (genders x sports x remaining races x seasons), so the locks are kept.
+_projection_locks = {}
+_projection_locks_guard = threading.Lock()
+
+
+def _cached(model, key, compute, version=None, entity=False):
+    """Memoize compute() for the season being viewed until its model is reloaded.
+
+    A `version` token (e.g. model.sport_version()) keeps the entry across
+    reloads that do not change it. Each tenant has its own cache; outside a
+    request (e.g. yraa.publish) a shared one is used. Per-athlete and
+    per-team views go in a separate `entity` cache, so a crawl of every
+    profile cannot evict the leaderboards.
+    """
+    tenant = current_tenant.get()
+    if entity:
+        cache = tenant.entities if tenant is not None else _entities
+    else:
+        cache = tenant.cache if tenant is not None else _views
+    return cache.get((request_season.get(),) + key, model.generation if version is None else version, compute)
+
+
+def search_index(model):
+    return _cached(model, ("search_index",), lambda: SearchIndex(model.athlete_directory()))
+
+
+def team_leaderboard(model, gender, sport):
+    return _cached(
+        model, ("team", gender, sport),
+        lambda: model.team_leaderboard(gender, sport),
+    )
+
+
+def individual_leaderboard(model, gender, sport, division):
+    return _cached(
+        model, ("individual", gender, sport, division),
+        lambda: model.individual_leaderboard(gender, sport, division),
+    )
+
+
+def clinch_statuses(model, gender, sport):
+    """Clinch/elimination statuses for a gender/sport (see clinch.py), or None outside a season in progress.
+
+    Recomputed only when the gender/sport's own results change.
+    """
+    tenant = current_tenant.get()
+    season_races = tenant.season_races if tenant is not None else clinch.SEASON_RACES
+    remaining = {d: clinch.remaining_races(model, gender, sport, d, season_races) for d in VALID_DIVISIONS}
+    if None in remaining.values():
+        return None
+    return _cached(
+        model, ("clinch", gender, sport, season_races),
+        lambda: clinch.category_statuses(
+            {d: individual_leaderboard(model, gender, sport, d) for d in VALID_DIVISIONS},
+            team_leaderboard(model, gender, sport),
+            remaining,
+            {d: len(model.race_seq(gender, sport, d)) for d in VALID_DIVISIONS},
+        ),
+        version=(model.season, model.sport_version(gender, sport)),
+    )
+
+
+def category_context(model, gender, sport, tab):
+    """Template context for category.html (without the request).
+
+    Only the table is rendered; athlete/team dialogs load from /detail/... on open.
+    """
     if tab == "team":
-        teams = get_team_leaderboard(conn, gender, sport)
+        teams = team_leaderboard(model, gender, sport)
         athletes = None
     else:
         teams = None
-        athletes = get_individual_leaderboard(conn, gender, sport, tab)
-    conn.close()
-    return templates.TemplateResponse("category.html", {
-        "request": request,
+        athletes = individual_leaderboard(model, gender, sport, tab)
+    statuses = clinch_statuses(model, gender, sport)
+    if statuses is not None:
+        statuses = statuses["team"] if tab == "team" else statuses["individual"][tab]
+    return {
         "teams": teams,
         "athletes": athletes,
+        "clinch": statuses,
         "label": _label(gender, sport),
         "gender": gender,
         "sport": sport,
         "tab": tab,
         "categories": CATEGORIES,
-    })
+        "athlete_slugs": athlete_slugs(model),
+        "school_slugs": school_slugs(model),
+    }
+
+
+def _detail_context(model, gender, sport, tab, slug):
+    """The athlete (hs/open tab) or team (team tab) of a dialog, or None. The slug is the athlete or school id."""
+    ids = {"athlete_slugs": athlete_slugs(model), "school_slugs": school_slugs(model)}
+    if tab == "team":
+        school = school_ids(model).get(slug)
+        match = next((t for t in team_leaderboard(model, gender, sport) if t.school == school), None)
+        return {"team": match, **ids} if match else None
+    name = athlete_ids(model).get(slug)
+    match = next(
+        (a for a in individual_leaderboard(model, gender, sport, tab) if (a["first_name"], a["last_name"]) == name),
+        None,
+    )
+    return {"athlete": match, **ids} if match else None
+
+
+def detail_fragment(model, gender, sport, tab, slug):
+    """Render the dialog body for one athlete (hs/open tab) or team (team tab), or None."""
+    context = _detail_context(model, gender, sport, tab, slug)
+    if context is None:
+        return None
+    return templates.get_template("detail.html").render(gender=gender, sport=sport, tab=tab, **context)
+
+
+def athlete_slugs(model):
+    """{(first_name, last_name): id} of the season's athletes, as in /athlete/{id} and the detail URLs."""
+    return _cached(model, ("athlete_slugs",), lambda: unique_slugs(model.athlete_names()))
+
+
+def athlete_ids(model):
+    """{id: (first_name, last_name)}, the inverse of athlete_slugs()."""
+    return _cached(model, ("athlete_ids",), lambda: {v: k for k, v in athlete_slugs(model).items()})
+
+
+def school_slugs(model):
+    """{school: id} of the season's schools, as in /school/{id} and the team detail URLs."""
+    return _cached(model, ("school_slugs",), lambda: unique_slugs(model.school_names()))
+
+
+def school_ids(model):
+    """{id: school}, the inverse of school_slugs()."""
+    return _cached(model, ("school_ids",), lambda: {v: k for k, v in school_slugs(model).items()})
+
+
+def _athlete_category(model, name, gender, sport, division, rows):
+    full_name = f"{name[0]} {name[1]}"
+    school = rows[-1]["school"]
+    standing = next(
+        (a for a in individual_leaderboard(model, gender, sport, division) if (a["first_name"], a["last_name"]) == name),
+        None,
+    )
+    counting = {r["race_number"] for r in standing["all_results"] if r["counting"]} if standing else set()
+    team = next((t for t in team_leaderboard(model, gender, sport) if t.school == school), None)
+    ofsaa = ofsaa_api_data(model, gender, sport, division)
+    return {
+        "gender": gender,
+        "sport": sport,
+        "division": division,
+        "school": school,
+        "results": [
+            {**{k: r[k] for k in ("race_seq", "event_date", "place", "time_seconds", "points", "status")},
+             "counting": r["race_seq"] in counting}
+            for r in rows
+        ],
+        "individual": {
+            "rank": standing["rank"],
+            "total_points": standing["total_points"],
+            "race_count": standing["race_count"],
+        } if standing else None,
+        "team": {
+            # Rank None: excluded from the team ranking (scoring.py)
+            "rank": team.rank or None,
+            "school": team.school,
+            "total_points": team.total_points,
+            "contributing_scores": [
+                {"score": c.score, "race_number": c.race_number, "division": c.division}
+                for c in team.contributing_scores if c.athlete_name == full_name
+            ],
+        } if team else None,
+        "ofsaa": {
+            "event_date": ofsaa["event_date"],
+            "has_data": ofsaa["has_data"],
+            "individual": next(
+                (i for i in ofsaa["individual"] if (i["first_name"], i["last_name"]) == name), None
+            ),
+            "team_qualified": any(t["school"] == school for t in ofsaa["team"]),
+        },
+    }
+
+
+def athlete_profile(model, athlete_id):
+    """Everything about one athlete this season, per category they raced in, or None.
+
+    Built from the model's athlete index and the cached leaderboards, and
+    cached itself until the next ingest. Unknown ids are not cached.
+    """
+    name = athlete_ids(model).get(athlete_id)
+    if name is None:
+        return None
+
+    def build():
+        by_category = {}
+        for r in model.athlete_results(*name):
+            by_category.setdefault((r["gender"], r["sport"], r["division"]), []).append(r)
+        order = [(c["gender"], c["sport"], d) for c in CATEGORIES for d in ("hs", "open")]
+        categories = [
+            _athlete_category(model, name, *key, by_category[key])
+            for key in sorted(by_category, key=order.index)
+        ]
+        return {
+            "id": athlete_id,
+            "first_name": name[0],
+            "last_name": name[1],
+            "season": model.season,
+            "schools": sorted({c["school"] for c in categories}),
+            "categories": categories,
+        }
+
+    return _cached(model, ("athlete", athlete_id), build, entity=True)
+
+
+def school_slices(model):
+    """{id: school dashboard} for every school this season; the id is from school_slugs(), as in /school/{id}.
+
+    Each leaderboard and OFSAA result is computed once and split by school,
+    so every school's page comes from the same pass.
+    """
+    def build():
+        schools = {}
+        school_id = school_slugs(model)
+        athlete_id = athlete_slugs(model)
+
+        def category(name, gender, sport):
+            school = schools.setdefault(school_id[name], {
+                "id": school_id[name], "school": name, "season": model.season, "categories": {},
+            })
+            return school["categories"].setdefault((gender, sport), {
+                "gender": gender, "sport": sport, "team": None, "divisions": {},
+            })
+
+        for cat in CATEGORIES:
+            gender, sport = cat["gender"], cat["sport"]
+            for division in ("hs", "open"):
+                ofsaa = ofsaa_api_data(model, gender, sport, division)
+                qualified_teams = {t["school"] for t in ofsaa["team"]}
+                # Every school with results in the division, even without ranked athletes
+                for name in model.schools(gender, sport, division):
+                    category(name, gender, sport)["divisions"][division] = {
+                        "division": division,
+                        "athletes": [],
+                        "ofsaa": {
+                            "event_date": ofsaa["event_date"],
+                            "has_data": ofsaa["has_data"],
+                            "team_qualified": name in qualified_teams,
+                            "individuals": [
+                                {"id": athlete_id.get((i["first_name"], i["last_name"])),
+                                 **{k: i[k] for k in ("rank", "first_name", "last_name")}}
+                                for i in ofsaa["individual"] if i["school"] == name
+                            ],
+                        },
+                    }
+                for a in individual_leaderboard(model, gender, sport, division):
+                    category(a["school"], gender, sport)["divisions"][division]["athletes"].append({
+                        "id": athlete_id[(a["first_name"], a["last_name"])],
+                        "rank": a["rank"],
+                        "first_name": a["first_name"],
+                        "last_name": a["last_name"],
+                        "total_points": a["total_points"],
+                        "race_count": a["race_count"],
+                    })
+            for t in team_leaderboard(model, gender, sport):
+                category(t.school, gender, sport)["team"] = {
+                    # Rank None: excluded from the team ranking (scoring.py)
+                    "rank": t.rank or None,
+                    "total_points": t.total_points,
+                    "contributing_scores": [
+                        {"score": c.score, "athlete_name": c.athlete_name, "race_number": c.race_number, "division": c.division}
+                        for c in t.contributing_scores
+                    ],
+                }
+
+        for school in schools.values():
+            school["categories"] = [
+                {**c, "divisions": list(c["divisions"].values())} for c in school["categories"].values()
+            ]
+        return schools
+
+    return _cached(model, ("school_slices",), build)
+
+
+@app.get("/detail/{gender}/{sport}/{tab}/{slug}.html", response_class=HTMLResponse)
+def detail_page(gender: str, sport: str, tab: str, slug: str):
+    if gender not in VALID_GENDERS or sport not in VALID_SPORTS or tab not in VALID_TABS:
+        return HTMLResponse("Invalid parameters", status_code=404)
+    model = _get_model()
+    # Look the slug up first, so unknown ones are not cached
+    context = _detail_context(model, gender, sport, tab, slug)
+    if context is None:
+        return HTMLResponse("Not found", status_code=404)
+    html = _cached(
+        model, ("detail", gender, sport, tab, slug),
+        lambda: templates.get_template("detail.html").render(gender=gender, sport=sport, tab=tab, **context),
+        entity=True,
+    )
+    return HTMLResponse(html, headers={"Cache-Control": "public, max-age=60"})
+
+
+@app.get("/{gender}/{sport}/{tab}", response_class=HTMLResponse)
+def category_page(request: Request, gender: str, sport: str, tab: str):
+    if gender not in VALID_GENDERS or sport not in VALID_SPORTS or tab not in VALID_TABS:
+        return HTMLResponse("Invalid parameters", status_code=404)
+    model = _get_model()
+    context = category_context(model, gender, sport, tab)
+    return templates.TemplateResponse("category.html", {"request": request, **context})
 
 
 # --- JSON API routes (unchanged) ---
 
-@app.get("/api/team/{gender}/{sport}")
-def api_team_leaderboard(gender: str, sport: str):
-    if not _validate_params(gender, sport):
-        return JSONResponse({"error": "Invalid parameters"}, status_code=404)
-    conn = _get_db()
-    teams = get_team_leaderboard(conn, gender, sport)
-    conn.close()
+def team_api_data(model, gender, sport):
+    teams = team_leaderboard(model, gender, sport)
     return [
         {
             "rank": t.rank,
@@ -439,15 +1161,8 @@ def api_team_leaderboard(gender: str, sport: str):
     ]
 
 
-
-
-@app.get("/api/individual/{gender}/{sport}/{division}")
-def api_individual_leaderboard(gender: str, sport: str, division: str):
-    if not _validate_params(gender, sport, division):
-        return JSONResponse({"error": "Invalid parameters"}, status_code=404)
-    conn = _get_db()
-    athletes = get_individual_leaderboard(conn, gender, sport, division)
-    conn.close()
+def individual_api_data(model, gender, sport, division):
+    athletes = individual_leaderboard(model, gender, sport, division)
     return [
         {
             "rank": i + 1,
@@ -459,3 +1174,112 @@ def api_individual_leaderboard(gender: str, sport: str, division: str):
         }
         for i, a in enumerate(athletes)
     ]
+
+
+@app.get("/api/team/{gender}/{sport}")
+def api_team_leaderboard(gender: str, sport: str):
+    if not _validate_params(gender, sport):
+        return JSONResponse({"error": "Invalid parameters"}, status_code=404)
+    model = _get_model()
+    data = team_api_data(model, gender, sport)
+    return data
+
+
+@app.get("/api/individual/{gender}/{sport}/{division}")
+def api_individual_leaderboard(gender: str, sport: str, division: str):
+    if not _validate_params(gender, sport, division):
+        return JSONResponse({"error": "Invalid parameters"}, status_code=404)
+    model = _get_model()
+    data = individual_api_data(model, gender, sport, division)
+    return data
+
+
+def ofsaa_api_data(model, gender, sport, division):
+    return _cached(model, ("ofsaa", gender, sport, division), lambda: model.ofsaa_qualifiers(gender, sport, division))
+
+
+def batch_view(model, view):
+    """Payload of one /api/batch view descriptor. Raises ValueError if it is invalid."""
+    kind, gender, sport, division, school, athlete = (
+        view.get(k) for k in ("view", "gender", "sport", "division", "school", "athlete")
+    )
+    # JSON can carry any type; everything but the race number is a string
+    if any(v is not None and not isinstance(v, str) for v in (gender, sport, division, school, athlete)):
+        raise ValueError("Invalid parameters")
+    if kind == "team":
+        if not _validate_params(gender, sport):
+            raise ValueError("Invalid parameters")
+        return team_api_data(model, gender, sport)
+    if kind not in ("individual", "races", "ofsaa"):
+        raise ValueError("Unknown view; expected individual, team, races or ofsaa")
+    if division is None or not _validate_params(gender, sport, division):
+        raise ValueError("Invalid parameters")
+    if kind == "individual":
+        return individual_api_data(model, gender, sport, division)
+    if kind == "ofsaa":
+        return ofsaa_api_data(model, gender, sport, division)
+    race = view.get("race")
+    if race is not None and (not isinstance(race, int) or isinstance(race, bool)):
+        raise ValueError("Invalid race")
+    # Filtered race results are cheap and too varied to cache
+    return model.race_results(gender, sport, division, race, school=school or None, athlete=athlete or None)
+
+
+def batch_data(views):
+    """{"season", "results"} for a list of view descriptors, in order.
+
+    Every view reads the same model, so the batch is consistent even if an
+    ingest lands meanwhile, and leaderboards shared between views (or with
+    the single-view endpoints) are computed once.
+    """
+    model = _get_model()
+    results = []
+    for view in views:
+        try:
+            results.append({"data": batch_view(model, view)})
+        except ValueError as e:
+            results.append({"error": str(e)})
+    return {"season": model.season, "results": results}
+
+
+@app.post("/api/batch")
+async def api_batch(request: Request):
+    """Several JSON views (individual, team, races, ofsaa) in one round trip."""
+    try:
+        views = await request.json()
+    except ValueError:
+        views = None
+    if (not isinstance(views, list) or not 1 <= len(views) <= MAX_BATCH_VIEWS
+            or not all(isinstance(v, dict) for v in views)):
+        return JSONResponse({"error": f"Expected a JSON list of 1 to {MAX_BATCH_VIEWS} view objects"}, status_code=400)
+    return await run_in_threadpool(batch_data, views)
+
+
+@app.get("/api/projection/{gender}/{sport}")
+def api_projection(gender: str, sport: str, remaining: int = 1):
+    """Monte Carlo win/podium probabilities for the rest of the season (see projection.py).
+
+    Clients choose only the number of remaining races, from a short range;
+    the simulation count is fixed, so there are a handful of projections
+    per gender/sport, each computed once per change to its results and one
+    at a time.
+    """
+    if not _validate_params(gender, sport):
+        return JSONResponse({"error": "Invalid parameters"}, status_code=404)
+    if not 1 <= remaining <= projection.WEB_MAX_REMAINING_RACES:
+        return JSONResponse({"error": "Invalid parameters"}, status_code=400)
+    model = _get_model()
+    key = ("projection", gender, sport, remaining)
+    version = (model.season, model.sport_version(gender, sport))
+
+    def run():
+        return projection.project(model, gender, sport, remaining, projection.WEB_SIMULATIONS)
+
+    def compute():
+        # Only misses take the lock; a concurrent miss for the same key finds the result on the second lookup
+        with _projection_locks_guard:
+            lock = _projection_locks.setdefault((request_season.get(),) + key, threading.Lock())
+        with lock:
+            return _cached(model, key, run, version=version)
+
+    return _cached(model, key, compute, version=version)
@@ -0,0 +1,176 @@
+"""What-if rescoring: standings under alternative rules.
+
+Loads the season once into a SeasonModel (see model.py) and scores every
+category under each rule variant, reusing the grouped results, then
+reports how each athlete's and team's rank changes against the current
+rules. Variants come from a JSON list of rule overrides (see rules.py) or
+from --set for a single variant:
+
+    [
+        {"name": "top-5", "individual_top_n_late": 5},
+        {"name": "10 team scores", "max_team_scores": 10},
+        {"name": "flat open", "open_points": {"1": 25, "2": 24, "3": 23}}
+    ]
+
+    python3 -m yraa.whatif --db data/yraa.db --variants variants.json
+    python3 -m yraa.whatif --db data/yraa.db --set max_team_scores=10 --category girls/ski
+"""
+import argparse
+import json
+import sys
+
+from .db import get_connection, get_season_connection, init_db
+from .model import SeasonModel
+from .rules import DEFAULT_RULES, Rules
+
+
+def load_variants(path):
+    """Read a JSON list of rule overrides. Returns a list of Rules."""
+    with open(path) as f:
+        data = json.load(f)
+    variants = []
+    for i, overrides in enumerate(data):
+        overrides = {"name": f"variant {i + 1}", **overrides}
+        variants.append(Rules.from_dict(overrides))
+    return variants
+
+
+def _parse_set(values):
+    overrides = {"name": ", ".join(values)}
+    for item in values:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = int(value)
+        except ValueError:
+            raise ValueError(f"--set {item}: expected rule=integer")
+    return Rules.from_dict(overrides)
+
+
+def _individual_ranks(board):
+    return {(a["first_name"], a["last_name"]): (a["rank"], a["school"]) for a in board}
+
+
+def _team_ranks(teams):
+    # Rank 0 marks a team excluded from the team ranking (scoring.py)
+    return {t.school: (t.rank or None, t.school) for t in teams}
+
+
+def rank_changes(before, after):
+    """Compare {key: (rank, school)} maps. Returns changed entries sorted by new rank.
+
+    A rank of None means the entry is not ranked under that rule set.
+    """
+    changes = []
+    for key in before.keys() | after.keys():
+        old, school = before.get(key, (None, None))
+        new, school = after.get(key, (None, school))
+        if old != new:
+            name = key if isinstance(key, str) else f"{key[1].upper()}, {key[0]}"
+            changes.append({"name": name, "school": school, "from": old, "to": new})
+    changes.sort(key=lambda c: (c["to"] is None, c["to"] or 0, c["from"] or 0))
+    return changes
+
+
+def run_whatif(model, variants, categories=None):
+    """Score the season under DEFAULT_RULES and each variant.
+
+    `categories` optionally limits the run to (gender, sport) pairs.
+    Returns {variant name: {"individual": {(g, s, d): changes}, "team": {(g, s): changes}}}.
+    """
+    keys = [k for k in model.categories() if categories is None or k[:2] in categories]
+    sports = sorted({k[:2] for k in keys})
+
+    baseline_ind = {k: _individual_ranks(model.individual_leaderboard(*k)) for k in keys}
+    baseline_team = {k: _team_ranks(model.team_leaderboard(*k)) for k in sports}
+
+    report = {}
+    for rules in variants:
+        report[rules.name] = {
+            "individual": {
+                k: rank_changes(baseline_ind[k], _individual_ranks(model.individual_leaderboard(*k, rules=rules)))
+                for k in keys
+            },
+            "team": {
+                k: rank_changes(baseline_team[k], _team_ranks(model.team_leaderboard(*k, rules=rules)))
+                for k in sports
+            },
+        }
+    return report
+
+
+def _fmt_rank(rank):
+    return str(rank) if rank is not None else "-"
+
+
+def print_report(report, top=None):
+    """Print rank changes per variant; `top` limits each list to entries ranked in the top N before or after."""
+    for name, sections in report.items():
+        print(f"=== {name} ===")
+        groups = [("individual", k, v) for k, v in sections["individual"].items()]
+        groups += [("team", k, v) for k, v in sections["team"].items()]
+        for kind, key, changes in groups:
+            label = " ".join(part.title() if part != "hs" else "HS" for part in key)
+            if kind == "team":
+                label += " Team"
+            if top:
+                changes = [c for c in changes if min(c["from"] or top + 1, c["to"] or top + 1) <= top]
+            if not changes:
+                print(f"  {label}: no changes")
+                continue
+            print(f"  {label}: {len(changes)} rank change(s)")
+            for c in changes:
+                school = f" ({c['school']})" if kind == "individual" else ""
+                print(f"    {_fmt_rank(c['from']):>4} -> {_fmt_rank(c['to']):<4} {c['name']}{school}")
+        print()
+
+
+def _json_report(report):
+    return {
+        name: {kind: {"/".join(k): v for k, v in groups.items()} for kind, groups in sections.items()}
+        for name, sections in report.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore the season under alternative rules and report rank changes")
+    parser.add_argument("--db", default="data/yraa.db", help="Database path (default: data/yraa.db)")
+    parser.add_argument("--variants", help="JSON file with a list of rule overrides")
+    parser.add_argument("--set", action="append", default=[], metavar="RULE=N",
+                        help="Add one variant overriding integer rules (repeatable), e.g. max_team_scores=10")
+    parser.add_argument("--season", type=int, help="Season to rescore (default: current)")
+    parser.add_argument("--category", action="append", metavar="GENDER/SPORT",
+                        help="Limit to a category, e.g. girls/ski (repeatable)")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Only list changes within the top N (default: 10, 0 for all)")
+    parser.add_argument("--json", help="Also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    try:
+        variants = load_variants(args.variants) if args.variants else []
+        if args.set:
+            variants.append(_parse_set(args.set))
+    except (OSError, ValueError) as e:
+        print(f"Invalid variants: {e}")
+        sys.exit(1)
+    if not variants:
+        parser.error("give --variants and/or --set")
+
+    init_db(args.db).close()
+    conn = get_season_connection(args.db, args.season) if args.season else get_connection(args.db)
+    model = SeasonModel.load(conn, args.season)
+    conn.close()
+
+    categories = {tuple(c.split("/")) for c in args.category} if args.category else None
+    report = run_whatif(model, variants, categories)
+    print(f"Season {model.season}: {len(variants)} variant(s) against the current rules "
+          f"(top {DEFAULT_RULES.individual_top_n}/{DEFAULT_RULES.individual_top_n_late} individual, "
+          f"{DEFAULT_RULES.max_team_scores} team scores).\n")
+    print_report(report, top=args.top or None)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(_json_report(report), f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()